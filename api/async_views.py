@@ -0,0 +1,79 @@
+"""
+Async версия API поиска заказов для запуска под ASGI (settings.ASYNC_VIEWS).
+DRF не поддерживает async вьюшки, поэтому это обычная Django вьюшка
+с тем же форматом запроса и ответа, что и views.get_customer_orders.
+"""
+import json
+import logging
+
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from coffee_shop.db_router import read_from_replica
+from products.keyset import ORDER_KEYS, apaginate_keyset
+from products.models import Order, TelegramUser
+from products.phones import phone_lookup_key
+
+from .views import orders_payload
+
+logger = logging.getLogger(__name__)
+
+
+def _request_data(request):
+    """Тело запроса как dict: JSON (бот) или form data"""
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+    return request.POST
+
+
+async def afind_customer_orders(phone_number, telegram_chat_id=None, cursor=None):
+    """find_customer_orders() через async ORM"""
+    normalized_phone = ''.join(c for c in phone_number if c.isdigit() or c == '+')
+
+    telegram_user, created = await TelegramUser.objects.aget_or_create(
+        phone_number=normalized_phone,
+        defaults={'telegram_chat_id': telegram_chat_id}
+    )
+    if not created and telegram_user.telegram_chat_id != telegram_chat_id:
+        telegram_user.telegram_chat_id = telegram_chat_id
+        await telegram_user.asave()
+
+    orders = await apaginate_keyset(
+        Order.objects.filter(phone_normalized=phone_lookup_key(phone_number)).prefetch_related('lines'),
+        ORDER_KEYS,
+        cursor,
+        per_page=5,
+    )
+    return orders_payload(phone_number, orders)
+
+
+@csrf_exempt
+@require_POST
+@read_from_replica
+async def get_customer_orders(request):
+    """
+    API endpoint для получения последних 5 заказов по номеру телефона.
+    Необязательный cursor (next_cursor прошлого ответа) - следующие 5 заказов.
+    """
+    data = _request_data(request)
+    if data is None:
+        return JsonResponse({'detail': 'JSON parse error'}, status=400)
+
+    phone_number = data.get('phone_number')
+    telegram_chat_id = data.get('telegram_chat_id')
+    cursor = data.get('cursor')
+
+    if not phone_number:
+        return JsonResponse({'error': 'Phone number is required'}, status=400)
+
+    try:
+        return JsonResponse(await afind_customer_orders(phone_number, telegram_chat_id, cursor))
+
+    except Exception as e:
+        logger.error(f"Error getting orders for {phone_number}: {str(e)}")
+        return JsonResponse({'error': 'Internal server error'}, status=500)
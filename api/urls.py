@@ -1,6 +1,12 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+if settings.ASYNC_VIEWS:
+    from .async_views import get_customer_orders
+else:
+    get_customer_orders = views.get_customer_orders
+
 urlpatterns = [
-    path('customer-orders/', views.get_customer_orders, name='customer-orders'),
-]
\ No newline at end of file
+    path('customer-orders/', get_customer_orders, name='customer-orders'),
+]
@@ -2,18 +2,96 @@ from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
 from django.db.models import Q
+from coffee_shop.db_router import read_from_replica
+from products.keyset import ORDER_KEYS, paginate_keyset
 from products.models import Order, TelegramUser
+from products.phones import phone_lookup_key
 import logging
 
 logger = logging.getLogger(__name__)
 
+def find_customer_orders(phone_number, telegram_chat_id=None, cursor=None):
+    """
+    Ищет последние 5 заказов по номеру телефона и возвращает данные ответа.
+    Следующие 5 - по курсору next_cursor из предыдущего ответа.
+    Используется API и ботом, работающим напрямую с ORM.
+    """
+    # Нормализуем номер телефона (убираем все кроме цифр и +)
+    normalized_phone = ''.join(c for c in phone_number if c.isdigit() or c == '+')
+    
+    print(f"🔍 Поиск заказов для:")
+    print(f"   Исходный номер: {phone_number}")
+    print(f"   Нормализованный: {normalized_phone}")
+    
+    # Сохраняем/обновляем связь телефона с Telegram chat_id
+    telegram_user, created = TelegramUser.objects.get_or_create(
+        phone_number=normalized_phone,
+        defaults={'telegram_chat_id': telegram_chat_id}
+    )
+    
+    if not created and telegram_user.telegram_chat_id != telegram_chat_id:
+        telegram_user.telegram_chat_id = telegram_chat_id
+        telegram_user.save()
+    
+    # Индексированный поиск по тому же ключу, что сохраняет Order.save()
+    orders = paginate_keyset(
+        Order.objects.filter(phone_normalized=phone_lookup_key(phone_number)).prefetch_related('lines'),
+        ORDER_KEYS,
+        cursor,
+        per_page=5,
+    )
+    
+    print(f"   Найдено заказов: {len(orders)}")
+    
+    return orders_payload(phone_number, orders)
+
+def orders_payload(phone_number, orders):
+    """Данные ответа по странице заказов (KeysetPage с загруженными lines)"""
+    if not orders:
+        return {
+            'message': f'Заказы для телефона {phone_number} не найдены',
+            'orders': []
+        }
+    
+    orders_data = []
+    for order in orders:
+        order_data = {
+            'order_id': order.id,
+            'created_at': order.created_at.strftime('%d.%m.%Y %H:%M'),
+            'status': order.get_status_display(),
+            'total_price': str(order.total_price),
+            'items': []
+        }
+        
+        # Состав заказа берется из снимка позиций
+        for item in order.lines.all():
+            item_data = {
+                'product_name': item.product_name,
+                'quantity': item.quantity,
+                'unit_price': str(item.unit_price),
+                'total_price': str(item.total_price)
+            }
+            order_data['items'].append(item_data)
+        
+        orders_data.append(order_data)
+    
+    return {
+        'phone_number': phone_number,
+        'total_orders_found': len(orders_data),
+        'orders': orders_data,
+        'next_cursor': orders.next_cursor
+    }
+
 @api_view(['POST'])
+@read_from_replica
 def get_customer_orders(request):
     """
-    API endpoint для получения последних 5 заказов по номеру телефона
+    API endpoint для получения последних 5 заказов по номеру телефона.
+    Необязательный cursor (next_cursor прошлого ответа) - следующие 5 заказов.
     """
     phone_number = request.data.get('phone_number')
     telegram_chat_id = request.data.get('telegram_chat_id')
+    cursor = request.data.get('cursor')
     
     if not phone_number:
         return Response(
@@ -22,72 +100,7 @@ def get_customer_orders(request):
         )
     
     try:
-        # Нормализуем номер телефона (убираем все кроме цифр и +)
-        normalized_phone = ''.join(c for c in phone_number if c.isdigit() or c == '+')
-        
-        print(f"🔍 Поиск заказов для:")
-        print(f"   Исходный номер: {phone_number}")
-        print(f"   Нормализованный: {normalized_phone}")
-        
-        # Сохраняем/обновляем связь телефона с Telegram chat_id
-        telegram_user, created = TelegramUser.objects.get_or_create(
-            phone_number=normalized_phone,
-            defaults={'telegram_chat_id': telegram_chat_id}
-        )
-        
-        if not created and telegram_user.telegram_chat_id != telegram_chat_id:
-            telegram_user.telegram_chat_id = telegram_chat_id
-            telegram_user.save()
-        
-        # Нормализуем ВСЕ номера в базе для поиска
-        all_orders = Order.objects.all()
-        matching_orders = []
-        
-        for order in all_orders:
-            # Нормализуем номер из базы
-            order_phone_normalized = ''.join(c for c in order.phone if c.isdigit() or c == '+')
-            if order_phone_normalized == normalized_phone:
-                matching_orders.append(order)
-        
-        # Берем последние 5 заказов
-        orders = sorted(matching_orders, key=lambda x: x.created_at, reverse=True)[:5]
-        
-        print(f"   Найдено заказов: {len(orders)}")
-        
-        if not orders:
-            return Response({
-                'message': f'Заказы для телефона {phone_number} не найдены',
-                'orders': []
-            }, status=status.HTTP_200_OK)
-        
-        orders_data = []
-        for order in orders:
-            order_data = {
-                'order_id': order.id,
-                'created_at': order.created_at.strftime('%d.%m.%Y %H:%M'),
-                'status': order.get_status_display(),
-                'total_price': str(order.total_price),
-                'items': []
-            }
-            
-            # Получаем товары из корзины заказа
-            cart_items = order.cart.items.all()
-            for item in cart_items:
-                item_data = {
-                    'product_name': item.product_name,
-                    'quantity': item.quantity,
-                    'unit_price': str(item.unit_price),
-                    'total_price': str(item.total_price)
-                }
-                order_data['items'].append(item_data)
-            
-            orders_data.append(order_data)
-        
-        return Response({
-            'phone_number': phone_number,
-            'total_orders_found': len(orders_data),
-            'orders': orders_data
-        })
+        return Response(find_customer_orders(phone_number, telegram_chat_id, cursor))
         
     except Exception as e:
         logger.error(f"Error getting orders for {phone_number}: {str(e)}")
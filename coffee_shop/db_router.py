@@ -0,0 +1,150 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+REPLICA_DB_ALIAS = 'replica'
+# Cookie: до какого времени (unix time) запросы клиента читают с основной базы
+STICKY_COOKIE = 'db_primary_until'
+
+# Код, которому допустимо отставание реплики (каталог, поиск заказов ботом)
+_replica_allowed = ContextVar('replica_allowed', default=False)
+# Клиент недавно что-то записал (cookie) - читать с основной базы
+_sticky = ContextVar('replica_sticky', default=False)
+# Текущий запрос/задача уже что-то записали - тоже читать с основной базы
+_wrote = ContextVar('wrote_to_primary', default=False)
+
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+def has_replica():
+    return REPLICA_DB_ALIAS in settings.DATABASES
+
+
+@contextmanager
+def replica_reads():
+    """Чтения внутри блока могут идти на реплику (если нет закрепления за основной базой)"""
+    token = _replica_allowed.set(True)
+    try:
+        yield
+    finally:
+        _replica_allowed.reset(token)
+
+
+def read_from_replica(view):
+    """Декоратор вьюшки (обычной или async), которой можно читать данные с реплики"""
+    if iscoroutinefunction(view):
+        async def async_wrapper(request, *args, **kwargs):
+            with replica_reads():
+                return await view(request, *args, **kwargs)
+
+        return wraps(view)(async_wrapper)
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        with replica_reads():
+            return view(request, *args, **kwargs)
+
+    return wrapper
+
+
+def _track_writes(execute, sql, params, many, context):
+    """После любого изменения данных чтения в этом контексте идут на основную базу"""
+    if sql.lstrip()[:7].upper().startswith(WRITE_STATEMENTS):
+        _wrote.set(True)
+    return execute(sql, params, many, context)
+
+
+@receiver(connection_created)
+def install_write_tracking(sender, connection, **kwargs):
+    if connection.alias == DEFAULT_DB_ALIAS and _track_writes not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_track_writes)
+
+
+class PrimaryReplicaRouter:
+    """
+    Запись всегда в основную базу ('default'). Чтение на реплику - только
+    внутри replica_reads()/read_from_replica и только если ни текущий запрос,
+    ни недавние запросы того же клиента ничего не записывали
+    (read-your-writes, см. ReplicaStickinessMiddleware).
+    """
+
+    def db_for_read(self, model, **hints):
+        if has_replica() and _replica_allowed.get() and not (_sticky.get() or _wrote.get()):
+            return REPLICA_DB_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплика содержит те же данные, что и основная база
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Настоящую реплику заполняет репликация; тестовой локальной
+        # реплике (settings.TESTING) нужна та же схема
+        return db == DEFAULT_DB_ALIAS or settings.TESTING
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Запрос, который что-то записал, ставит cookie: следующие
+    DATABASE_REPLICA_STICKY_SECONDS секунд запросы этого клиента читают
+    с основной базы, пока реплика догоняет изменения.
+    Поддерживает и WSGI, и ASGI без лишнего перехода в поток.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        tokens = self._begin(request)
+        try:
+            response = self.get_response(request)
+            wrote = _wrote.get()
+        finally:
+            self._end(tokens)
+        return self._finish(response, wrote)
+
+    async def __acall__(self, request):
+        tokens = self._begin(request)
+        try:
+            response = await self.get_response(request)
+            wrote = _wrote.get()
+        finally:
+            self._end(tokens)
+        return self._finish(response, wrote)
+
+    def _begin(self, request):
+        try:
+            sticky_until = float(request.COOKIES.get(STICKY_COOKIE, 0))
+        except ValueError:
+            sticky_until = 0
+        return _sticky.set(sticky_until > time.time()), _wrote.set(False)
+
+    def _end(self, tokens):
+        sticky_token, wrote_token = tokens
+        _sticky.reset(sticky_token)
+        _wrote.reset(wrote_token)
+
+    def _finish(self, response, wrote):
+        if wrote:
+            seconds = settings.DATABASE_REPLICA_STICKY_SECONDS
+            response.set_cookie(
+                STICKY_COOKIE, str(time.time() + seconds),
+                max_age=seconds, httponly=True, samesite='Lax',
+            )
+        return response
@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -25,6 +27,9 @@ SECRET_KEY = 'django-insecure-l=we4p)@m^&k&l-s89263!$(wjndg2=np*+5j^05zuq$+=7a1&
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
 
+# manage.py test (тестовый раннер всегда работает с DEBUG=False)
+TESTING = sys.argv[1:2] == ['test']
+
 ALLOWED_HOSTS = []
 
 
@@ -51,6 +56,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'coffee_shop.db_router.ReplicaStickinessMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -82,12 +88,107 @@ WSGI_APPLICATION = 'coffee_shop.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
+# Настройки соединения SQLite для нескольких процессов (сайт, бот, outbox):
+# WAL - читатели не ждут пишущую транзакцию; synchronous=NORMAL в режиме WAL
+# безопасен и не делает fsync на каждый коммит; mmap ускоряет чтение;
+# busy_timeout и timeout - ожидание блокировки вместо "database is locked";
+# IMMEDIATE берет блокировку записи в начале транзакции, без тупиков
+# при повышении блокировки чтения до записи.
+SQLITE_INIT_COMMAND = (
+    'PRAGMA journal_mode=WAL;'
+    'PRAGMA synchronous=NORMAL;'
+    'PRAGMA mmap_size=268435456;'
+    'PRAGMA busy_timeout=20000;'
+    'PRAGMA foreign_keys=ON;'
+)
+
+# База выбирается переменными окружения: DATABASE_ENGINE=postgresql
+# и POSTGRES_* для продакшена, по умолчанию - SQLite в файле проекта.
+DATABASE_ENGINE = os.environ.get('DATABASE_ENGINE', 'sqlite')
+
+if DATABASE_ENGINE == 'postgresql':
+    POSTGRES_SETTINGS = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get('POSTGRES_DB', 'coffee_shop'),
+        'USER': os.environ.get('POSTGRES_USER', 'coffee_shop'),
+        'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+        'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+        'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {},
+    }
+    # Пул соединений psycopg (внутри процесса) или постоянные соединения
+    # на поток - Django не разрешает использовать их вместе
+    POSTGRES_POOL_MAX_SIZE = int(os.environ.get('POSTGRES_POOL_MAX_SIZE', 0))
+    if POSTGRES_POOL_MAX_SIZE:
+        POSTGRES_SETTINGS['CONN_MAX_AGE'] = 0
+        POSTGRES_SETTINGS['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('POSTGRES_POOL_MIN_SIZE', 2)),
+            'max_size': POSTGRES_POOL_MAX_SIZE,
+            'timeout': 10,
+        }
+    else:
+        POSTGRES_SETTINGS['CONN_MAX_AGE'] = int(os.environ.get('POSTGRES_CONN_MAX_AGE', 60))
+
+    DATABASES = {'default': POSTGRES_SETTINGS}
+
+    # Реплика только для чтения (см. coffee_shop.db_router). В тестах
+    # она указывает на тестовую основную базу.
+    if os.environ.get('POSTGRES_REPLICA_HOST'):
+        DATABASES['replica'] = {
+            **POSTGRES_SETTINGS,
+            'OPTIONS': dict(POSTGRES_SETTINGS['OPTIONS']),
+            'NAME': os.environ.get('POSTGRES_REPLICA_DB', POSTGRES_SETTINGS['NAME']),
+            'HOST': os.environ['POSTGRES_REPLICA_HOST'],
+            'PORT': os.environ.get('POSTGRES_REPLICA_PORT', POSTGRES_SETTINGS['PORT']),
+            'TEST': {'MIRROR': 'default'},
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                'init_command': SQLITE_INIT_COMMAND,
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': 20,
+            },
+        }
+    }
+    if TESTING:
+        # Вторая локальная база изображает реплику: тесты проверяют, куда
+        # роутер отправляет чтения (coffee_shop.db_router, products.tests).
+        # Она мигрируется отдельно (не TEST MIRROR: тестам нужны разные
+        # данные в базах), поэтому RunPython миграции работают с
+        # schema_editor.connection.alias, а не с менеджером по умолчанию
+        DATABASES['replica'] = {
+            **DATABASES['default'],
+            'NAME': BASE_DIR / 'db_replica.sqlite3',
+            'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        }
+
+DATABASE_ROUTERS = ['coffee_shop.db_router.PrimaryReplicaRouter']
+# Сколько секунд после записи клиент читает только с основной базы
+DATABASE_REPLICA_STICKY_SECONDS = int(os.environ.get('DATABASE_REPLICA_STICKY_SECONDS', 5))
+
+# Очередь записей внутри процесса: транзакции записи (products.transactions)
+# выполняются по одной, потоки ждут своей очереди у блокировки, а не в SQLite
+SQLITE_SERIALIZE_WRITES = os.environ.get('SQLITE_SERIALIZE_WRITES') == '1'
+
+
+# Cache
+# Файловый кэш общий для всех процессов на одном сервере (сайт и бот),
+# поэтому версии ключей, сброшенные сигналами, видны везде.
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'django_cache',
     }
 }
+if TESTING:
+    # Тесты не трогают кэш работающего сайта и бота
+    CACHES['default'] = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
 
 
 # Password validation
@@ -142,6 +243,29 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+STORAGES = {
+    # Медиа с content-addressed именами (одинаковые загрузки - один файл)
+    'default': {
+        'BACKEND': 'coffee_shop.storage.HashedMediaStorage',
+    },
+    # Хэш в именах статики и заранее сжатые .gz/.br копии (collectstatic).
+    # В разработке и тестах manifest нет - обычное хранилище без хэшей
+    'staticfiles': {
+        'BACKEND': (
+            'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG or TESTING
+            else 'coffee_shop.storage.CompressedManifestStaticFilesStorage'
+        ),
+    },
+}
+
+# Раздавать статику и медиа самим Django (coffee_shop.static_files) с
+# Cache-Control: immutable. Отключить, если этим занимается веб-сервер.
+SERVE_STATIC_FILES = True
+
+# Async вьюшки каталога и API заказов (products.async_views, api.async_views).
+# asgi.py включает их по умолчанию, под WSGI остаются обычные вьюшки.
+ASYNC_VIEWS = os.environ.get('DJANGO_ASYNC_VIEWS') == '1'
+
 
 LOGIN_URL = '/accounts/login/'
 LOGIN_REDIRECT_URL = '/'
@@ -155,4 +279,32 @@ REST_FRAMEWORK = {
 }
 
 # Telegram Bot settings
-TELEGRAM_BOT_TOKEN = ''
+TELEGRAM_BOT_TOKEN = os.environ.get('TELEGRAM_BOT_TOKEN', '')
+# 'polling' - отдельный процесс run_bot, 'webhook' - Telegram присылает обновления
+# в ASGI приложение (telegram_bot.views), заказы ищутся в том же процессе
+TELEGRAM_BOT_MODE = os.environ.get('TELEGRAM_BOT_MODE', 'polling')
+# Публичный https адрес вебхука и секрет из заголовка X-Telegram-Bot-Api-Secret-Token
+TELEGRAM_WEBHOOK_URL = os.environ.get('TELEGRAM_WEBHOOK_URL', '')
+TELEGRAM_WEBHOOK_SECRET = os.environ.get('TELEGRAM_WEBHOOK_SECRET', '')
+# Адрес Bot API; для локальной проверки - заглушка из команды fake_telegram
+TELEGRAM_BOT_API_BASE_URL = os.environ.get('TELEGRAM_BOT_API_BASE_URL', 'https://api.telegram.org/bot')
+# 'http' - запросы к API заказов, 'orm' - поиск заказов в процессе бота
+TELEGRAM_BOT_ORDERS_MODE = 'http'
+TELEGRAM_BOT_API_URL = 'http://localhost:8000/api/customer-orders/'
+TELEGRAM_BOT_API_TIMEOUT = 10
+TELEGRAM_BOT_API_RETRIES = 2
+# Обновлений бота, обрабатываемых одновременно (разные чаты параллельно,
+# сообщения одного чата - по очереди), и потоков для запросов к ORM
+TELEGRAM_BOT_MAX_CONCURRENCY = 20
+# Принятых, но еще не обработанных обновлений не больше (остальные ждут в очереди)
+TELEGRAM_BOT_MAX_PENDING_UPDATES = 1000
+# Период вывода метрик бота (глубина очереди, время обработчиков), 0 - не выводить
+TELEGRAM_BOT_METRICS_INTERVAL = 60
+# Время жизни кэша ответов бота по номеру телефона (секунды, 0 - без кэша)
+TELEGRAM_BOT_CACHE_TTL = 60
+# Номеров в кэше ответов бота не больше (давно не запрошенные вытесняются)
+TELEGRAM_BOT_CACHE_MAX_ENTRIES = 10000
+# Уведомления о смене статуса заказа (send_order_notifications): сообщений в секунду
+# на бота (лимит Telegram - 30, часть оставлена ответам бота) и на один чат
+TELEGRAM_NOTIFY_GLOBAL_RATE = 25
+TELEGRAM_NOTIFY_CHAT_RATE = 1
@@ -0,0 +1,77 @@
+import mimetypes
+import posixpath
+import re
+from pathlib import Path
+
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.urls import re_path
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from .storage import is_hashed_name
+
+# Файлы с хэшем в имени кэшируются браузером навсегда
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# Остальные (старые медиа, favicon) - на час с повторной проверкой
+DEFAULT_CACHE_CONTROL = 'public, max-age=3600'
+
+# Заранее сжатые копии (см. CompressedManifestStaticFilesStorage), в порядке предпочтения
+PRECOMPRESSED_ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+
+def _accepted_encodings(request):
+    header = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    return {part.split(';')[0].strip() for part in header.split(',')}
+
+
+def serve(request, path, document_root):
+    """
+    Отдает файл из document_root: заранее сжатую копию, если клиент ее
+    принимает, Cache-Control: immutable для хэшированных имен и 304 по
+    If-Modified-Since. Подходит для продакшена без отдельного веб-сервера.
+    """
+    path = posixpath.normpath(path).lstrip('/')
+    try:
+        full_path = Path(safe_join(document_root, path))
+    except ValueError:
+        raise Http404('Файл не найден')
+    if not full_path.is_file():
+        raise Http404('Файл не найден')
+
+    stat = full_path.stat()
+    if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime):
+        response = HttpResponseNotModified()
+    else:
+        content_type, encoding = mimetypes.guess_type(str(full_path))
+        served_path, content_encoding = full_path, encoding
+        accepted = _accepted_encodings(request)
+        for name, suffix in PRECOMPRESSED_ENCODINGS:
+            compressed = full_path.with_name(full_path.name + suffix)
+            if name in accepted and compressed.is_file():
+                served_path, content_encoding = compressed, name
+                break
+
+        response = FileResponse(
+            served_path.open('rb'), content_type=content_type or 'application/octet-stream'
+        )
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        if content_encoding:
+            response['Content-Encoding'] = content_encoding
+
+    response['Cache-Control'] = (
+        IMMUTABLE_CACHE_CONTROL if is_hashed_name(path) else DEFAULT_CACHE_CONTROL
+    )
+    response['Vary'] = 'Accept-Encoding'
+    return response
+
+
+def static_file_patterns(prefix, document_root):
+    """URL-шаблоны для раздачи каталога document_root по префиксу URL (например, /media/)"""
+    return [
+        re_path(
+            r'^%s(?P<path>.*)$' % re.escape(prefix.lstrip('/')),
+            serve,
+            kwargs={'document_root': document_root},
+        ),
+    ]
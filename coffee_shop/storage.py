@@ -0,0 +1,133 @@
+import gzip
+import hashlib
+import os
+import re
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+
+try:
+    import brotli
+except ImportError:  # brotli необязателен, без него создаются только .gz копии
+    brotli = None
+
+# Имена, которые меняются вместе с содержимым: хэш из manifest (.0123456789ab.)
+# или content-addressed имя медиафайла / каталога копий (16 hex символов)
+HASHED_NAME_RE = re.compile(r'(\.[0-9a-f]{12}\.|(^|/)[0-9a-f]{16}(/|\.))')
+
+# Текстовые форматы, для которых заранее создаются сжатые копии
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.svg', '.txt', '.json', '.html', '.xml', '.ico', '.map'}
+# Маленькие файлы сжимать не выгодно
+MIN_COMPRESS_SIZE = 256
+
+
+CSS_COMMENT_RE = re.compile(r'/\*.*?\*/', re.S)
+CSS_SPACE_RE = re.compile(r'\s+')
+CSS_PUNCTUATION_RE = re.compile(r'\s*([{}:;,>])\s*')
+
+
+def minify_css(css):
+    """Убирает комментарии и лишние пробелы (для таблиц стилей без хитрых строк)"""
+    css = CSS_COMMENT_RE.sub('', css)
+    css = CSS_SPACE_RE.sub(' ', css)
+    css = CSS_PUNCTUATION_RE.sub(r'\1', css)
+    return css.replace(';}', '}').strip()
+
+
+def is_hashed_name(name):
+    """True, если содержимое файла не может измениться без смены имени"""
+    return bool(HASHED_NAME_RE.search(name))
+
+
+class HashedMediaStorage(FileSystemStorage):
+    """
+    Медиа с content-addressed именами: coffee_images/колумбия.jpg
+    сохраняется как coffee_images/<sha256[:16]>.jpg. Одинаковые загрузки
+    указывают на один файл, имя латинское и меняется вместе с содержимым,
+    поэтому файлы можно отдавать с Cache-Control: immutable.
+    """
+
+    def _save(self, name, content):
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+
+        digest = hashlib.sha256()
+        content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+
+        hashed_name = os.path.join(directory, digest.hexdigest()[:16] + extension)
+        if self.exists(hashed_name):
+            return hashed_name
+        return super()._save(hashed_name, content)
+
+    def get_available_name(self, name, max_length=None):
+        # Имя все равно заменяется хэшем в _save; если файл с таким хэшем
+        # появился параллельно, _save получит свободное имя с суффиксом
+        if not self.exists(name) or not is_hashed_name(name):
+            return name
+        return super().get_available_name(name, max_length)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Статика с хэшем в имени (manifest), минифицированным CSS и заранее
+    сжатыми копиями .gz и .br (если установлен brotli), которые создает
+    collectstatic.
+    """
+    # Файл, которого нет в manifest (забыли collectstatic), отдается без хэша,
+    # а не ломает каждую страницу ошибкой 500
+    manifest_strict = False
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            paths = self.minify_sources(paths)
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+
+        # Сжимаются итоговые файлы: .gz/.br из тех же байтов, что и хэш в имени
+        for name in self.hashed_files.values():
+            if os.path.splitext(name)[1].lower() in COMPRESSIBLE_EXTENSIONS:
+                self.compress_file(name)
+
+    def minify_sources(self, paths):
+        """
+        Минифицирует CSS до хэширования: manifest считает хэш и подставляет
+        ссылки уже по минифицированному содержимому. Минифицированный файл
+        заменяет собранную копию без хэша и становится источником для
+        post_process вместо исходного файла приложения.
+        """
+        paths = dict(paths)
+        for name, (storage, path) in paths.items():
+            if os.path.splitext(name)[1].lower() != '.css':
+                continue
+            with storage.open(path) as source:
+                css = source.read().decode('utf-8')
+            # delete, а не перезапись: при collectstatic --link копия -
+            # ссылка на исходный файл
+            if self.exists(name):
+                self.delete(name)
+            self._save(name, ContentFile(minify_css(css).encode('utf-8')))
+            paths[name] = (self, name)
+        return paths
+
+    def compress_file(self, name):
+        path = self.path(name)
+        with open(path, 'rb') as source:
+            data = source.read()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return
+
+        compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        if len(compressed) < len(data):
+            with open(path + '.gz', 'wb') as target:
+                target.write(compressed)
+
+        if brotli is not None:
+            compressed = brotli.compress(data, quality=11)
+            if len(compressed) < len(data):
+                with open(path + '.br', 'wb') as target:
+                    target.write(compressed)
@@ -15,12 +15,13 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
 from django.contrib.staticfiles.storage import staticfiles_storage
+from django.utils.functional import lazy
 from django.views.generic.base import RedirectView
 from django.urls import path, include
-from products.views import index 
+from products.urls import index
+from .static_files import static_file_patterns
 
 urlpatterns = [
 
@@ -30,10 +31,17 @@ urlpatterns = [
     path('users/', include('users.urls')),
     path('products/', include("products.urls")),
     path('', index, name='index'),
-    path('favicon.ico', RedirectView.as_view(url=staticfiles_storage.url('products/images/favicon.ico'))),
+    # URL с хэшем берется из manifest при первом запросе, а не при импорте
+    path('favicon.ico', RedirectView.as_view(url=lazy(staticfiles_storage.url, str)('products/images/favicon.ico'))),
     
 ]
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+if settings.TELEGRAM_BOT_MODE == 'webhook':
+    urlpatterns.append(path('telegram/', include('telegram_bot.urls')))
+
+if settings.SERVE_STATIC_FILES:
+    urlpatterns += static_file_patterns(settings.MEDIA_URL, settings.MEDIA_ROOT)
+    # В DEBUG статику отдает runserver из исходных каталогов
+    if not settings.DEBUG:
+        urlpatterns += static_file_patterns(settings.STATIC_URL, settings.STATIC_ROOT)
     
\ No newline at end of file
@@ -1,5 +1,10 @@
 from django.contrib import admin
-from .models import Coffee, Tea, Syrup, Order, Cart, CartItem
+from django.db.models import Q
+from coffee_shop.db_router import replica_reads
+from .models import Coffee, Tea, Syrup, Order, OrderLine, Cart, CartItem, OutboxEmail, OrderNotification
+from .orders import ORDER_STATUS_TRANSITIONS, bulk_update_order_status
+from .phones import normalize_phone_number
+from .pricing import price_cart, price_carts
 
 admin.site.register(Coffee)
 admin.site.register(Tea)
@@ -11,6 +16,9 @@ class CartItemInline(admin.TabularInline):
     extra = 0
     can_delete = False
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('coffee', 'tea', 'syrup')
+
     def unit_price(self, obj):
         return f"{obj.unit_price} руб."
     unit_price.short_description = 'Цена за единицу'
@@ -25,21 +33,85 @@ class CartAdmin(admin.ModelAdmin):
     readonly_fields = ['total_price_display']
     inlines = [CartItemInline]
 
+    def get_changelist_instance(self, request):
+        changelist = super().get_changelist_instance(request)
+        # Суммы всех корзин страницы одним запросом, а не по запросу на строку
+        priced = price_carts(changelist.result_list)
+        for cart in changelist.result_list:
+            cart.priced_cart = priced[cart.id]
+        return changelist
+
     def total_price_display(self, obj):
-        return f"{obj.total_price} руб."
+        priced = getattr(obj, 'priced_cart', None) or price_cart(obj)
+        return f"{priced.total_price} руб."
     total_price_display.short_description = 'Общая сумма'
 
+class OrderLineInline(admin.TabularInline):
+    model = OrderLine
+    readonly_fields = ['product_name', 'grams', 'quantity', 'unit_price', 'total_price']
+    fields = readonly_fields
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+def make_status_action(status, label):
+    """Действие админки: перевести выбранные заказы в status одним UPDATE"""
+    def action(modeladmin, request, queryset):
+        updated = bulk_update_order_status(list(queryset.values_list('id', flat=True)), status)
+        modeladmin.message_user(request, f'Статус "{label}" установлен у заказов: {updated}')
+    action.__name__ = f'mark_{status}'
+    action.short_description = f'Перевести в статус "{label}"'
+    return action
+
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     list_display = ['id', 'user', 'first_name', 'last_name', 'phone', 'total_price', 'status', 'created_at']
     list_filter = ['status', 'created_at']
-    search_fields = ['first_name', 'last_name', 'email', 'phone']
+    list_select_related = ['user']
+    # Поиск по номеру, телефону, email или началу фамилии (см. get_search_results)
+    search_fields = ['last_name']
+    search_help_text = 'Номер заказа, телефон, email или фамилия'
+    # COUNT(*) по всей таблице на каждой странице списка не нужен
+    show_full_result_count = False
     readonly_fields = ['created_at', 'updated_at', 'order_items_display']
-    # УБРАТЬ: inlines = [CartItemInline]  ← ЭТУ СТРОКУ УБРАТЬ
+    inlines = [OrderLineInline]
+    actions = [
+        make_status_action(status, label)
+        for status, label in Order.STATUS_CHOICES
+        if any(status in targets for targets in ORDER_STATUS_TRANSITIONS.values())
+    ]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related('lines')
+
+    def changelist_view(self, request, extra_context=None):
+        # Просмотр списка заказов (GET) только читает - с реплики. Действия
+        # приходят POST на эту же вьюшку и блокируют строки - только основная база
+        if request.method != 'GET':
+            return super().changelist_view(request, extra_context)
+        with replica_reads():
+            return super().changelist_view(request, extra_context)
+
+    def get_search_results(self, request, queryset, search_term):
+        """Точные индексируемые условия вместо icontains по четырем колонкам"""
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+
+        phone = normalize_phone_number(term)
+        if phone:
+            return queryset.filter(phone_normalized=phone), False
+        if term.lstrip('#').isdigit():
+            return queryset.filter(id=int(term.lstrip('#'))), False
+        if '@' in term:
+            return queryset.filter(email__iexact=term), False
+        return queryset.filter(Q(last_name__istartswith=term) | Q(first_name__istartswith=term)), False
 
     def order_items_display(self, obj):
         """Отображает состав заказа в админке"""
-        items = obj.cart.items.all()  # Получаем товары через корзину
+        items = obj.lines.all()  # Снимок позиций, сохраненный при оформлении
         if not items:
             return "Заказ пуст"
         
@@ -50,4 +122,17 @@ class OrderAdmin(admin.ModelAdmin):
         return "\n".join(items_list)
     order_items_display.short_description = 'Состав заказа'
 
-admin.site.register(Cart, CartAdmin)
\ No newline at end of file
+admin.site.register(Cart, CartAdmin)
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ['id', 'subject', 'status', 'attempts', 'next_attempt_at', 'sent_at']
+    list_filter = ['status']
+    readonly_fields = ['created_at', 'sent_at', 'last_error']
+
+@admin.register(OrderNotification)
+class OrderNotificationAdmin(admin.ModelAdmin):
+    list_display = ['id', 'order', 'order_status', 'chat_id', 'status', 'attempts', 'next_attempt_at', 'sent_at']
+    list_filter = ['status', 'order_status']
+    list_select_related = ['order']
+    readonly_fields = ['created_at', 'updated_at', 'sent_at', 'last_error']
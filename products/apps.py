@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class ProductsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'products'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        # Отслеживание записей (_track_writes) подключается к соединениям
+        # в connection_created - приемник нужен до первого соединения с базой
+        import coffee_shop.db_router  # noqa: F401
@@ -0,0 +1,128 @@
+"""
+Async версии вьюшек каталога для запуска под ASGI (settings.ASYNC_VIEWS).
+Данные загружаются через async ORM и async кэш, поэтому вьюшка не занимает
+поток из пула sync_to_async на время запросов к базе. Перед render()
+пользователь и корзина загружаются заранее: шаблон и контекст-процессор
+не должны обращаться к базе синхронно внутри event loop.
+"""
+from asgiref.sync import sync_to_async
+from django.http import Http404
+from django.shortcuts import redirect, render
+
+from coffee_shop.db_router import read_from_replica
+
+from .carts import aget_request_cart
+from .catalog import aget_catalog_snapshot
+from .forms import AddToCartForm
+from .keyset import PRODUCT_KEYS, apaginate_keyset
+from .models import Coffee, Syrup, Tea
+from .page_cache import cache_page_for_anonymous
+from .search import search_products
+
+
+async def _prepare_request(request):
+    """Загружает request.user и корзину, чтобы render() обошелся без запросов к базе"""
+    request.user = await request.auser()
+    await aget_request_cart(request)
+
+
+async def _catalog_product_or_404(product_type, pk):
+    product = (await aget_catalog_snapshot()).get(product_type, pk)
+    if product is None:
+        raise Http404('Товар не найден')
+    return product
+
+
+@cache_page_for_anonymous()
+@read_from_replica
+async def index(request):
+    catalog = await aget_catalog_snapshot()
+    await _prepare_request(request)
+    return render(request, 'products/index.html', {
+        'coffees': catalog.coffees,
+        'teas': catalog.teas,
+        'syrups': catalog.syrups,
+    })
+
+
+@cache_page_for_anonymous('cursor')
+@read_from_replica
+async def coffee_list(request):
+    coffees = await apaginate_keyset(Coffee.objects.all(), PRODUCT_KEYS, request.GET.get('cursor'), per_page=4)
+    await _prepare_request(request)
+    return render(request, 'products/coffee_list.html', {'coffees': coffees})
+
+
+@cache_page_for_anonymous('cursor')
+@read_from_replica
+async def tea_list(request):
+    teas = await apaginate_keyset(Tea.objects.all(), PRODUCT_KEYS, request.GET.get('cursor'), per_page=12)
+    await _prepare_request(request)
+    return render(request, 'products/tea_list.html', {'teas': teas})
+
+
+@cache_page_for_anonymous('cursor')
+@read_from_replica
+async def syrup_list(request):
+    syrups = await apaginate_keyset(Syrup.objects.all(), PRODUCT_KEYS, request.GET.get('cursor'), per_page=12)
+    await _prepare_request(request)
+    return render(request, 'products/syrup_list.html', {'syrups': syrups})
+
+
+@read_from_replica
+async def coffee_detail(request, pk):
+    coffee = await _catalog_product_or_404('coffee', pk)
+    await _prepare_request(request)
+    return render(request, 'products/coffee_detail.html', {
+        'coffee': coffee,
+        'form': AddToCartForm(product_type='coffee'),
+    })
+
+
+@read_from_replica
+async def tea_detail(request, pk):
+    tea = await _catalog_product_or_404('tea', pk)
+    await _prepare_request(request)
+    return render(request, 'products/tea_detail.html', {
+        'tea': tea,
+        'form': AddToCartForm(product_type='tea'),
+    })
+
+
+@read_from_replica
+async def syrup_detail(request, pk):
+    syrup = await _catalog_product_or_404('syrup', pk)
+    await _prepare_request(request)
+    return render(request, 'products/syrup_detail.html', {
+        'syrup': syrup,
+        'form': AddToCartForm(product_type='syrup'),
+    })
+
+
+@read_from_replica
+async def product_search(request):
+    query = request.GET.get('q', '').strip()
+    lowered_query = query.lower()
+
+    if lowered_query in ['кофе', 'coffee']:
+        return redirect('coffee_list')
+    elif lowered_query in ['чай', 'чаи', 'tea']:
+        return redirect('tea_list')
+    elif lowered_query in ['сироп', 'сиропы', 'syrup']:
+        return redirect('syrup_list')
+
+    # Полнотекстовый поиск собран на raw SQL, у которого нет async API
+    results = await sync_to_async(search_products)(query) if query else []
+
+    # Единственный товар или точное совпадение названия - сразу на страницу товара
+    exact_matches = [entry for entry in results if entry.name.lower() == lowered_query]
+    if len(exact_matches) == 1:
+        return redirect(exact_matches[0])
+    if len(results) == 1:
+        return redirect(results[0])
+
+    await _prepare_request(request)
+    return render(request, 'products/search_results.html', {
+        'results': results,
+        'query': query,
+    })
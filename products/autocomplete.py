@@ -0,0 +1,177 @@
+import re
+import threading
+
+from django.urls import reverse
+
+from .cache import get_catalog_version
+from .catalog import get_catalog_snapshot
+
+CYRILLIC_TO_LATIN = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'e',
+    'ж': 'zh', 'з': 'z', 'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm',
+    'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u',
+    'ф': 'f', 'х': 'kh', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'shch',
+    'ъ': '', 'ы': 'y', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya',
+}
+
+# Сначала многобуквенные сочетания, потом одиночные буквы
+LATIN_TO_CYRILLIC = [
+    ('shch', 'щ'), ('zh', 'ж'), ('kh', 'х'), ('ts', 'ц'), ('ch', 'ч'),
+    ('sh', 'ш'), ('yu', 'ю'), ('ya', 'я'), ('yo', 'ё'),
+    ('a', 'а'), ('b', 'б'), ('c', 'к'), ('d', 'д'), ('e', 'е'), ('f', 'ф'),
+    ('g', 'г'), ('h', 'х'), ('i', 'и'), ('j', 'й'), ('k', 'к'), ('l', 'л'),
+    ('m', 'м'), ('n', 'н'), ('o', 'о'), ('p', 'п'), ('q', 'к'), ('r', 'р'),
+    ('s', 'с'), ('t', 'т'), ('u', 'у'), ('v', 'в'), ('w', 'в'), ('x', 'кс'),
+    ('y', 'ы'), ('z', 'з'),
+]
+LATIN_RE = re.compile('|'.join(latin for latin, _ in LATIN_TO_CYRILLIC))
+LATIN_MAP = dict(LATIN_TO_CYRILLIC)
+
+
+def normalize(text):
+    return ' '.join(text.lower().replace('ё', 'е').split())
+
+
+def to_latin(text):
+    return ''.join(CYRILLIC_TO_LATIN.get(char, char) for char in text)
+
+
+def to_cyrillic(text):
+    return LATIN_RE.sub(lambda match: LATIN_MAP[match.group(0)], text)
+
+
+def search_keys(name):
+    """Ключи товара: название и каждое его слово, в исходном виде и в транслитерации"""
+    name = normalize(name)
+    words = name.split()
+    phrases = {name, *(' '.join(words[i:]) for i in range(1, len(words)))}
+    keys = set()
+    for phrase in phrases:
+        keys.update({phrase, to_latin(phrase), to_cyrillic(phrase)})
+    return keys
+
+
+class Suggestion:
+    def __init__(self, product_type, product):
+        self.product_type = product_type
+        self.id = product.pk
+        self.name = product.name
+        self.is_available = product.is_available
+
+    @property
+    def key(self):
+        return (self.product_type, self.id)
+
+    def as_dict(self):
+        return {
+            'type': self.product_type,
+            'id': self.id,
+            'name': self.name,
+            'is_available': self.is_available,
+            'url': reverse(f'{self.product_type}_detail', kwargs={'pk': self.id}),
+        }
+
+
+class PrefixTrie:
+    """
+    Префиксное дерево названий товаров. В каждом узле хранится множество
+    товаров, у которых есть ключ с этим префиксом, поэтому поиск -
+    это проход по символам запроса и сортировка найденных.
+    Дерево общее для потоков процесса: изменения и поиск идут под
+    блокировкой, иначе поиск может обойти множество во время его изменения.
+    """
+
+    def __init__(self):
+        self.root = {}
+        self.suggestions = {}
+        self._keys = {}
+        # RLock: add() вызывает remove()
+        self._lock = threading.RLock()
+
+    def _node(self, key, create=False):
+        node = self.root
+        for char in key:
+            child = node.get(char)
+            if child is None:
+                if not create:
+                    return None
+                child = node[char] = {}
+            node = child
+        return node
+
+    def add(self, suggestion):
+        keys = search_keys(suggestion.name)
+        with self._lock:
+            self.remove(suggestion.key)
+            for key in keys:
+                node = self.root
+                for char in key:
+                    node = node.setdefault(char, {})
+                    node.setdefault('', set()).add(suggestion.key)
+            self.suggestions[suggestion.key] = suggestion
+            self._keys[suggestion.key] = keys
+
+    def remove(self, suggestion_key):
+        with self._lock:
+            for key in self._keys.pop(suggestion_key, ()):
+                node = self.root
+                for char in key:
+                    node = node.get(char)
+                    if node is None:
+                        break
+                    node.get('', set()).discard(suggestion_key)
+            self.suggestions.pop(suggestion_key, None)
+
+    def suggest(self, query, limit=10):
+        query = normalize(query)
+        if not query:
+            return []
+        with self._lock:
+            node = self._node(query)
+            if node is None:
+                return []
+            found = [self.suggestions[key] for key in node.get('', ())]
+        found.sort(key=lambda suggestion: (not suggestion.is_available, suggestion.name))
+        return found[:limit]
+
+
+def build_trie():
+    """Строит дерево по снимку каталога (без обращения к базе при горячем кэше)"""
+    catalog = get_catalog_snapshot()
+    trie = PrefixTrie()
+    for product_type, products in [('coffee', catalog.coffees), ('tea', catalog.teas), ('syrup', catalog.syrups)]:
+        for product in products:
+            trie.add(Suggestion(product_type, product))
+    return trie
+
+
+# Дерево этого процесса и версия каталога, по которой оно построено
+_index = {'version': None, 'trie': None}
+# Замена дерева и его версии - одно действие для потоков процесса
+_index_lock = threading.Lock()
+
+
+def get_autocomplete_trie():
+    version = get_catalog_version()
+    with _index_lock:
+        if _index['trie'] is None or _index['version'] != version:
+            _index['trie'] = build_trie()
+            _index['version'] = version
+        return _index['trie']
+
+
+def apply_product_change(product_type, product, deleted, new_version):
+    """
+    Точечно обновляет дерево после изменения товара этим процессом.
+    Если за это время каталог менялся еще где-то, дерево будет
+    перестроено целиком при следующем запросе.
+    """
+    with _index_lock:
+        trie = _index['trie']
+        if trie is None or _index['version'] != new_version - 1:
+            return
+        if deleted:
+            trie.remove((product_type, product.pk))
+        else:
+            trie.add(Suggestion(product_type, product))
+        _index['version'] = new_version
@@ -0,0 +1,41 @@
+from django.core.cache import cache
+
+ORDERS_VERSION_KEY = 'orders_version:{phone}'
+CATALOG_VERSION_KEY = 'catalog_version'
+
+
+def _bump_version(key):
+    """Увеличивает версию и возвращает новое значение"""
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+        return 1
+
+
+def get_orders_version(phone):
+    """Текущая версия заказов для нормализованного номера телефона"""
+    return cache.get(ORDERS_VERSION_KEY.format(phone=phone), 0)
+
+
+async def aget_orders_version(phone):
+    return await cache.aget(ORDERS_VERSION_KEY.format(phone=phone), 0)
+
+
+def bump_orders_version(phone):
+    """Сбрасывает кэши, построенные по заказам этого номера"""
+    _bump_version(ORDERS_VERSION_KEY.format(phone=phone))
+
+
+def get_catalog_version():
+    """Текущая версия каталога товаров"""
+    return cache.get(CATALOG_VERSION_KEY, 0)
+
+
+async def aget_catalog_version():
+    return await cache.aget(CATALOG_VERSION_KEY, 0)
+
+
+def bump_catalog_version():
+    """Сбрасывает кэши, построенные по каталогу (снимок, фрагменты страниц)"""
+    return _bump_version(CATALOG_VERSION_KEY)
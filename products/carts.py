@@ -0,0 +1,75 @@
+from django.db import IntegrityError
+from django.db.models import Sum
+from django.db.models.functions import Coalesce
+
+from .models import Cart
+from .transactions import write_transaction
+
+
+def _active_carts(user):
+    return (
+        Cart.objects.filter(user=user, is_active=True)
+        .annotate(items_quantity=Coalesce(Sum('items__quantity'), 0))
+    )
+
+
+def find_active_cart(user):
+    """
+    Активная корзина пользователя одним запросом, вместе с количеством товаров.
+    Единственность активной корзины гарантирует ограничение в базе.
+    """
+    return _active_carts(user).first()
+
+
+async def afind_active_cart(user):
+    return await _active_carts(user).afirst()
+
+
+def get_or_create_active_cart(user, attempts=3):
+    """
+    Находит или создает активную корзину без гонок между запросами:
+    если параллельный запрос успел создать корзину, берем ее.
+    """
+    for _ in range(attempts):
+        cart = find_active_cart(user)
+        if cart is not None:
+            return cart
+        try:
+            with write_transaction():
+                cart = Cart.objects.create(user=user, is_active=True)
+        except IntegrityError:
+            continue
+        cart.items_quantity = 0
+        return cart
+    raise IntegrityError(f'Не удалось получить активную корзину пользователя {user.pk}')
+
+
+def get_request_cart(request, create=False):
+    """
+    Активная корзина текущего запроса. Загружается не больше одного раза
+    и общая для вьюшек и контекст-процессора.
+    """
+    if not request.user.is_authenticated:
+        return None
+
+    if not hasattr(request, '_cart_cache'):
+        request._cart_cache = find_active_cart(request.user)
+
+    if request._cart_cache is None and create:
+        request._cart_cache = get_or_create_active_cart(request.user)
+
+    return request._cart_cache
+
+
+async def aget_request_cart(request):
+    """
+    Асинхронная загрузка корзины для async вьюшек: после нее
+    контекст-процессор берет корзину из кэша запроса, без запроса к базе.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return None
+
+    if not hasattr(request, '_cart_cache'):
+        request._cart_cache = await afind_active_cart(user)
+    return request._cart_cache
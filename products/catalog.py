@@ -0,0 +1,180 @@
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import CharField, DecimalField, F, Value
+from django.db.models.functions import Least
+from django.urls import reverse
+
+from .cache import aget_catalog_version, get_catalog_version
+from .models import Coffee, Tea, Syrup
+
+CATALOG_SNAPSHOT_KEY = 'catalog_snapshot:v{version}'
+# Старые версии снимка сами уходят из кэша
+CATALOG_SNAPSHOT_TIMEOUT = 60 * 60 * 24
+
+# Снимок, уже загруженный этим процессом: (версия, снимок)
+_local_snapshot = (None, None)
+
+
+class CatalogSnapshot:
+    """Все товары каталога, упорядоченные по наличию, с готовыми таблицами цен"""
+
+    def __init__(self, coffees, teas, syrups):
+        self.coffees = coffees
+        self.teas = teas
+        self.syrups = syrups
+        self._by_type = {
+            'coffee': {coffee.pk: coffee for coffee in coffees},
+            'tea': {tea.pk: tea for tea in teas},
+            'syrup': {syrup.pk: syrup for syrup in syrups},
+        }
+
+    def get(self, product_type, pk):
+        """Товар по типу и id или None"""
+        return self._by_type[product_type].get(pk)
+
+
+def _snapshot_querysets():
+    # Всегда с основной базы: снимок кэшируется под новой версией каталога,
+    # и отстающая реплика закрепила бы в нем старые данные
+    return [
+        model.objects.using(DEFAULT_DB_ALIAS).order_by('-is_available', 'id')
+        for model in (Coffee, Tea, Syrup)
+    ]
+
+
+def _make_snapshot(coffees, teas, syrups):
+    for coffee in coffees:
+        coffee.price_map = {grams: str(coffee.get_price(grams)) for grams, _ in Coffee.GRAMS_CHOICES}
+    for tea in teas:
+        tea.price_map = {grams: str(tea.get_price(grams)) for grams, _ in Tea.GRAMS_CHOICES}
+    for syrup in syrups:
+        syrup.price_map = {None: str(syrup.price)}
+
+    return CatalogSnapshot(coffees, teas, syrups)
+
+
+def build_catalog_snapshot():
+    """Загружает каталог из базы - по одному запросу на тип товара"""
+    return _make_snapshot(*[list(queryset) for queryset in _snapshot_querysets()])
+
+
+async def abuild_catalog_snapshot():
+    lists = []
+    for queryset in _snapshot_querysets():
+        lists.append([product async for product in queryset])
+    return _make_snapshot(*lists)
+
+
+def get_catalog_snapshot():
+    """
+    Возвращает актуальный снимок каталога.
+    Версия хранится в общем кэше и увеличивается сигналами при изменении
+    товаров, поэтому все процессы переключаются на новый снимок одновременно.
+    """
+    global _local_snapshot
+
+    version = get_catalog_version()
+    local_version, snapshot = _local_snapshot
+    if local_version == version:
+        return snapshot
+
+    key = CATALOG_SNAPSHOT_KEY.format(version=version)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = build_catalog_snapshot()
+        cache.set(key, snapshot, timeout=CATALOG_SNAPSHOT_TIMEOUT)
+
+    _local_snapshot = (version, snapshot)
+    return snapshot
+
+
+async def aget_catalog_snapshot():
+    """get_catalog_snapshot() для async вьюшек: async кэш и async ORM"""
+    global _local_snapshot
+
+    version = await aget_catalog_version()
+    local_version, snapshot = _local_snapshot
+    if local_version == version:
+        return snapshot
+
+    key = CATALOG_SNAPSHOT_KEY.format(version=version)
+    snapshot = await cache.aget(key)
+    if snapshot is None:
+        snapshot = await abuild_catalog_snapshot()
+        await cache.aset(key, snapshot, timeout=CATALOG_SNAPSHOT_TIMEOUT)
+
+    _local_snapshot = (version, snapshot)
+    return snapshot
+
+
+# Сортировки общего списка товаров: параметр ?sort= -> ORDER BY
+CATALOG_ORDERINGS = {
+    'default': ('-is_available', 'product_type', 'id'),
+    'price': ('min_price', 'product_type', 'id'),
+    '-price': ('-min_price', 'product_type', 'id'),
+    'name': ('name', 'product_type', 'id'),
+}
+
+CATALOG_FIELDS = ('product_type', 'id', 'name', 'min_price', 'image', 'is_available')
+
+PRICE_FIELD = DecimalField(max_digits=10, decimal_places=2)
+
+
+class CatalogEntry:
+    """Строка общего списка товаров: тип, id, название, минимальная цена, изображение"""
+
+    def __init__(self, row):
+        self.product_type = row['product_type']
+        self.id = row['id']
+        self.name = row['name']
+        self.min_price = row['min_price']
+        self.image = row['image']
+        self.is_available = row['is_available']
+
+    @property
+    def image_url(self):
+        return default_storage.url(self.image) if self.image else None
+
+    def get_absolute_url(self):
+        return reverse(f'{self.product_type}_detail', kwargs={'pk': self.id})
+
+
+def _catalog_part(model, product_type, min_price, available_only):
+    queryset = model.objects.all()
+    if available_only:
+        queryset = queryset.filter(is_available=True)
+    return queryset.annotate(
+        product_type=Value(product_type, output_field=CharField()),
+        min_price=min_price,
+    ).values(*CATALOG_FIELDS)
+
+
+def catalog_queryset(sort='default', product_types=None, available_only=False):
+    """
+    Все товары одним запросом UNION ALL с общим набором колонок
+    (см. CATALOG_FIELDS). Сортировка и LIMIT/OFFSET выполняются в базе,
+    поэтому результат можно передавать прямо в Paginator.
+    Строки - словари, в CatalogEntry их превращает catalog_entries().
+    """
+    parts = {
+        'coffee': (Coffee, Least('price_250g', 'price_500g', 'price_1000g', output_field=PRICE_FIELD)),
+        'tea': (Tea, Least('price_100g', 'price_500g', output_field=PRICE_FIELD)),
+        'syrup': (Syrup, F('price')),
+    }
+    querysets = [
+        _catalog_part(model, product_type, min_price, available_only)
+        for product_type, (model, min_price) in parts.items()
+        if not product_types or product_type in product_types
+    ]
+    if not querysets:
+        model, min_price = parts['coffee']
+        return _catalog_part(model, 'coffee', min_price, available_only).none()
+
+    queryset = querysets[0].union(*querysets[1:], all=True)
+    return queryset.order_by(*CATALOG_ORDERINGS.get(sort, CATALOG_ORDERINGS['default']))
+
+
+def catalog_entries(rows):
+    """Превращает строки catalog_queryset() (например, страницу Paginator) в CatalogEntry"""
+    return [CatalogEntry(row) for row in rows]
@@ -0,0 +1,83 @@
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from PIL import Image, ImageOps
+
+# Ширины уменьшенных копий изображений товаров
+IMAGE_VARIANTS = {
+    'thumb': 160,
+    'card': 480,
+    'detail': 960,
+}
+
+# Формат копии: (расширение, формат Pillow, параметры сохранения)
+VARIANT_FORMATS = [
+    ('jpg', 'JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+    ('webp', 'WEBP', {'quality': 80, 'method': 6}),
+]
+
+VARIANTS_DIR = 'variants'
+
+# Копии лежат рядом с медиа под предсказуемыми именами (без content-addressing),
+# неизменность им обеспечивает хэш оригинала в пути
+variant_storage = FileSystemStorage()
+
+
+def variant_name(name, variant, extension):
+    """coffee_images/колумбия.jpg -> variants/coffee_images/колумбия/card.webp"""
+    base, _ = os.path.splitext(name)
+    return f'{VARIANTS_DIR}/{base}/{variant}.{extension}'
+
+
+def generate_image_variants(name, force=False):
+    """
+    Создает уменьшенные JPEG и WebP копии изображения из хранилища.
+    Копии шире оригинала не создаются. Возвращает число записанных файлов.
+    """
+    with default_storage.open(name, 'rb') as source:
+        image = Image.open(source)
+        image = ImageOps.exif_transpose(image)
+        image.load()
+
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+
+    written = 0
+    for variant, width in IMAGE_VARIANTS.items():
+        if width > image.width:
+            continue
+        resized = image.copy()
+        resized.thumbnail((width, width * 4), Image.LANCZOS)
+
+        for extension, image_format, options in VARIANT_FORMATS:
+            target = variant_name(name, variant, extension)
+            if not force and variant_storage.exists(target):
+                continue
+            frame = resized.convert('RGB') if image_format == 'JPEG' else resized
+            buffer = BytesIO()
+            frame.save(buffer, image_format, **options)
+            if variant_storage.exists(target):
+                variant_storage.delete(target)
+            variant_storage.save(target, ContentFile(buffer.getvalue()))
+            written += 1
+    return written
+
+
+def delete_image_variants(name):
+    for variant in IMAGE_VARIANTS:
+        for extension, _, _ in VARIANT_FORMATS:
+            target = variant_name(name, variant, extension)
+            if variant_storage.exists(target):
+                variant_storage.delete(target)
+
+
+def image_srcset(name, extension):
+    """Строка srcset из существующих копий, например "a/thumb.webp 160w, a/card.webp 480w" """
+    candidates = []
+    for variant, width in IMAGE_VARIANTS.items():
+        target = variant_name(name, variant, extension)
+        if variant_storage.exists(target):
+            candidates.append(f'{variant_storage.url(target)} {width}w')
+    return ', '.join(candidates)
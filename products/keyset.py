@@ -0,0 +1,162 @@
+import base64
+import datetime
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+# Ключи сортировки: поле и направление ('-' - по убыванию).
+# Для каждого набора есть составной индекс в Meta модели.
+ORDER_KEYS = ('-created_at', '-id')
+PRODUCT_KEYS = ('-is_available', 'id')
+
+
+class KeysetPage:
+    """
+    Страница keyset-пагинации. Вместо номера страницы - курсоры
+    на первую и последнюю строку, поэтому любая страница стоит как первая.
+    """
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+
+def _encode_value(value):
+    # Полная точность: DjangoJSONEncoder обрезает микросекунды
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return value
+
+
+def encode_cursor(values, direction='next'):
+    values = [_encode_value(value) for value in values]
+    payload = json.dumps({'d': direction, 'v': values})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Возвращает (direction, values) или None для пустого/поврежденного курсора"""
+    if not cursor:
+        return None
+    try:
+        payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        data = json.loads(payload)
+        direction, values = data['d'], data['v']
+    except (ValueError, TypeError, KeyError):
+        return None
+    if direction not in ('next', 'previous') or not isinstance(values, list):
+        return None
+    return direction, values
+
+
+def _split_key(key):
+    return key.lstrip('-'), key.startswith('-')
+
+
+def _after_filter(keys, values):
+    """
+    Условие "строго после values" для сортировки keys:
+    (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ...
+    """
+    condition = Q()
+    equal = {}
+    for key, value in zip(keys, values):
+        field, descending = _split_key(key)
+        lookup = 'lt' if descending else 'gt'
+        condition |= Q(**equal, **{f'{field}__{lookup}': value})
+        equal[field] = value
+    return condition
+
+
+def _reverse_keys(keys):
+    return tuple(key[1:] if key.startswith('-') else f'-{key}' for key in keys)
+
+
+def _key_values(obj, keys):
+    return [getattr(obj, _split_key(key)[0]) for key in keys]
+
+
+def _page_query(queryset, keys, cursor, per_page):
+    """Запрос страницы (на одну строку больше per_page), направление и значения курсора"""
+    model = queryset.model
+    decoded = decode_cursor(cursor)
+    direction, values = decoded if decoded else ('next', None)
+
+    if values is not None:
+        try:
+            values = [
+                model._meta.get_field(_split_key(key)[0]).to_python(value)
+                for key, value in zip(keys, values)
+            ]
+        except (ValidationError, TypeError, ValueError):
+            # Курсор подделан: значения не того типа (to_python() полей даты
+            # на не-строке бросает TypeError, а не ValidationError)
+            direction, values = 'next', None
+        if values is not None and len(values) != len(keys):
+            direction, values = 'next', None
+
+    ordering = keys if direction == 'next' else _reverse_keys(keys)
+    page_queryset = queryset.order_by(*ordering)
+    if values is not None:
+        page_queryset = page_queryset.filter(_after_filter(ordering, values))
+
+    # Лишняя строка показывает, есть ли что-то дальше
+    return page_queryset[:per_page + 1], direction, values
+
+
+def _make_page(rows, keys, direction, values, per_page):
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if direction == 'previous':
+        rows.reverse()
+
+    if direction == 'next':
+        has_next, has_previous = has_more, values is not None
+    else:
+        has_next, has_previous = True, has_more
+
+    next_cursor = encode_cursor(_key_values(rows[-1], keys)) if rows and has_next else None
+    previous_cursor = (
+        encode_cursor(_key_values(rows[0], keys), 'previous') if rows and has_previous else None
+    )
+    return KeysetPage(rows, next_cursor, previous_cursor)
+
+
+def paginate_keyset(queryset, keys, cursor=None, per_page=20):
+    """
+    Возвращает KeysetPage для queryset, упорядоченного по keys.
+    Последний ключ должен быть уникальным (обычно id). Курсор, который
+    не удалось разобрать, открывает первую страницу.
+    """
+    page_queryset, direction, values = _page_query(queryset, keys, cursor, per_page)
+    return _make_page(list(page_queryset), keys, direction, values, per_page)
+
+
+async def apaginate_keyset(queryset, keys, cursor=None, per_page=20):
+    """paginate_keyset() через async ORM"""
+    page_queryset, direction, values = _page_query(queryset, keys, cursor, per_page)
+    rows = [row async for row in page_queryset]
+    return _make_page(rows, keys, direction, values, per_page)
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from products.models import Order
+from products.phones import phone_lookup_key
+
+
+class Command(BaseCommand):
+    help = 'Fill Order.phone_normalized for existing orders'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        batch = []
+        updated = 0
+
+        orders = Order.objects.only('id', 'phone', 'phone_normalized').order_by('id')
+        for order in orders.iterator(chunk_size=batch_size):
+            normalized = phone_lookup_key(order.phone)
+            if order.phone_normalized == normalized:
+                continue
+            order.phone_normalized = normalized
+            batch.append(order)
+            if len(batch) >= batch_size:
+                Order.objects.bulk_update(batch, ['phone_normalized'])
+                updated += len(batch)
+                batch = []
+
+        if batch:
+            Order.objects.bulk_update(batch, ['phone_normalized'])
+            updated += len(batch)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Updated {updated} orders')
+        )
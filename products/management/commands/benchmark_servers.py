@@ -0,0 +1,134 @@
+import asyncio
+import importlib.util
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Сервер: (модуль, команда запуска без порта и числа воркеров, включать ли async вьюшки)
+SERVERS = {
+    'wsgi': ('gunicorn', ['-m', 'gunicorn', 'coffee_shop.wsgi:application'], '0'),
+    'asgi': ('uvicorn', ['-m', 'uvicorn', 'coffee_shop.asgi:application'], '1'),
+}
+
+DEFAULT_PATHS = ['/', '/products/coffee/', '/products/tea/', '/products/search/?q=чай']
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(len(values) * fraction))
+    return values[index]
+
+
+class Command(BaseCommand):
+    help = 'Compare catalog throughput under WSGI (gunicorn) and ASGI (uvicorn) with the same worker count'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--servers', default='wsgi,asgi', help='Comma separated: wsgi, asgi')
+        parser.add_argument('--workers', type=int, default=2, help='Worker processes per server')
+        parser.add_argument('--concurrency', type=int, default=50, help='Concurrent client connections')
+        parser.add_argument('--duration', type=float, default=15, help='Seconds of load per server')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--path', action='append', dest='paths', help='URL path to request (repeatable)')
+        parser.add_argument('--api', action='store_true', help='Also POST /api/customer-orders/')
+
+    def handle(self, *args, **options):
+        if settings.DEBUG:
+            self.stderr.write('DEBUG=True: results will be much slower than in production')
+
+        paths = options['paths'] or DEFAULT_PATHS
+        for name in options['servers'].split(','):
+            name = name.strip()
+            if name not in SERVERS:
+                raise CommandError(f'Unknown server {name!r}, expected one of: {", ".join(SERVERS)}')
+            module, command, async_views = SERVERS[name]
+            if importlib.util.find_spec(module) is None:
+                self.stderr.write(f'{name}: {module} is not installed, skipped')
+                continue
+
+            process = self.start_server(command, options['workers'], options['port'], async_views)
+            base_url = f'http://127.0.0.1:{options["port"]}'
+            try:
+                self.wait_ready(base_url, process)
+                result = asyncio.run(self.run_load(
+                    base_url, paths, options['api'], options['concurrency'], options['duration'],
+                ))
+            finally:
+                process.terminate()
+                process.wait(timeout=30)
+            self.report(name, result)
+
+    def start_server(self, command, workers, port, async_views):
+        env = dict(os.environ, DJANGO_ASYNC_VIEWS=async_views)
+        args = [sys.executable, *command, '--workers', str(workers)]
+        if command[1] == 'gunicorn':
+            args += ['--bind', f'127.0.0.1:{port}']
+        else:
+            args += ['--port', str(port), '--no-access-log']
+        return subprocess.Popen(args, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    def wait_ready(self, base_url, process, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError(f'Server exited with code {process.returncode}')
+            try:
+                httpx.get(base_url + '/', timeout=1)
+                return
+            except httpx.HTTPError:
+                time.sleep(0.2)
+        raise CommandError(f'Server did not start in {timeout} seconds')
+
+    async def run_load(self, base_url, paths, api, concurrency, duration):
+        latencies, errors = [], 0
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+            deadline = time.monotonic() + duration
+
+            async def worker(number):
+                nonlocal errors
+                step = number
+                while time.monotonic() < deadline:
+                    step += 1
+                    started = time.perf_counter()
+                    try:
+                        if api and step % (len(paths) + 1) == 0:
+                            response = await client.post(
+                                '/api/customer-orders/', json={'phone_number': '+375291234567'},
+                            )
+                        else:
+                            response = await client.get(paths[step % len(paths)])
+                        if response.status_code >= 500:
+                            errors += 1
+                            continue
+                    except httpx.HTTPError:
+                        errors += 1
+                        continue
+                    latencies.append(time.perf_counter() - started)
+
+            started = time.monotonic()
+            await asyncio.gather(*(worker(number) for number in range(concurrency)))
+            elapsed = time.monotonic() - started
+
+        latencies.sort()
+        return {
+            'requests': len(latencies),
+            'errors': errors,
+            'rps': len(latencies) / elapsed,
+            'p50': percentile(latencies, 0.50),
+            'p95': percentile(latencies, 0.95),
+            'p99': percentile(latencies, 0.99),
+        }
+
+    def report(self, name, result):
+        self.stdout.write(self.style.SUCCESS(
+            f'{name}: {result["rps"]:.1f} req/s, {result["requests"]} ok, {result["errors"]} errors, '
+            f'p50 {result["p50"] * 1000:.1f} ms, p95 {result["p95"] * 1000:.1f} ms, '
+            f'p99 {result["p99"] * 1000:.1f} ms'
+        ))
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from products.cache import bump_catalog_version
+from products.images import generate_image_variants
+from products.models import Coffee, Tea, Syrup
+
+
+class Command(BaseCommand):
+    help = 'Generate resized JPEG/WebP variants for existing product images'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regenerate variants that already exist',
+        )
+
+    def handle(self, *args, **options):
+        written = 0
+        failed = 0
+        for model in (Coffee, Tea, Syrup):
+            names = model.objects.exclude(image='').exclude(image__isnull=True).values_list('image', flat=True)
+            updated = set()
+            for name in names:
+                try:
+                    files = generate_image_variants(name, force=options['force'])
+                except (OSError, ValueError) as e:
+                    failed += 1
+                    self.stderr.write(f'{name}: {e}')
+                    continue
+                written += files
+                if files:
+                    updated.add(name)
+            if updated:
+                # Ключи фрагментов карточек включают updated_at: карточки
+                # этих товаров перерисуются со ссылками на копии
+                model.objects.filter(image__in=updated).update(updated_at=timezone.now())
+
+        if written:
+            # Снимок каталога и страницы целиком (page_cache) строятся по версии каталога
+            bump_catalog_version()
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Written {written} variant files, failed {failed} images')
+        )
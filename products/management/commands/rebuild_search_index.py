@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from products.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the product full-text search index'
+
+    def handle(self, *args, **options):
+        count = rebuild_search_index()
+        self.stdout.write(
+            self.style.SUCCESS(f'Indexed {count} products')
+        )
@@ -0,0 +1,38 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from coffee_shop.storage import is_hashed_name
+from products.cache import bump_catalog_version
+from products.images import generate_image_variants
+from products.models import Coffee, Tea, Syrup
+
+
+class Command(BaseCommand):
+    help = 'Move existing product images to content-hashed file names'
+
+    def handle(self, *args, **options):
+        renamed = 0
+        for model in (Coffee, Tea, Syrup):
+            rows = model.objects.exclude(image='').exclude(image__isnull=True).values_list('id', 'image')
+            for pk, name in rows:
+                if is_hashed_name(name):
+                    continue
+                if not default_storage.exists(name):
+                    self.stderr.write(f'{model.__name__} #{pk}: missing file {name}')
+                    continue
+
+                with default_storage.open(name, 'rb') as source:
+                    new_name = default_storage.save(name, source)
+                # update() без сигналов: версия каталога увеличивается один раз в конце,
+                # новый updated_at обновляет закэшированные карточки
+                model.objects.filter(pk=pk).update(image=new_name, updated_at=timezone.now())
+                generate_image_variants(new_name)
+                renamed += 1
+                self.stdout.write(f'{name} -> {new_name}')
+
+        if renamed:
+            bump_catalog_version()
+        self.stdout.write(
+            self.style.SUCCESS(f'Renamed {renamed} images')
+        )
@@ -0,0 +1,37 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+
+from products.outbox import send_pending_emails
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Send queued emails from the outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--loop', action='store_true', help='Keep polling the outbox')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds between polls in loop mode')
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                sent, failed = send_pending_emails(batch_size=options['batch_size'])
+            except Exception as e:
+                # Ошибка базы или почты не должна останавливать обработчик в режиме --loop
+                if not options['loop']:
+                    raise
+                logger.exception(f'Outbox iteration failed: {e}')
+                sent = failed = 0
+            if sent or failed:
+                self.stdout.write(
+                    self.style.SUCCESS(f'Sent {sent} emails, {failed} failed')
+                )
+            if not options['loop']:
+                break
+            # Пока очередь не пуста, отправляем пачки без паузы
+            if sent + failed < options['batch_size']:
+                time.sleep(options['interval'])
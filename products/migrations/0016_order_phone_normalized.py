@@ -0,0 +1,22 @@
+# Generated by Django 5.2.5 on 2025-10-20 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0015_telegramuser'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='phone_normalized',
+            field=models.CharField(blank=True, default='', editable=False, max_length=20, verbose_name='Нормализованный телефон'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['phone_normalized', '-created_at'], name='order_phone_created_idx'),
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 5.2.5 on 2025-10-21 12:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+PRICE_FIELDS = {
+    'coffee': {250: 'price_250g', 500: 'price_500g', 1000: 'price_1000g'},
+    'tea': {100: 'price_100g', 500: 'price_500g'},
+}
+
+
+def snapshot_existing_orders(apps, schema_editor):
+    """Переносит состав уже оформленных заказов из корзин в OrderLine"""
+    db_alias = schema_editor.connection.alias
+    Order = apps.get_model('products', 'Order')
+    CartItem = apps.get_model('products', 'CartItem')
+    OrderLine = apps.get_model('products', 'OrderLine')
+    product_models = {
+        'coffee': apps.get_model('products', 'Coffee'),
+        'tea': apps.get_model('products', 'Tea'),
+        'syrup': apps.get_model('products', 'Syrup'),
+    }
+
+    lines = []
+    for order in Order.objects.using(db_alias).iterator():
+        for item in CartItem.objects.using(db_alias).filter(cart_id=order.cart_id).order_by('id'):
+            model = product_models.get(item.product_type)
+            product = model.objects.using(db_alias).filter(id=item.product_id).first() if model else None
+
+            unit_price = 0
+            product_name = 'Товар не найден'
+            if product:
+                if item.product_type == 'syrup':
+                    unit_price = product.price or 0
+                    product_name = f"{product.name} ({product.get_manufacturer_display()})"
+                elif item.grams:
+                    field = PRICE_FIELDS[item.product_type].get(item.grams)
+                    unit_price = (getattr(product, field) if field else 0) or 0
+                    product_name = f"{product.name} ({item.grams}г)"
+                else:
+                    product_name = product.name
+
+            lines.append(OrderLine(
+                order_id=order.id,
+                product_type=item.product_type,
+                product_id=item.product_id,
+                product_name=product_name,
+                grams=item.grams,
+                quantity=item.quantity,
+                unit_price=unit_price,
+                total_price=unit_price * item.quantity,
+            ))
+
+    OrderLine.objects.using(db_alias).bulk_create(lines, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0016_order_phone_normalized'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('product_type', models.CharField(choices=[('coffee', 'Кофе'), ('tea', 'Чай'), ('syrup', 'Сироп')], max_length=10, verbose_name='Тип товара')),
+                ('product_id', models.PositiveIntegerField(verbose_name='ID товара')),
+                ('product_name', models.CharField(max_length=150, verbose_name='Название товара')),
+                ('grams', models.PositiveIntegerField(blank=True, null=True, verbose_name='Вес (граммы)')),
+                ('quantity', models.PositiveIntegerField(verbose_name='Количество')),
+                ('unit_price', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Цена за единицу')),
+                ('total_price', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Общая стоимость')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='products.order', verbose_name='Заказ')),
+            ],
+            options={
+                'verbose_name': 'Позиция заказа',
+                'verbose_name_plural': 'Позиции заказа',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.RunPython(snapshot_existing_orders, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2025-10-22 09:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0017_orderline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='coffee',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Обновлен'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='syrup',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Обновлен'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='tea',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Обновлен'),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.5 on 2025-10-23 14:18
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def deactivate_duplicate_carts(apps, schema_editor):
+    """Оставляет одну (самую новую) активную корзину на пользователя"""
+    db_alias = schema_editor.connection.alias
+    Cart = apps.get_model('products', 'Cart')
+    duplicated_users = (
+        Cart.objects.using(db_alias).filter(is_active=True)
+        .values('user')
+        .annotate(active_count=Count('id'))
+        .filter(active_count__gt=1)
+        .values_list('user', flat=True)
+    )
+    for user_id in list(duplicated_users):
+        carts = Cart.objects.using(db_alias).filter(user_id=user_id, is_active=True).order_by('-created_at', '-id')
+        newest = carts.first()
+        carts.exclude(id=newest.id).update(is_active=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0018_coffee_updated_at_syrup_updated_at_tea_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(deactivate_duplicate_carts, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='cart',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_active', True)), fields=('user',), name='one_active_cart_per_user'),
+        ),
+    ]
@@ -0,0 +1,131 @@
+# Generated by Django 5.2.5 on 2025-10-25 16:02
+
+from django.db import migrations, models
+
+
+TYPE_KEYWORDS = {
+    'coffee': 'Кофе coffee',
+    'tea': 'Чай чаи tea',
+    'syrup': 'Сироп сиропы syrup',
+}
+
+SQLITE_FTS_SQL = [
+    """
+    CREATE VIRTUAL TABLE products_search_fts USING fts5(
+        name, type_labels, description,
+        content='products_productsearchentry', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER products_search_ai AFTER INSERT ON products_productsearchentry BEGIN
+        INSERT INTO products_search_fts(rowid, name, type_labels, description)
+        VALUES (new.id, new.name, new.type_labels, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER products_search_ad AFTER DELETE ON products_productsearchentry BEGIN
+        INSERT INTO products_search_fts(products_search_fts, rowid, name, type_labels, description)
+        VALUES ('delete', old.id, old.name, old.type_labels, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER products_search_au AFTER UPDATE ON products_productsearchentry BEGIN
+        INSERT INTO products_search_fts(products_search_fts, rowid, name, type_labels, description)
+        VALUES ('delete', old.id, old.name, old.type_labels, old.description);
+        INSERT INTO products_search_fts(rowid, name, type_labels, description)
+        VALUES (new.id, new.name, new.type_labels, new.description);
+    END
+    """,
+]
+
+SQLITE_DROP_SQL = [
+    "DROP TRIGGER IF EXISTS products_search_au",
+    "DROP TRIGGER IF EXISTS products_search_ad",
+    "DROP TRIGGER IF EXISTS products_search_ai",
+    "DROP TABLE IF EXISTS products_search_fts",
+]
+
+POSTGRES_INDEX_SQL = [
+    """
+    CREATE INDEX products_search_document_idx ON products_productsearchentry
+    USING GIN (to_tsvector('russian', coalesce(name, '') || ' ' || coalesce(type_labels, '')
+        || ' ' || coalesce(description, '')))
+    """,
+]
+
+POSTGRES_DROP_SQL = [
+    "DROP INDEX IF EXISTS products_search_document_idx",
+]
+
+
+def _execute(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_search_structures(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        _execute(schema_editor, SQLITE_FTS_SQL)
+    elif vendor == 'postgresql':
+        _execute(schema_editor, POSTGRES_INDEX_SQL)
+
+
+def drop_search_structures(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        _execute(schema_editor, SQLITE_DROP_SQL)
+    elif vendor == 'postgresql':
+        _execute(schema_editor, POSTGRES_DROP_SQL)
+
+
+def populate_search_index(apps, schema_editor):
+    db_alias = schema_editor.connection.alias
+    ProductSearchEntry = apps.get_model('products', 'ProductSearchEntry')
+    subtype_display = {
+        'coffee': lambda product: product.get_coffee_type_display(),
+        'tea': lambda product: product.get_tea_type_display(),
+        'syrup': lambda product: product.get_manufacturer_display(),
+    }
+    entries = []
+    for product_type, model_name in [('coffee', 'Coffee'), ('tea', 'Tea'), ('syrup', 'Syrup')]:
+        for product in apps.get_model('products', model_name).objects.using(db_alias).all():
+            entries.append(ProductSearchEntry(
+                product_type=product_type,
+                product_id=product.pk,
+                name=product.name,
+                type_labels=f"{TYPE_KEYWORDS[product_type]} {subtype_display[product_type](product)}",
+                description=product.description,
+                is_available=product.is_available,
+            ))
+    ProductSearchEntry.objects.using(db_alias).bulk_create(entries, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0020_outboxemail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('product_type', models.CharField(choices=[('coffee', 'Кофе'), ('tea', 'Чай'), ('syrup', 'Сироп')], max_length=10, verbose_name='Тип товара')),
+                ('product_id', models.PositiveIntegerField(verbose_name='ID товара')),
+                ('name', models.CharField(max_length=100, verbose_name='Название')),
+                ('type_labels', models.CharField(blank=True, default='', max_length=255, verbose_name='Метки типа')),
+                ('description', models.TextField(blank=True, default='', verbose_name='Описание')),
+                ('is_available', models.BooleanField(default=True, verbose_name='В наличии')),
+            ],
+            options={
+                'verbose_name': 'Запись поискового индекса',
+                'verbose_name_plural': 'Поисковый индекс',
+                'constraints': [models.UniqueConstraint(fields=('product_type', 'product_id'), name='unique_search_entry')],
+            },
+        ),
+        migrations.RunPython(create_search_structures, drop_search_structures),
+        migrations.RunPython(populate_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2025-10-27 10:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Перенос данных (0023) и удаление старых полей (0024) - отдельные миграции:
+# в PostgreSQL изменение таблицы в одной транзакции с обновлением ее строк
+# падает с "pending trigger events"
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0021_productsearchentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cartitem',
+            name='coffee',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='products.coffee', verbose_name='Кофе'),
+        ),
+        migrations.AddField(
+            model_name='cartitem',
+            name='syrup',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='products.syrup', verbose_name='Сироп'),
+        ),
+        migrations.AddField(
+            model_name='cartitem',
+            name='tea',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='products.tea', verbose_name='Чай'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.5 on 2025-10-27 10:44
+
+from django.db import migrations
+
+
+def link_cart_items_to_products(apps, schema_editor):
+    """Переносит product_type/product_id в связи; строки удаленных товаров удаляются"""
+    db_alias = schema_editor.connection.alias
+    CartItem = apps.get_model('products', 'CartItem')
+    product_models = {
+        'coffee': apps.get_model('products', 'Coffee'),
+        'tea': apps.get_model('products', 'Tea'),
+        'syrup': apps.get_model('products', 'Syrup'),
+    }
+    existing_ids = {
+        product_type: set(model.objects.using(db_alias).values_list('id', flat=True))
+        for product_type, model in product_models.items()
+    }
+
+    dangling = []
+    for product_type in product_models:
+        field = f'{product_type}_id'
+        linked = []
+        items = CartItem.objects.using(db_alias).filter(product_type=product_type)
+        for item in items.iterator():
+            if item.product_id in existing_ids[product_type]:
+                setattr(item, field, item.product_id)
+                linked.append(item)
+            else:
+                dangling.append(item.id)
+        CartItem.objects.using(db_alias).bulk_update(linked, [field], batch_size=500)
+    CartItem.objects.using(db_alias).filter(id__in=dangling).delete()
+    CartItem.objects.using(db_alias).exclude(product_type__in=list(product_models)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0022_cartitem_product_foreign_keys'),
+    ]
+
+    operations = [
+        migrations.RunPython(link_cart_items_to_products, migrations.RunPython.noop),
+    ]
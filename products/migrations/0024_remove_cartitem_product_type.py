@@ -0,0 +1,41 @@
+# Generated by Django 5.2.5 on 2025-10-27 10:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0023_link_cart_items_to_products'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='cartitem',
+            unique_together=set(),
+        ),
+        migrations.RemoveField(
+            model_name='cartitem',
+            name='product_id',
+        ),
+        migrations.RemoveField(
+            model_name='cartitem',
+            name='product_type',
+        ),
+        migrations.AddConstraint(
+            model_name='cartitem',
+            constraint=models.CheckConstraint(condition=models.Q(models.Q(('coffee__isnull', False), ('syrup__isnull', True), ('tea__isnull', True)), models.Q(('coffee__isnull', True), ('syrup__isnull', True), ('tea__isnull', False)), models.Q(('coffee__isnull', True), ('syrup__isnull', False), ('tea__isnull', True)), _connector='OR'), name='cartitem_exactly_one_product'),
+        ),
+        migrations.AddConstraint(
+            model_name='cartitem',
+            constraint=models.UniqueConstraint(fields=('cart', 'coffee', 'grams'), name='unique_cart_coffee'),
+        ),
+        migrations.AddConstraint(
+            model_name='cartitem',
+            constraint=models.UniqueConstraint(fields=('cart', 'tea', 'grams'), name='unique_cart_tea'),
+        ),
+        migrations.AddConstraint(
+            model_name='cartitem',
+            constraint=models.UniqueConstraint(fields=('cart', 'syrup'), name='unique_cart_syrup'),
+        ),
+    ]
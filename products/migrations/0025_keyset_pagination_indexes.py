@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2025-10-28 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0024_remove_cartitem_product_type'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='coffee',
+            index=models.Index(fields=['-is_available', 'id'], name='coffee_available_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['-created_at', '-id'], name='order_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='syrup',
+            index=models.Index(fields=['-is_available', 'id'], name='syrup_available_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tea',
+            index=models.Index(fields=['-is_available', 'id'], name='tea_available_id_idx'),
+        ),
+    ]
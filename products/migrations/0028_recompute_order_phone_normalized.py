@@ -0,0 +1,36 @@
+# Generated by Django 5.2.5 on 2025-10-31 09:40
+
+from django.db import migrations
+
+from products.phones import phone_lookup_key
+
+
+def recompute_phone_normalized(apps, schema_editor):
+    """
+    Пересчет ключа поиска: номера не из России и Беларуси сохранялись
+    пустой строкой, а белорусские 80... - как +70...
+    """
+    db_alias = schema_editor.connection.alias
+    Order = apps.get_model('products', 'Order')
+    batch = []
+    for order in Order.objects.using(db_alias).only('id', 'phone', 'phone_normalized').order_by('id').iterator(chunk_size=500):
+        normalized = phone_lookup_key(order.phone)
+        if order.phone_normalized != normalized:
+            order.phone_normalized = normalized
+            batch.append(order)
+        if len(batch) >= 500:
+            Order.objects.using(db_alias).bulk_update(batch, ['phone_normalized'])
+            batch = []
+    if batch:
+        Order.objects.using(db_alias).bulk_update(batch, ['phone_normalized'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0027_ordernotification'),
+    ]
+
+    operations = [
+        migrations.RunPython(recompute_phone_normalized, migrations.RunPython.noop),
+    ]
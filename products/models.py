@@ -1,6 +1,10 @@
 from django.db import models
+from django.urls import reverse
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+from .phones import phone_lookup_key
 
 
 class Product(models.Model):
@@ -8,6 +12,7 @@ class Product(models.Model):
     name = models.CharField(max_length=100, verbose_name='Название')
     description = models.TextField(blank=True, verbose_name='Описание', default='')
     is_available = models.BooleanField(default=True, verbose_name='В наличии')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Обновлен')
     
     class Meta:
         abstract = True
@@ -96,6 +101,10 @@ class Coffee(Product):
     class Meta:
         verbose_name = 'Кофе'
         verbose_name_plural = 'Кофе'
+        indexes = [
+            # Порядок списков каталога и keyset-пагинации (см. keyset.PRODUCT_KEYS)
+            models.Index(fields=['-is_available', 'id'], name='coffee_available_id_idx'),
+        ]
 
 
 class Tea(Product):
@@ -153,6 +162,10 @@ class Tea(Product):
     class Meta:
         verbose_name = 'Чай'
         verbose_name_plural = 'Чай'
+        indexes = [
+            # Порядок списков каталога и keyset-пагинации (см. keyset.PRODUCT_KEYS)
+            models.Index(fields=['-is_available', 'id'], name='tea_available_id_idx'),
+        ]
 
 
 class Syrup(Product):
@@ -190,6 +203,10 @@ class Syrup(Product):
     class Meta:
         verbose_name = 'Сироп'
         verbose_name_plural = 'Сиропы'
+        indexes = [
+            # Порядок списков каталога и keyset-пагинации (см. keyset.PRODUCT_KEYS)
+            models.Index(fields=['-is_available', 'id'], name='syrup_available_id_idx'),
+        ]
 
 
 # МОДЕЛИ КОРЗИНЫ (ТОЛЬКО ДЛЯ АВТОРИЗОВАННЫХ ПОЛЬЗОВАТЕЛЕЙ)
@@ -205,10 +222,14 @@ class Cart(models.Model):
     
     @property
     def total_price(self):
-        return sum(item.total_price for item in self.items.all())
+        from .pricing import price_cart
+        return price_cart(self).total_price
     
     @property
     def total_items(self):
+        # Может быть посчитано заранее аннотацией (см. carts.find_active_cart)
+        if hasattr(self, 'items_quantity'):
+            return self.items_quantity
         return sum(item.quantity for item in self.items.all())
     
     def __str__(self):
@@ -218,6 +239,13 @@ class Cart(models.Model):
     class Meta:
         verbose_name = 'Корзина'
         verbose_name_plural = 'Корзины'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user'],
+                condition=models.Q(is_active=True),
+                name='one_active_cart_per_user'
+            ),
+        ]
 
 
 class CartItem(models.Model):
@@ -234,13 +262,28 @@ class CartItem(models.Model):
         verbose_name='Корзина'
     )
     
-    # Поля для связи с разными типами продуктов
-    product_type = models.CharField(
-        max_length=10, 
-        choices=PRODUCT_TYPES, 
-        verbose_name='Тип товара'
+    # Ровно одна из связей заполнена (см. ограничение cartitem_exactly_one_product)
+    coffee = models.ForeignKey(
+        Coffee, 
+        on_delete=models.CASCADE, 
+        null=True, 
+        blank=True, 
+        verbose_name='Кофе'
+    )
+    tea = models.ForeignKey(
+        Tea, 
+        on_delete=models.CASCADE, 
+        null=True, 
+        blank=True, 
+        verbose_name='Чай'
+    )
+    syrup = models.ForeignKey(
+        Syrup, 
+        on_delete=models.CASCADE, 
+        null=True, 
+        blank=True, 
+        verbose_name='Сироп'
     )
-    product_id = models.PositiveIntegerField(verbose_name='ID товара')
     
     grams = models.PositiveIntegerField(
         null=True, 
@@ -251,15 +294,29 @@ class CartItem(models.Model):
     
     quantity = models.PositiveIntegerField(default=1, verbose_name='Количество')
     
+    @property
+    def product_type(self):
+        if self.coffee_id:
+            return 'coffee'
+        elif self.tea_id:
+            return 'tea'
+        elif self.syrup_id:
+            return 'syrup'
+        return None
+    
+    @property
+    def product_id(self):
+        return self.coffee_id or self.tea_id or self.syrup_id
+    
     @property
     def product(self):
-        """Возвращает объект продукта в зависимости от типа"""
-        if self.product_type == 'coffee':
-            return Coffee.objects.filter(id=self.product_id).first()
-        elif self.product_type == 'tea':
-            return Tea.objects.filter(id=self.product_id).first()
-        elif self.product_type == 'syrup':
-            return Syrup.objects.filter(id=self.product_id).first()
+        """Возвращает объект продукта (без запроса, если загружен через select_related)"""
+        if self.coffee_id:
+            return self.coffee
+        elif self.tea_id:
+            return self.tea
+        elif self.syrup_id:
+            return self.syrup
         return None
     
     @property
@@ -299,7 +356,19 @@ class CartItem(models.Model):
     class Meta:
         verbose_name = 'Элемент корзины'
         verbose_name_plural = 'Элементы корзины'
-        unique_together = ['cart', 'product_type', 'product_id', 'grams']
+        constraints = [
+            models.CheckConstraint(
+                condition=(
+                    models.Q(coffee__isnull=False, tea__isnull=True, syrup__isnull=True)
+                    | models.Q(coffee__isnull=True, tea__isnull=False, syrup__isnull=True)
+                    | models.Q(coffee__isnull=True, tea__isnull=True, syrup__isnull=False)
+                ),
+                name='cartitem_exactly_one_product'
+            ),
+            models.UniqueConstraint(fields=['cart', 'coffee', 'grams'], name='unique_cart_coffee'),
+            models.UniqueConstraint(fields=['cart', 'tea', 'grams'], name='unique_cart_tea'),
+            models.UniqueConstraint(fields=['cart', 'syrup'], name='unique_cart_syrup'),
+        ]
 
 class Order(models.Model):
     STATUS_CHOICES = [
@@ -330,6 +399,14 @@ class Order(models.Model):
     first_name = models.CharField(max_length=100, verbose_name='Имя')
     last_name = models.CharField(max_length=100, verbose_name='Фамилия')
     phone = models.CharField(max_length=20, verbose_name='Телефон')
+    # Номер в каноническом виде (+7.../+375...) для поиска заказов ботом
+    phone_normalized = models.CharField(
+        max_length=20,
+        blank=True,
+        default='',
+        editable=False,
+        verbose_name='Нормализованный телефон'
+    )
     email = models.EmailField(verbose_name='Электронная почта')
     
     # Статус и даты
@@ -347,6 +424,10 @@ class Order(models.Model):
         verbose_name='Общая сумма'
     )
     
+    def save(self, *args, **kwargs):
+        self.phone_normalized = phone_lookup_key(self.phone)
+        super().save(*args, **kwargs)
+    
     def __str__(self):
         return f"Заказ #{self.id} - {self.first_name} {self.last_name} ({self.status})"
     
@@ -354,6 +435,78 @@ class Order(models.Model):
         verbose_name = 'Заказ'
         verbose_name_plural = 'Заказы'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['phone_normalized', '-created_at'], name='order_phone_created_idx'),
+            # Keyset-пагинация заказов (см. keyset.ORDER_KEYS)
+            models.Index(fields=['-created_at', '-id'], name='order_created_id_idx'),
+            # Фильтр по статусу на странице управления заказами
+            models.Index(fields=['status', '-created_at', '-id'], name='order_status_created_idx'),
+        ]
+
+class OrderLine(models.Model):
+    """Снимок позиции заказа на момент оформления"""
+    order = models.ForeignKey(
+        Order, 
+        on_delete=models.CASCADE, 
+        related_name='lines', 
+        verbose_name='Заказ'
+    )
+    product_type = models.CharField(
+        max_length=10, 
+        choices=CartItem.PRODUCT_TYPES, 
+        verbose_name='Тип товара'
+    )
+    product_id = models.PositiveIntegerField(verbose_name='ID товара')
+    product_name = models.CharField(max_length=150, verbose_name='Название товара')
+    grams = models.PositiveIntegerField(null=True, blank=True, verbose_name='Вес (граммы)')
+    quantity = models.PositiveIntegerField(verbose_name='Количество')
+    unit_price = models.DecimalField(
+        max_digits=10, 
+        decimal_places=2, 
+        verbose_name='Цена за единицу'
+    )
+    total_price = models.DecimalField(
+        max_digits=10, 
+        decimal_places=2, 
+        verbose_name='Общая стоимость'
+    )
+    
+    def __str__(self):
+        return f"{self.quantity} x {self.product_name}"
+    
+    class Meta:
+        verbose_name = 'Позиция заказа'
+        verbose_name_plural = 'Позиции заказа'
+        ordering = ['id']
+
+class ProductSearchEntry(models.Model):
+    """
+    Строка поискового индекса: один товар любого типа.
+    Заполняется сигналами при сохранении товаров (см. search.py).
+    """
+    product_type = models.CharField(
+        max_length=10, 
+        choices=CartItem.PRODUCT_TYPES, 
+        verbose_name='Тип товара'
+    )
+    product_id = models.PositiveIntegerField(verbose_name='ID товара')
+    name = models.CharField(max_length=100, verbose_name='Название')
+    type_labels = models.CharField(max_length=255, blank=True, default='', verbose_name='Метки типа')
+    description = models.TextField(blank=True, default='', verbose_name='Описание')
+    is_available = models.BooleanField(default=True, verbose_name='В наличии')
+    
+    def get_absolute_url(self):
+        return reverse(f'{self.product_type}_detail', kwargs={'pk': self.product_id})
+    
+    def __str__(self):
+        return f"{self.name} ({self.get_product_type_display()})"
+    
+    class Meta:
+        verbose_name = 'Запись поискового индекса'
+        verbose_name_plural = 'Поисковый индекс'
+        constraints = [
+            models.UniqueConstraint(fields=['product_type', 'product_id'], name='unique_search_entry'),
+        ]
 
 class TelegramUser(models.Model):
     user = models.ForeignKey(
@@ -380,4 +533,90 @@ class TelegramUser(models.Model):
     
     class Meta:
         verbose_name = 'Пользователь Telegram'
-        verbose_name_plural = 'Пользователи Telegram'
\ No newline at end of file
+        verbose_name_plural = 'Пользователи Telegram'
+
+
+class OutboxEmail(models.Model):
+    """Письмо, ожидающее отправки фоновым обработчиком (send_outbox_emails)"""
+    STATUS_CHOICES = [
+        ('pending', 'Ожидает отправки'),
+        ('sent', 'Отправлено'),
+        ('failed', 'Не отправлено'),
+    ]
+    
+    subject = models.CharField(max_length=255, verbose_name='Тема')
+    body = models.TextField(verbose_name='Текст')
+    from_email = models.CharField(max_length=254, verbose_name='Отправитель')
+    recipients = models.JSONField(verbose_name='Получатели')
+    status = models.CharField(
+        max_length=10, 
+        choices=STATUS_CHOICES, 
+        default='pending', 
+        verbose_name='Статус'
+    )
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name='Попыток')
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name='Следующая попытка')
+    last_error = models.TextField(blank=True, default='', verbose_name='Последняя ошибка')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Создано')
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name='Отправлено')
+    
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.recipients)} ({self.status})"
+    
+    class Meta:
+        verbose_name = 'Письмо в очереди'
+        verbose_name_plural = 'Очередь писем'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_next_idx'),
+        ]
+
+
+class OrderNotification(models.Model):
+    """
+    Уведомление клиента в Telegram о смене статуса заказа, ожидающее отправки
+    (send_order_notifications). Пока уведомление не отправлено, новые смены
+    статуса того же заказа обновляют его, а не добавляют новое.
+    """
+    STATUS_CHOICES = OutboxEmail.STATUS_CHOICES
+    
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name='Заказ'
+    )
+    chat_id = models.BigIntegerField(verbose_name='ID чата Telegram')
+    order_status = models.CharField(
+        max_length=10,
+        choices=Order.STATUS_CHOICES,
+        verbose_name='Статус заказа'
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default='pending',
+        verbose_name='Статус'
+    )
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name='Попыток')
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name='Следующая попытка')
+    last_error = models.TextField(blank=True, default='', verbose_name='Последняя ошибка')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Создано')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Обновлено')
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name='Отправлено')
+    
+    def __str__(self):
+        return f"Заказ #{self.order_id}: {self.get_order_status_display()} -> {self.chat_id} ({self.status})"
+    
+    class Meta:
+        verbose_name = 'Уведомление о заказе'
+        verbose_name_plural = 'Очередь уведомлений о заказах'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='notify_status_next_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['order'],
+                condition=models.Q(status='pending'),
+                name='one_pending_notification_per_order'
+            ),
+        ]
@@ -0,0 +1,160 @@
+import logging
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import Order, OrderNotification, TelegramUser
+from .outbox import BACKOFF_BASE, CLAIM_TIMEOUT, MAX_ATTEMPTS
+from .transactions import write_transaction
+
+logger = logging.getLogger(__name__)
+
+
+def queue_order_status_notifications(changes):
+    """
+    Ставит в очередь уведомления о смене статуса. changes - список
+    (order_id, phone_normalized, новый статус). Клиенты без привязанного
+    Telegram пропускаются. Если по заказу уже ждет уведомление, в нем
+    меняется статус: клиент получит одно сообщение с последним статусом.
+    Ждущее уведомление, созданное параллельно (сохранение заказа без
+    блокировки строки), тоже объединяется с новой сменой.
+    """
+    phones = {phone for _, phone, _ in changes if phone}
+    if not phones:
+        return 0
+    chats = dict(
+        TelegramUser.objects.filter(phone_number__in=phones, is_active=True)
+        .values_list('phone_number', 'telegram_chat_id')
+    )
+    changes = [(order_id, chats[phone], status) for order_id, phone, status in changes if phone in chats]
+    if not changes:
+        return 0
+
+    now = timezone.now()
+    pending = {
+        notification.order_id: notification
+        for notification in OrderNotification.objects.filter(
+            order_id__in=[order_id for order_id, _, _ in changes], status='pending'
+        )
+    }
+    to_update, to_create = [], []
+    for order_id, chat_id, status in changes:
+        notification = pending.get(order_id)
+        if notification is None:
+            to_create.append(OrderNotification(order_id=order_id, chat_id=chat_id, order_status=status))
+            continue
+        # Объединение: ждущее (или уже взятое в отправку) уведомление получает новый
+        # статус и становится доступным сразу; отправка старого статуса его не закроет
+        notification.chat_id = chat_id
+        notification.order_status = status
+        notification.next_attempt_at = now
+        notification.updated_at = now
+        to_update.append(notification)
+
+    if to_update:
+        OrderNotification.objects.bulk_update(
+            to_update, ['chat_id', 'order_status', 'next_attempt_at', 'updated_at']
+        )
+    if to_create:
+        try:
+            with transaction.atomic():
+                OrderNotification.objects.bulk_create(to_create)
+        except IntegrityError:
+            # Уникальность ждущего уведомления нарушена параллельной сменой статуса
+            for notification in to_create:
+                _create_or_coalesce(notification, now)
+    return len(changes)
+
+
+def _create_or_coalesce(notification, now):
+    """Создает уведомление или, если по заказу уже ждет другое, обновляет его"""
+    try:
+        with transaction.atomic():
+            OrderNotification.objects.create(
+                order_id=notification.order_id,
+                chat_id=notification.chat_id,
+                order_status=notification.order_status,
+            )
+    except IntegrityError:
+        OrderNotification.objects.filter(order_id=notification.order_id, status='pending').update(
+            chat_id=notification.chat_id,
+            order_status=notification.order_status,
+            next_attempt_at=now,
+            updated_at=now,
+        )
+
+
+def notification_text(notification):
+    order = notification.order
+    label = dict(Order.STATUS_CHOICES).get(notification.order_status, notification.order_status)
+    return (
+        f"📦 Заказ #{order.id} на сумму {order.total_price} руб.\n"
+        f"📊 Новый статус: {label}"
+    )
+
+
+def claim_notifications(batch_size=100):
+    """
+    Берет в работу пачку уведомлений, которые пора отправить: на CLAIM_TIMEOUT
+    они скрыты от других обработчиков. Возвращает список с загруженными заказами.
+    """
+    with write_transaction():
+        notifications = list(
+            OrderNotification.objects.select_for_update(skip_locked=True)
+            .filter(status='pending', next_attempt_at__lte=timezone.now())
+            .select_related('order')
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        if notifications:
+            OrderNotification.objects.filter(id__in=[n.id for n in notifications]).update(
+                next_attempt_at=timezone.now() + CLAIM_TIMEOUT
+            )
+    return notifications
+
+
+def finish_notifications(results):
+    """
+    Записывает результаты отправки: results - список (уведомление, error,
+    retry_after, permanent). Уведомление, статус которого изменился во время
+    отправки, остается в очереди с новым статусом.
+    Возвращает (отправлено, ошибок).
+    """
+    sent = failed = 0
+    now = timezone.now()
+    blocked_chats = set()
+
+    with write_transaction():
+        for notification, error, retry_after, permanent in results:
+            # Условие на order_status: объединенное с новой сменой уведомление не трогаем
+            queryset = OrderNotification.objects.filter(
+                id=notification.id, status='pending', order_status=notification.order_status
+            )
+            if error is None:
+                sent += 1
+                queryset.update(status='sent', sent_at=now, last_error='', attempts=notification.attempts + 1)
+                continue
+
+            failed += 1
+            logger.error(f"❌ Ошибка отправки уведомления #{notification.id}: {error}")
+            if retry_after is not None:
+                # Ограничение Telegram - не ошибка уведомления, попытка не считается
+                queryset.update(next_attempt_at=now + retry_after, last_error=error)
+                continue
+
+            attempts = notification.attempts + 1
+            if permanent or attempts >= MAX_ATTEMPTS:
+                queryset.update(status='failed', attempts=attempts, last_error=error)
+                if permanent:
+                    blocked_chats.add(notification.chat_id)
+            else:
+                queryset.update(
+                    attempts=attempts,
+                    next_attempt_at=now + BACKOFF_BASE * 2 ** (attempts - 1),
+                    last_error=error,
+                )
+
+        if blocked_chats:
+            # Клиент заблокировал бота или удалил чат - больше не пишем
+            TelegramUser.objects.filter(telegram_chat_id__in=blocked_chats).update(is_active=False)
+
+    return sent, failed
@@ -0,0 +1,85 @@
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from .cache import bump_orders_version
+from .models import Order
+from .notifications import queue_order_status_notifications
+from .transactions import write_transaction
+
+# Допустимые переходы статусов: текущий статус -> новые
+ORDER_STATUS_TRANSITIONS = {
+    'pending': ['confirmed', 'cancelled'],
+    'confirmed': ['shipped', 'cancelled'],
+    'shipped': ['delivered'],
+    'delivered': [],
+    'cancelled': [],
+}
+
+
+def order_status_summary(queryset=None):
+    """
+    Количество и сумма заказов по каждому статусу одним GROUP BY.
+    Возвращает список словарей в порядке Order.STATUS_CHOICES и итог.
+    """
+    if queryset is None:
+        queryset = Order.objects.all()
+
+    rows = (
+        queryset.order_by()
+        .values('status')
+        .annotate(count=Count('id'), revenue=Sum('total_price'))
+    )
+    by_status = {row['status']: row for row in rows}
+
+    summary = []
+    for status, label in Order.STATUS_CHOICES:
+        row = by_status.get(status, {})
+        summary.append({
+            'status': status,
+            'label': label,
+            'count': row.get('count', 0),
+            'revenue': row.get('revenue') or 0,
+        })
+    total = {
+        'count': sum(item['count'] for item in summary),
+        'revenue': sum(item['revenue'] for item in summary),
+    }
+    return summary, total
+
+
+def bulk_update_order_status(order_ids, new_status):
+    """
+    Переводит заказы в new_status одним UPDATE. Заказы, для которых
+    переход не разрешен (см. ORDER_STATUS_TRANSITIONS), не меняются.
+    queryset.update() не вызывает сигналы, поэтому версии кэша заказов
+    (ответы бота) сбрасываются и уведомления клиентам ставятся в очередь
+    здесь же. Возвращает число измененных заказов.
+    """
+    allowed_from = [
+        status for status, targets in ORDER_STATUS_TRANSITIONS.items()
+        if new_status in targets
+    ]
+    if not allowed_from or not order_ids:
+        return 0
+
+    with write_transaction():
+        # Блокирующий запрос - всегда к основной базе, даже внутри replica_reads()
+        orders = (
+            Order.objects.using(DEFAULT_DB_ALIAS).select_for_update()
+            .filter(id__in=order_ids, status__in=allowed_from)
+        )
+        changed = list(orders.values_list('id', 'phone_normalized'))
+        phones = {phone for _, phone in changed}
+        updated = orders.update(status=new_status, updated_at=timezone.now())
+        queue_order_status_notifications(
+            [(order_id, phone, new_status) for order_id, phone in changed]
+        )
+
+        def bump_versions():
+            for phone in phones:
+                if phone:
+                    bump_orders_version(phone)
+
+        transaction.on_commit(bump_versions)
+    return updated
@@ -0,0 +1,101 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+
+from .models import OutboxEmail
+from .transactions import write_transaction
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+# Пауза перед повтором: 1, 2, 4, 8... минут
+BACKOFF_BASE = timedelta(minutes=1)
+# Взятые в работу письма скрыты от других обработчиков на это время;
+# если обработчик упал, письма снова станут доступны
+CLAIM_TIMEOUT = timedelta(minutes=5)
+
+
+def queue_email(subject, body, recipients, from_email=None):
+    """Кладет письмо в очередь. Вызывается внутри транзакции оформления заказа."""
+    return OutboxEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=list(recipients),
+    )
+
+
+def _record_failure(email, error):
+    """Неудачная попытка: повтор с экспоненциальной паузой или failed после MAX_ATTEMPTS"""
+    email.attempts += 1
+    email.last_error = str(error)
+    if email.attempts >= MAX_ATTEMPTS:
+        email.status = 'failed'
+    else:
+        email.next_attempt_at = timezone.now() + BACKOFF_BASE * 2 ** (email.attempts - 1)
+
+
+def send_pending_emails(batch_size=50):
+    """
+    Отправляет пачку писем из очереди через одно SMTP соединение.
+    Неудачные письма откладываются с экспоненциальной паузой,
+    после MAX_ATTEMPTS попыток помечаются как failed.
+    Возвращает (отправлено, ошибок).
+    """
+    sent = failed = 0
+    # Короткая транзакция только на захват пачки: SMTP идет без блокировки базы
+    with write_transaction():
+        emails = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(status='pending', next_attempt_at__lte=timezone.now())
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        if not emails:
+            return sent, failed
+        OutboxEmail.objects.filter(id__in=[email.id for email in emails]).update(
+            next_attempt_at=timezone.now() + CLAIM_TIMEOUT
+        )
+
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        # SMTP недоступен: вся взятая пачка откладывается, попытка засчитывается
+        logger.error(f"❌ Не удалось подключиться к почтовому серверу: {str(e)}")
+        for email in emails:
+            _record_failure(email, e)
+        failed = len(emails)
+    else:
+        try:
+            for email in emails:
+                message = EmailMessage(
+                    email.subject,
+                    email.body,
+                    email.from_email,
+                    email.recipients,
+                    connection=connection,
+                )
+                try:
+                    message.send()
+                except Exception as e:
+                    failed += 1
+                    _record_failure(email, e)
+                    logger.error(f"❌ Ошибка отправки письма #{email.id}: {str(e)}")
+                else:
+                    sent += 1
+                    email.attempts += 1
+                    email.status = 'sent'
+                    email.sent_at = timezone.now()
+                    email.last_error = ''
+        finally:
+            connection.close()
+
+    with write_transaction():
+        OutboxEmail.objects.bulk_update(
+            emails, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at']
+        )
+
+    return sent, failed
@@ -0,0 +1,111 @@
+import hashlib
+import re
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.http import urlencode
+
+from .cache import aget_catalog_version, get_catalog_version
+
+PAGE_CACHE_KEY = 'anon_page:v{version}:{path}'
+PAGE_CACHE_TIMEOUT = 60 * 10
+
+# Значение CSRF токена уникально для запроса, в кэше вместо него метка
+CSRF_PLACEHOLDER = '__CSRF_TOKEN__'
+CSRF_INPUT_RE = re.compile(r'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+
+
+def _page_path(request, params):
+    """
+    Часть ключа: путь и параметры запроса, которые использует вьюшка.
+    None - в запросе есть другие параметры: страницу не кэшируем, иначе
+    произвольные строки запроса плодили бы записи в кэше (а ?q= из формы
+    поиска попал бы в страницу для всех).
+    """
+    if any(name not in params for name in request.GET):
+        return None
+    query = urlencode(sorted((name, request.GET[name]) for name in params if name in request.GET))
+    return hashlib.md5(f'{request.path}?{query}'.encode()).hexdigest()
+
+
+def _store(response):
+    """Содержимое для кэша или None, если ответ кэшировать нельзя"""
+    if response.status_code != 200 or response.streaming:
+        return None
+    content = response.content.decode(response.charset)
+    content = CSRF_INPUT_RE.sub(rf'\g<1>{CSRF_PLACEHOLDER}\g<2>', content)
+    return content, response['Content-Type']
+
+
+def _cached_response(request, cached):
+    content, content_type = cached
+    if CSRF_PLACEHOLDER in content:
+        content = content.replace(CSRF_PLACEHOLDER, get_token(request))
+    return HttpResponse(content, content_type=content_type)
+
+
+def cache_page_for_anonymous(*params):
+    """
+    Кэширует страницу каталога целиком для анонимных посетителей.
+    params - параметры запроса, от которых зависит страница (например,
+    'cursor'); запросы с другими параметрами не кэшируются.
+    Ключ включает версию каталога, поэтому изменение товара сбрасывает
+    все страницы. Авторизованные пользователи (корзина, CSRF формы) получают
+    страницу, собранную из закэшированных карточек товаров.
+    Работает и с async вьюшками (async кэш, request.auser()).
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            return wraps(view)(_async_wrapper(view, params))
+        return wraps(view)(_sync_wrapper(view, params))
+
+    return decorator
+
+
+def _async_wrapper(view, params):
+    async def wrapper(request, *args, **kwargs):
+        if request.method != 'GET' or (await request.auser()).is_authenticated:
+            return await view(request, *args, **kwargs)
+
+        path = _page_path(request, params)
+        if path is None:
+            return await view(request, *args, **kwargs)
+
+        key = PAGE_CACHE_KEY.format(version=await aget_catalog_version(), path=path)
+        cached = await cache.aget(key)
+        if cached is not None:
+            return _cached_response(request, cached)
+
+        response = await view(request, *args, **kwargs)
+        stored = _store(response)
+        if stored is not None:
+            await cache.aset(key, stored, PAGE_CACHE_TIMEOUT)
+        return response
+
+    return wrapper
+
+
+def _sync_wrapper(view, params):
+    def wrapper(request, *args, **kwargs):
+        if request.method != 'GET' or request.user.is_authenticated:
+            return view(request, *args, **kwargs)
+
+        path = _page_path(request, params)
+        if path is None:
+            return view(request, *args, **kwargs)
+
+        key = PAGE_CACHE_KEY.format(version=get_catalog_version(), path=path)
+        cached = cache.get(key)
+        if cached is not None:
+            return _cached_response(request, cached)
+
+        response = view(request, *args, **kwargs)
+        stored = _store(response)
+        if stored is not None:
+            cache.set(key, stored, PAGE_CACHE_TIMEOUT)
+        return response
+
+    return wrapper
@@ -0,0 +1,46 @@
+def normalize_phone_number(phone):
+    """
+    Приводит номер телефона к каноническому виду (+7... или +375...).
+    Те же правила использует Telegram бот. Возвращает None, если номер
+    не похож на российский или белорусский.
+    """
+    if not phone:
+        return None
+
+    # Удаляем все нецифровые символы кроме +
+    phone = ''.join(c for c in phone if c.isdigit() or c == '+')
+
+    # Белорусские номера. 80... проверяется раньше российского 8...:
+    # иначе 80291234567 превращается в +70291234567
+    if phone.startswith('80') and len(phone) == 11:
+        return '+375' + phone[2:]
+    elif phone.startswith('375') and len(phone) == 12:
+        return '+' + phone
+    elif phone.startswith('+375') and len(phone) == 13:
+        return phone
+    elif len(phone) == 9 and phone.startswith(('29', '33', '44', '25')):
+        return '+375' + phone
+
+    # Российские номера
+    elif phone.startswith('8') and len(phone) == 11:
+        return '+7' + phone[1:]
+    elif phone.startswith('7') and len(phone) == 11:
+        return '+' + phone
+    elif phone.startswith('+7') and len(phone) == 12:
+        return phone
+
+    return None
+
+
+def strip_phone_number(phone):
+    """Только цифры и +"""
+    return ''.join(c for c in phone or '' if c.isdigit() or c == '+')
+
+
+def phone_lookup_key(phone):
+    """
+    Значение Order.phone_normalized и ключ поиска заказов по телефону:
+    канонический номер для России и Беларуси, иначе - цифры и +.
+    При сохранении и при поиске используется одна и та же функция.
+    """
+    return normalize_phone_number(phone) or strip_phone_number(phone)
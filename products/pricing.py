@@ -0,0 +1,86 @@
+from collections import defaultdict
+
+from .models import CartItem, OrderLine
+
+class CartLine:
+    """Строка корзины с заранее рассчитанными ценой, названием и изображением"""
+
+    def __init__(self, item):
+        self.item = item
+        self.id = item.id
+        self.product_type = item.product_type
+        self.product_id = item.product_id
+        self.grams = item.grams
+        self.quantity = item.quantity
+        self.product = item.product
+        self.product_name = item.product_name
+        self.unit_price = item.unit_price
+        self.total_price = self.unit_price * self.quantity
+        self.image = self.product.image if self.product and self.product.image else None
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product_name}"
+
+
+class PricedCart:
+    """Корзина с рассчитанными строками и итогами"""
+
+    def __init__(self, cart, lines):
+        self.cart = cart
+        self.id = cart.id
+        self.lines = lines
+        self.total_price = sum(line.total_price for line in lines)
+        self.total_items = sum(line.quantity for line in lines)
+
+    def __str__(self):
+        return str(self.cart)
+
+
+def price_carts(carts):
+    """
+    Рассчитывает несколько корзин сразу: один запрос с JOIN на все товары.
+    Возвращает словарь {id корзины: PricedCart}.
+    """
+    carts = [cart for cart in carts if cart is not None]
+    if not carts:
+        return {}
+
+    items_by_cart = defaultdict(list)
+    items = list(
+        CartItem.objects.filter(cart_id__in=[cart.id for cart in carts])
+        .select_related('coffee', 'tea', 'syrup')
+        .order_by('id')
+    )
+    for item in items:
+        items_by_cart[item.cart_id].append(item)
+
+    return {
+        cart.id: PricedCart(cart, [CartLine(item) for item in items_by_cart[cart.id]])
+        for cart in carts
+    }
+
+
+def price_cart(cart):
+    """Рассчитывает одну корзину"""
+    return price_carts([cart])[cart.id]
+
+
+def snapshot_order_lines(order, priced_cart):
+    """
+    Сохраняет состав заказа одним bulk_create.
+    Дальше заказ читается только из OrderLine, без обращения к товарам.
+    """
+    lines = [
+        OrderLine(
+            order=order,
+            product_type=line.product_type,
+            product_id=line.product_id,
+            product_name=line.product_name,
+            grams=line.grams,
+            quantity=line.quantity,
+            unit_price=line.unit_price,
+            total_price=line.total_price,
+        )
+        for line in priced_cart.lines
+    ]
+    return OrderLine.objects.bulk_create(lines)
@@ -0,0 +1,121 @@
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import Coffee, Tea, Syrup, ProductSearchEntry
+from .transactions import write_transaction
+
+# Слова, по которым находится любой товар данного типа
+TYPE_KEYWORDS = {
+    'coffee': 'Кофе coffee',
+    'tea': 'Чай чаи tea',
+    'syrup': 'Сироп сиропы syrup',
+}
+
+PRODUCT_TYPES_BY_MODEL = {
+    Coffee: 'coffee',
+    Tea: 'tea',
+    Syrup: 'syrup',
+}
+
+SQLITE_SEARCH_SQL = """
+    SELECT e.* FROM products_productsearchentry e
+    JOIN products_search_fts f ON f.rowid = e.id
+    WHERE products_search_fts MATCH %s
+    ORDER BY bm25(products_search_fts, 10.0, 5.0, 1.0), e.is_available DESC
+    LIMIT %s
+"""
+
+POSTGRES_DOCUMENT = (
+    "to_tsvector('russian', coalesce(name, '') || ' ' || coalesce(type_labels, '') "
+    "|| ' ' || coalesce(description, ''))"
+)
+
+POSTGRES_SEARCH_SQL = f"""
+    SELECT * FROM products_productsearchentry
+    WHERE {POSTGRES_DOCUMENT} @@ to_tsquery('russian', %s)
+    ORDER BY ts_rank({POSTGRES_DOCUMENT}, to_tsquery('russian', %s)) DESC, is_available DESC
+    LIMIT %s
+"""
+
+
+def _type_labels(product_type, product):
+    labels = [TYPE_KEYWORDS[product_type]]
+    if product_type == 'coffee':
+        labels.append(product.get_coffee_type_display())
+    elif product_type == 'tea':
+        labels.append(product.get_tea_type_display())
+    elif product_type == 'syrup':
+        labels.append(product.get_manufacturer_display())
+    return ' '.join(labels)
+
+
+def index_product(product):
+    """Добавляет или обновляет товар в поисковом индексе"""
+    product_type = PRODUCT_TYPES_BY_MODEL[type(product)]
+    ProductSearchEntry.objects.update_or_create(
+        product_type=product_type,
+        product_id=product.pk,
+        defaults={
+            'name': product.name,
+            'type_labels': _type_labels(product_type, product),
+            'description': product.description,
+            'is_available': product.is_available,
+        },
+    )
+
+
+def unindex_product(product):
+    """Удаляет товар из поискового индекса"""
+    product_type = PRODUCT_TYPES_BY_MODEL[type(product)]
+    ProductSearchEntry.objects.filter(product_type=product_type, product_id=product.pk).delete()
+
+
+def rebuild_search_index():
+    """Полностью перестраивает индекс. Возвращает число проиндексированных товаров."""
+    entries = []
+    for model, product_type in PRODUCT_TYPES_BY_MODEL.items():
+        for product in model.objects.all():
+            entries.append(ProductSearchEntry(
+                product_type=product_type,
+                product_id=product.pk,
+                name=product.name,
+                type_labels=_type_labels(product_type, product),
+                description=product.description,
+                is_available=product.is_available,
+            ))
+
+    # Одна транзакция: поиск не видит пустой или наполовину заполненный индекс
+    with write_transaction():
+        ProductSearchEntry.objects.all().delete()
+        ProductSearchEntry.objects.bulk_create(entries, batch_size=500)
+    return len(entries)
+
+
+def search_products(query, limit=50):
+    """
+    Ищет товары всех типов одним запросом, лучшие совпадения первыми.
+    SQLite - FTS5 (bm25), PostgreSQL - tsvector (ts_rank), иначе - icontains.
+    Каждое слово запроса ищется как префикс.
+    """
+    tokens = re.findall(r'\w+', query.lower())
+    if not tokens:
+        return []
+
+    if connection.vendor == 'sqlite':
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        return list(ProductSearchEntry.objects.raw(SQLITE_SEARCH_SQL, [match, limit]))
+
+    if connection.vendor == 'postgresql':
+        tsquery = ' & '.join(f'{token}:*' for token in tokens)
+        return list(ProductSearchEntry.objects.raw(POSTGRES_SEARCH_SQL, [tsquery, tsquery, limit]))
+
+    condition = Q()
+    for token in tokens:
+        condition &= (
+            Q(name__icontains=token)
+            | Q(type_labels__icontains=token)
+            | Q(description__icontains=token)
+        )
+    return list(ProductSearchEntry.objects.filter(condition).order_by('-is_available', 'name')[:limit])
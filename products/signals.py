@@ -0,0 +1,121 @@
+import logging
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .cache import bump_catalog_version, bump_orders_version
+from .models import Coffee, Tea, Syrup, Order
+from .autocomplete import apply_product_change
+from .images import delete_image_variants, generate_image_variants
+from .notifications import queue_order_status_notifications
+from .search import PRODUCT_TYPES_BY_MODEL, index_product, unindex_product
+from .transactions import write_transaction
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_init, sender=Order)
+def remember_order_status(sender, instance, **kwargs):
+    """Запоминает статус заказа, чтобы при сохранении заметить его изменение"""
+    instance._original_status = instance.status
+
+
+@receiver(post_save, sender=Order)
+def invalidate_order_caches(sender, instance, created, **kwargs):
+    """
+    Новый заказ или смена статуса сбрасывают кэш ответов бота по этому телефону.
+    О смене статуса клиент получает уведомление в Telegram.
+    """
+    status_changed = not created and instance.status != instance._original_status
+    if (created or status_changed) and instance.phone_normalized:
+        # После коммита: иначе читатель успеет закэшировать старые строки под новой версией
+        phone = instance.phone_normalized
+        transaction.on_commit(lambda: bump_orders_version(phone))
+    if status_changed:
+        transaction.on_commit(lambda: queue_status_notification(instance.id, instance.phone_normalized))
+    instance._original_status = instance.status
+
+
+def queue_status_notification(order_id, phone):
+    """
+    Уведомление после коммита сохранения заказа. Статус берется из базы:
+    при параллельных сохранениях в очередь попадает последний из них.
+    """
+    with write_transaction():
+        status = (
+            Order.objects.using(DEFAULT_DB_ALIAS).filter(id=order_id)
+            .values_list('status', flat=True).first()
+        )
+        if status is not None:
+            queue_order_status_notifications([(order_id, phone, status)])
+
+
+@receiver([post_save, post_delete], sender=Coffee)
+@receiver([post_save, post_delete], sender=Tea)
+@receiver([post_save, post_delete], sender=Syrup)
+def invalidate_catalog(sender, instance, signal, **kwargs):
+    """Любое изменение товара делает снимок каталога устаревшим"""
+    deleted = signal is post_delete
+
+    def on_commit():
+        new_version = bump_catalog_version()
+        apply_product_change(PRODUCT_TYPES_BY_MODEL[sender], instance, deleted, new_version)
+
+    transaction.on_commit(on_commit)
+
+
+@receiver(post_save, sender=Coffee)
+@receiver(post_save, sender=Tea)
+@receiver(post_save, sender=Syrup)
+def update_search_index(sender, instance, **kwargs):
+    index_product(instance)
+
+
+@receiver(post_delete, sender=Coffee)
+@receiver(post_delete, sender=Tea)
+@receiver(post_delete, sender=Syrup)
+def remove_from_search_index(sender, instance, **kwargs):
+    unindex_product(instance)
+
+
+def image_in_use(name):
+    """Одинаковые загрузки хранятся одним файлом - он может быть у других товаров"""
+    return any(model.objects.filter(image=name).exists() for model in (Coffee, Tea, Syrup))
+
+
+@receiver(post_init, sender=Coffee)
+@receiver(post_init, sender=Tea)
+@receiver(post_init, sender=Syrup)
+def remember_product_image(sender, instance, **kwargs):
+    """Запоминает файл изображения, чтобы при сохранении заметить загрузку нового"""
+    instance._original_image = instance.image.name if instance.image else ''
+
+
+@receiver(post_save, sender=Coffee)
+@receiver(post_save, sender=Tea)
+@receiver(post_save, sender=Syrup)
+def update_image_variants(sender, instance, **kwargs):
+    """Новое изображение товара (например, из админки) получает уменьшенные копии"""
+    image_name = instance.image.name if instance.image else ''
+    if image_name == instance._original_image:
+        return
+
+    try:
+        if instance._original_image and not image_in_use(instance._original_image):
+            delete_image_variants(instance._original_image)
+        if image_name:
+            # Имя файла - хэш содержимого, готовые копии можно переиспользовать
+            generate_image_variants(image_name)
+    except Exception as e:
+        # Страница покажет оригинал, копии создаст generate_image_variants
+        logger.error(f"Ошибка создания копий изображения {image_name}: {str(e)}")
+    instance._original_image = image_name
+
+
+@receiver(post_delete, sender=Coffee)
+@receiver(post_delete, sender=Tea)
+@receiver(post_delete, sender=Syrup)
+def remove_image_variants(sender, instance, **kwargs):
+    if instance.image and not image_in_use(instance.image.name):
+        delete_image_variants(instance.image.name)
@@ -0,0 +1,50 @@
+import logging
+import os
+
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.utils.safestring import mark_safe
+
+from coffee_shop.storage import minify_css
+
+logger = logging.getLogger(__name__)
+
+register = template.Library()
+
+# Содержимое встраиваемых файлов по пути (в DEBUG читается заново)
+_inline_cache = {}
+
+
+def _static_file_path(path):
+    """Собранный collectstatic файл, а если его нет - файл из исходных каталогов статики"""
+    if not settings.DEBUG:
+        full_path = staticfiles_storage.path(path)
+        if os.path.exists(full_path):
+            return full_path
+    return finders.find(path)
+
+
+@register.simple_tag
+def inline_static(path):
+    """
+    Встраивает минифицированный CSS из статики прямо в страницу (критичные стили).
+    Если файл не найден, страница рендерится без него: стили все равно
+    приходят из подключенной таблицы.
+    """
+    if path in _inline_cache and not settings.DEBUG:
+        return _inline_cache[path]
+
+    full_path = _static_file_path(path)
+    if full_path is None:
+        logger.warning('inline_static: файл %s не найден', path)
+        return ''
+    try:
+        with open(full_path, encoding='utf-8') as source:
+            content = mark_safe(minify_css(source.read()))
+    except OSError as e:
+        logger.warning('inline_static: не удалось прочитать %s: %s', path, e)
+        return ''
+    _inline_cache[path] = content
+    return content
@@ -0,0 +1,43 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html
+
+from products.images import image_srcset
+
+register = template.Library()
+
+# Подсказки браузеру о ширине изображения в разметке
+IMAGE_SIZES = {
+    'thumb': '60px',
+    'card': '(max-width: 768px) 100vw, 240px',
+    'detail': '(max-width: 768px) 100vw, 480px',
+}
+
+
+@register.simple_tag
+def responsive_image(image, alt='', css_class='', sizes='card'):
+    """
+    <picture> с WebP и JPEG копиями изображения товара (см. products.images).
+    image - поле ImageField или имя файла в хранилище. Без копий выводится
+    обычный <img> с оригиналом.
+    """
+    name = image if isinstance(image, str) else image.name
+    url = default_storage.url(name)
+    # Основное изображение страницы товара грузится сразу, карточки - лениво
+    loading = 'eager' if sizes == 'detail' else 'lazy'
+    sizes = IMAGE_SIZES.get(sizes, sizes)
+    webp_srcset = image_srcset(name, 'webp')
+    jpeg_srcset = image_srcset(name, 'jpg')
+
+    if not jpeg_srcset:
+        return format_html(
+            '<img src="{}" alt="{}" class="{}" loading="{}" decoding="async">',
+            url, alt, css_class, loading,
+        )
+    return format_html(
+        '<picture>'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" alt="{}" class="{}" loading="{}" decoding="async">'
+        '</picture>',
+        webp_srcset, sizes, url, jpeg_srcset, sizes, alt, css_class, loading,
+    )
@@ -1,3 +1,643 @@
-from django.test import TestCase
+import base64
+import contextvars
+import gzip
+import hashlib
+import json
+import re
+import tempfile
+from datetime import timedelta
+from smtplib import SMTPException
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import AnonymousUser, User
+from django.core import mail
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.middleware.csrf import _does_token_match
+from django.template import engines
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connection, connections, transaction
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.recorder import MigrationRecorder
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from api.views import find_customer_orders
+from coffee_shop.db_router import (
+    REPLICA_DB_ALIAS,
+    STICKY_COOKIE,
+    PrimaryReplicaRouter,
+    ReplicaStickinessMiddleware,
+    replica_reads,
+)
+from coffee_shop.storage import CompressedManifestStaticFilesStorage, minify_css
+
+from .autocomplete import get_autocomplete_trie
+from .cache import get_orders_version
+from .carts import find_active_cart, get_or_create_active_cart
+from .keyset import ORDER_KEYS, PRODUCT_KEYS, encode_cursor, paginate_keyset
+from .models import Cart, CartItem, Coffee, Order, OrderNotification, OutboxEmail, ProductSearchEntry, Syrup, Tea, TelegramUser
+from .notifications import _create_or_coalesce, claim_notifications, finish_notifications
+from .page_cache import cache_page_for_anonymous
+from .outbox import BACKOFF_BASE, CLAIM_TIMEOUT, MAX_ATTEMPTS, queue_email, send_pending_emails
+from .phones import normalize_phone_number
+from .pricing import price_cart, price_carts, snapshot_order_lines
+from .search import rebuild_search_index, search_products
+
+
+def in_fresh_context(func, *args):
+    """
+    Выполняет func в пустом контексте: флаги роутера (была ли запись)
+    не должны переходить из подготовки базы и других тестов.
+    """
+    return contextvars.Context().run(func, *args)
+
+
+class PrimaryReplicaRouterTests(TestCase):
+    databases = {DEFAULT_DB_ALIAS, REPLICA_DB_ALIAS}
+
+    def setUp(self):
+        # Строка есть только в "реплике": по ней видно, откуда было чтение
+        TelegramUser.objects.using(REPLICA_DB_ALIAS).create(phone_number='+375291111111', telegram_chat_id=1)
+
+    def replica_row_visible(self):
+        return TelegramUser.objects.filter(phone_number='+375291111111').exists()
+
+    def test_reads_go_to_primary_by_default(self):
+        def check():
+            self.assertFalse(self.replica_row_visible())
+            self.assertEqual(PrimaryReplicaRouter().db_for_read(TelegramUser), DEFAULT_DB_ALIAS)
+
+        in_fresh_context(check)
+
+    def test_replica_reads_go_to_replica(self):
+        def check():
+            with replica_reads():
+                self.assertTrue(self.replica_row_visible())
+
+        in_fresh_context(check)
+
+    def test_reads_after_insert_go_to_primary(self):
+        def check():
+            with replica_reads():
+                TelegramUser.objects.create(phone_number='+375292222222', telegram_chat_id=2)
+                self.assertFalse(self.replica_row_visible())
+                self.assertTrue(TelegramUser.objects.filter(phone_number='+375292222222').exists())
+
+        in_fresh_context(check)
+
+    def test_writes_go_to_primary(self):
+        self.assertEqual(PrimaryReplicaRouter().db_for_write(TelegramUser), DEFAULT_DB_ALIAS)
+
+    def test_replica_test_database_is_fully_migrated(self):
+        # Регрессия: данные миграций шли в 'default', и миграция реплики падала
+        leaf = MigrationLoader(connections[REPLICA_DB_ALIAS]).graph.leaf_nodes('products')[0]
+        applied = MigrationRecorder(connections[REPLICA_DB_ALIAS]).applied_migrations()
+        self.assertIn(leaf, applied)
+
+
+class ReplicaStickinessMiddlewareTests(TestCase):
+    databases = {DEFAULT_DB_ALIAS, REPLICA_DB_ALIAS}
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        TelegramUser.objects.using(REPLICA_DB_ALIAS).create(phone_number='+375291111111', telegram_chat_id=1)
+
+    def run_middleware(self, get_response, request):
+        return in_fresh_context(ReplicaStickinessMiddleware(get_response), request)
+
+    def test_write_sets_sticky_cookie(self):
+        def write_view(request):
+            TelegramUser.objects.create(phone_number='+375292222222', telegram_chat_id=2)
+            return HttpResponse()
+
+        response = self.run_middleware(write_view, self.factory.post('/'))
+        self.assertIn(STICKY_COOKIE, response.cookies)
+
+    def test_read_only_request_has_no_cookie(self):
+        def read_view(request):
+            with replica_reads():
+                TelegramUser.objects.count()
+            return HttpResponse()
+
+        response = self.run_middleware(read_view, self.factory.get('/'))
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+    def test_sticky_cookie_pins_reads_to_primary(self):
+        def write_view(request):
+            TelegramUser.objects.create(phone_number='+375292222222', telegram_chat_id=2)
+            return HttpResponse()
+
+        def read_view(request):
+            with replica_reads():
+                visible = TelegramUser.objects.filter(phone_number='+375291111111').exists()
+            return HttpResponse('replica' if visible else 'primary')
+
+        cookie = self.run_middleware(write_view, self.factory.post('/')).cookies[STICKY_COOKIE].value
+
+        request = self.factory.get('/')
+        request.COOKIES[STICKY_COOKIE] = cookie
+        self.assertEqual(self.run_middleware(read_view, request).content, b'primary')
+        self.assertEqual(self.run_middleware(read_view, self.factory.get('/')).content, b'replica')
+
+
+class OutboxTests(TestCase):
+    """Тестовый раннер подменяет EMAIL_BACKEND на locmem: письма попадают в mail.outbox"""
+
+    def setUp(self):
+        self.email = queue_email('Тема', 'Текст', ['client@example.com'])
+
+    def make_due(self):
+        OutboxEmail.objects.filter(pk=self.email.pk).update(next_attempt_at=timezone.now())
+
+    def test_pending_email_is_delivered(self):
+        self.assertEqual(send_pending_emails(), (1, 0))
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['client@example.com'])
+        self.email.refresh_from_db()
+        self.assertEqual(self.email.status, 'sent')
+        self.assertIsNotNone(self.email.sent_at)
+        # Отправленное письмо второй раз не уходит
+        self.assertEqual(send_pending_emails(), (0, 0))
+
+    def test_smtp_outage_reschedules_batch(self):
+        connection = mock.Mock()
+        connection.open.side_effect = SMTPException('connection refused')
+        with mock.patch('products.outbox.get_connection', return_value=connection):
+            self.assertEqual(send_pending_emails(), (0, 1))
+
+        self.email.refresh_from_db()
+        self.assertEqual(self.email.status, 'pending')
+        self.assertEqual(self.email.attempts, 1)
+        self.assertIn('connection refused', self.email.last_error)
+        self.assertGreater(self.email.next_attempt_at, timezone.now() + BACKOFF_BASE - timedelta(seconds=5))
+
+        # Повтор после восстановления почты
+        self.make_due()
+        self.assertEqual(send_pending_emails(), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_backoff_doubles_until_failed(self):
+        with mock.patch('products.outbox.EmailMessage.send', side_effect=SMTPException('rejected')):
+            for attempt in range(1, MAX_ATTEMPTS + 1):
+                before = timezone.now()
+                self.assertEqual(send_pending_emails(), (0, 1))
+                self.email.refresh_from_db()
+                self.assertEqual(self.email.attempts, attempt)
+                if attempt < MAX_ATTEMPTS:
+                    delay = self.email.next_attempt_at - before
+                    expected = BACKOFF_BASE * 2 ** (attempt - 1)
+                    self.assertGreaterEqual(delay, expected)
+                    self.assertLess(delay, expected + timedelta(seconds=5))
+                    # До срока повтора письмо не берется
+                    self.assertEqual(send_pending_emails(), (0, 0))
+                    self.make_due()
+
+        self.assertEqual(self.email.status, 'failed')
+        self.assertEqual(len(mail.outbox), 0)
+
+
+class NormalizePhoneNumberTests(TestCase):
+    def test_belarus_80_prefix_is_not_russian(self):
+        # Регрессия: 80... попадал в ветку российского 8... и становился +70...
+        self.assertEqual(normalize_phone_number('80291234567'), '+375291234567')
+        self.assertEqual(normalize_phone_number('8 (029) 123-45-67'), '+375291234567')
+
+    def test_formats(self):
+        self.assertEqual(normalize_phone_number('89123456789'), '+79123456789')
+        self.assertEqual(normalize_phone_number('+7 912 345-67-89'), '+79123456789')
+        self.assertEqual(normalize_phone_number('375291234567'), '+375291234567')
+        self.assertEqual(normalize_phone_number('29 123-45-67'), '+375291234567')
+        self.assertIsNone(normalize_phone_number('+44 20 7946 0958'))
+
+
+class CustomerOrdersLookupTests(TestCase):
+    def create_order(self, phone):
+        user = User.objects.create_user(f'user{User.objects.count()}')
+        cart = Cart.objects.create(user=user, is_active=False)
+        return Order.objects.create(
+            cart=cart, first_name='Иван', last_name='Иванов', phone=phone,
+            email='client@example.com', total_price=10,
+        )
+
+    def test_foreign_number_is_found(self):
+        # Регрессия: номер не из России/Беларуси сохранялся как '' и не находился
+        order = self.create_order('+44 20 7946 0958')
+        self.assertEqual(order.phone_normalized, '+442079460958')
+
+        data = find_customer_orders('+44 (20) 7946-0958', telegram_chat_id=1)
+        self.assertEqual([item['order_id'] for item in data['orders']], [order.id])
+
+
+    def test_local_formats_match_canonical_number(self):
+        order = self.create_order('+375 (29) 123-45-67')
+
+        data = find_customer_orders('80291234567', telegram_chat_id=1)
+        self.assertEqual([item['order_id'] for item in data['orders']], [order.id])
+
+
+class OrderStatusNotificationTests(TestCase):
+    def setUp(self):
+        TelegramUser.objects.create(phone_number='+375291234567', telegram_chat_id=42)
+        user = User.objects.create_user('client')
+        self.order = Order.objects.create(
+            cart=Cart.objects.create(user=user, is_active=False), first_name='Иван',
+            last_name='Иванов', phone='+375291234567', email='client@example.com', total_price=10,
+        )
+
+    def test_status_change_is_queued_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.order.status = 'confirmed'
+            self.order.save()
+            self.assertFalse(OrderNotification.objects.exists())
+
+        notification = OrderNotification.objects.get()
+        self.assertEqual((notification.chat_id, notification.order_status), (42, 'confirmed'))
+
+    def test_orders_version_is_bumped_after_commit(self):
+        version = get_orders_version('+375291234567')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.order.status = 'confirmed'
+            self.order.save()
+            self.assertEqual(get_orders_version('+375291234567'), version)
+        self.assertEqual(get_orders_version('+375291234567'), version + 1)
+
+    def test_claimed_notification_is_reclaimed_after_timeout(self):
+        OrderNotification.objects.create(order=self.order, chat_id=42, order_status='confirmed')
+        now = timezone.now()
+        with mock.patch('products.notifications.timezone.now', return_value=now):
+            self.assertEqual(len(claim_notifications()), 1)
+            # Взятое в работу уведомление скрыто от других обработчиков
+            self.assertEqual(claim_notifications(), [])
+        with mock.patch('products.notifications.timezone.now', return_value=now + CLAIM_TIMEOUT):
+            # Обработчик не записал результат (упал) - уведомление берется снова
+            self.assertEqual(len(claim_notifications()), 1)
+
+    def test_failed_send_backs_off(self):
+        OrderNotification.objects.create(order=self.order, chat_id=42, order_status='confirmed')
+        now = timezone.now()
+        with mock.patch('products.notifications.timezone.now', return_value=now):
+            for attempt in range(1, MAX_ATTEMPTS + 1):
+                [notification] = claim_notifications()
+                self.assertEqual(finish_notifications([(notification, 'timeout', None, False)]), (0, 1))
+                notification.refresh_from_db()
+                self.assertEqual(notification.attempts, attempt)
+                if attempt < MAX_ATTEMPTS:
+                    self.assertEqual(notification.next_attempt_at, now + BACKOFF_BASE * 2 ** (attempt - 1))
+                    OrderNotification.objects.filter(pk=notification.pk).update(next_attempt_at=now)
+        self.assertEqual(notification.status, 'failed')
+
+    def test_concurrent_pending_notification_is_coalesced(self):
+        # Другое сохранение успело создать ждущее уведомление
+        OrderNotification.objects.create(order=self.order, chat_id=42, order_status='confirmed')
+
+        _create_or_coalesce(
+            OrderNotification(order_id=self.order.id, chat_id=42, order_status='shipped'), timezone.now()
+        )
+
+        notification = OrderNotification.objects.get()
+        self.assertEqual(notification.order_status, 'shipped')
+
+
+class KeysetPaginationTests(TestCase):
+    # Списки каталога читают с реплики
+    databases = {DEFAULT_DB_ALIAS, REPLICA_DB_ALIAS}
+
+    def setUp(self):
+        # Много одинаковых значений первого ключа (is_available): порядок решает id
+        self.coffees = [
+            Coffee.objects.create(name=f'Кофе {number}', is_available=number % 3 != 0)
+            for number in range(10)
+        ]
+        self.expected = sorted(self.coffees, key=lambda coffee: (not coffee.is_available, coffee.id))
+
+    def page(self, cursor=None):
+        return paginate_keyset(Coffee.objects.all(), PRODUCT_KEYS, cursor, per_page=4)
+
+    def test_first_page(self):
+        page = self.page()
+        self.assertEqual(list(page), self.expected[:4])
+        self.assertTrue(page.has_next)
+        self.assertFalse(page.has_previous)
+
+    def test_next_and_previous_round_trip(self):
+        first = self.page()
+        second = self.page(first.next_cursor)
+        third = self.page(second.next_cursor)
+        self.assertEqual(list(second), self.expected[4:8])
+        self.assertEqual(list(third), self.expected[8:])
+        self.assertFalse(third.has_next)
+
+        self.assertEqual(list(self.page(third.previous_cursor)), self.expected[4:8])
+        back = self.page(second.previous_cursor)
+        self.assertEqual(list(back), self.expected[:4])
+        self.assertFalse(back.has_previous)
+
+    def test_pages_do_not_skip_or_repeat_rows_with_equal_keys(self):
+        seen, cursor = [], None
+        while True:
+            page = self.page(cursor)
+            seen.extend(page)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(seen, self.expected)
+
+    def test_broken_cursor_opens_first_page(self):
+        tampered = base64.urlsafe_b64encode(json.dumps({'d': 'next', 'v': [{'x': 1}, 'abc']}).encode()).decode()
+        for cursor in ['not a cursor', '!!!', tampered, encode_cursor([True]), encode_cursor([True, 1], 'sideways')]:
+            with self.subTest(cursor=cursor):
+                self.assertEqual(list(self.page(cursor)), self.expected[:4])
+
+    def test_broken_cursor_in_list_view(self):
+        response = self.client.get(reverse('coffee_list'), {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 200)
+
+
+class OrdersApiCursorTests(TestCase):
+    def setUp(self):
+        cart = Cart.objects.create(user=User.objects.create_user('client'), is_active=False)
+        self.orders = [
+            Order.objects.create(
+                cart=cart, first_name='Иван', last_name='Иванов', phone='+375291234567',
+                email='client@example.com', total_price=10,
+            )
+            for _ in range(7)
+        ]
+        # Одинаковое время создания: порядок внутри - по id
+        Order.objects.update(created_at=timezone.now())
+
+    def post(self, cursor=None):
+        data = {'phone_number': '+375291234567', 'telegram_chat_id': 1}
+        if cursor is not None:
+            data['cursor'] = cursor
+        return self.client.post(reverse('customer-orders'), data, content_type='application/json')
+
+    def order_ids(self, response):
+        return [order['order_id'] for order in response.json()['orders']]
+
+    def test_cursor_pages_with_equal_created_at(self):
+        expected = sorted((order.id for order in self.orders), reverse=True)
+        first = self.post()
+        self.assertEqual(self.order_ids(first), expected[:5])
+        second = self.post(first.json()['next_cursor'])
+        self.assertEqual(self.order_ids(second), expected[5:])
+        self.assertIsNone(second.json()['next_cursor'])
+
+    def test_tampered_cursor_is_not_a_server_error(self):
+        tampered = base64.urlsafe_b64encode(json.dumps({'d': 'next', 'v': [[1], 'x']}).encode()).decode()
+        for cursor in ['garbage', tampered, encode_cursor(['2025-01-01T00:00:00'], 'next')]:
+            with self.subTest(cursor=cursor):
+                response = self.post(cursor)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(self.order_ids(response)), 5)
+
+
+class ActiveCartTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('client')
+
+    def test_second_active_cart_is_rejected(self):
+        Cart.objects.create(user=self.user, is_active=True)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Cart.objects.create(user=self.user, is_active=True)
+        # Неактивных корзин может быть сколько угодно
+        Cart.objects.create(user=self.user, is_active=False)
+        Cart.objects.create(user=self.user, is_active=False)
+
+    def test_concurrent_create_returns_existing_cart(self):
+        existing = Cart.objects.create(user=self.user, is_active=True)
+        # Первый поиск "не видит" корзину, созданную параллельным запросом:
+        # вставка упирается в ограничение, повторный поиск ее находит
+        lookup = mock.Mock(side_effect=[None, find_active_cart(self.user)])
+        with mock.patch('products.carts.find_active_cart', lookup):
+            cart = get_or_create_active_cart(self.user)
+
+        self.assertEqual(lookup.call_count, 2)
+
+        self.assertEqual(cart.pk, existing.pk)
+        self.assertEqual(Cart.objects.filter(user=self.user, is_active=True).count(), 1)
+
+    def test_creates_cart_when_none_is_active(self):
+        Cart.objects.create(user=self.user, is_active=False)
+        cart = get_or_create_active_cart(self.user)
+        self.assertTrue(cart.is_active)
+        self.assertEqual(cart.items_quantity, 0)
+        self.assertEqual(get_or_create_active_cart(self.user).pk, cart.pk)
+
+
+class AnonymousPageCacheTests(TestCase):
+    def setUp(self):
+        # Кэш общий для тестов процесса (и не очищается: версии каталога
+        # начались бы заново), поэтому у каждого теста свой путь
+        self.factory = RequestFactory()
+        self.calls = 0
+        self.path = f'/{self._testMethodName}/'
+        template = engines['django'].from_string('<form>{% csrf_token %}{{ cursor }}</form>')
+
+        @cache_page_for_anonymous('cursor')
+        def view(request):
+            self.calls += 1
+            return HttpResponse(template.render({'cursor': request.GET.get('cursor', '')}, request))
+
+        self.view = view
+
+    def get(self, path, user=None):
+        request = self.factory.get(path)
+        request.user = user or AnonymousUser()
+        return request, self.view(request)
+
+    def csrf_token(self, response):
+        return re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', response.content.decode()).group(1)
+
+    def test_cached_page_gets_csrf_token_of_each_request(self):
+        first_request, first = self.get(self.path)
+        second_request, second = self.get(self.path)
+
+        self.assertEqual(self.calls, 1)
+        # Токен в закэшированной странице выдан для второго запроса, а не взят из первого
+        self.assertTrue(_does_token_match(self.csrf_token(first), first_request.META['CSRF_COOKIE']))
+        self.assertTrue(_does_token_match(self.csrf_token(second), second_request.META['CSRF_COOKIE']))
+        self.assertNotEqual(first_request.META['CSRF_COOKIE'], second_request.META['CSRF_COOKIE'])
+
+    def test_authenticated_requests_bypass_cache(self):
+        # Корзина есть только у авторизованных: их страницы не кэшируются
+        user = User.objects.create_user('client')
+        self.get(self.path, user)
+        self.get(self.path, user)
+        self.assertEqual(self.calls, 2)
+        self.get(self.path)
+        self.assertEqual(self.calls, 3)
+
+    def test_key_depends_only_on_declared_params(self):
+        self.get(self.path + '?cursor=a')
+        _, response = self.get(self.path + '?cursor=a')
+        self.assertEqual(self.calls, 1)
+
+        _, response = self.get(self.path + '?cursor=b')
+        self.assertEqual(self.calls, 2)
+        self.assertIn(b'b</form>', response.content)
+
+        # Незнакомые параметры: страница не кэшируется и не берется из кэша
+        self.get(self.path + '?cursor=a&utm_source=x')
+        self.get(self.path + '?cursor=a&utm_source=x')
+        self.assertEqual(self.calls, 4)
+
+
+class ProductSearchTests(TestCase):
+    def found_ids(self, query):
+        return [(entry.product_type, entry.product_id) for entry in search_products(query)]
+
+    def test_created_and_edited_product_is_found(self):
+        coffee = Coffee.objects.create(name='Эфиопия Иргачефф', description='Цитрусовая кислинка')
+        self.assertIn(('coffee', coffee.pk), self.found_ids('иргач'))
+        self.assertIn(('coffee', coffee.pk), self.found_ids('цитрус'))
+
+        coffee.name = 'Кения АА'
+        coffee.save()
+        self.assertIn(('coffee', coffee.pk), self.found_ids('кения'))
+        self.assertNotIn(('coffee', coffee.pk), self.found_ids('иргач'))
+
+        coffee.delete()
+        self.assertEqual(self.found_ids('кения'), [])
+
+    def test_rebuild_restores_index(self):
+        tea = Tea.objects.create(name='Молочный улун', tea_type='green')
+        ProductSearchEntry.objects.all().delete()
+        self.assertEqual(self.found_ids('улун'), [])
+
+        self.assertEqual(rebuild_search_index(), 1)
+        self.assertEqual(self.found_ids('улун'), [('tea', tea.pk)])
+
+
+class AutocompleteTests(TestCase):
+    def suggested(self, query):
+        return [suggestion.key for suggestion in get_autocomplete_trie().suggest(query)]
+
+    def test_new_and_renamed_product_is_suggested(self):
+        # Дерево обновляется после коммита (версия каталога, apply_product_change)
+        with self.captureOnCommitCallbacks(execute=True):
+            tea = Tea.objects.create(name='Молочный улун')
+        self.assertIn(('tea', tea.pk), self.suggested('улу'))
+        self.assertIn(('tea', tea.pk), self.suggested('ulu'))
+        self.assertIn(('tea', tea.pk), self.suggested('молочный у'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            tea.name = 'Те Гуань Инь'
+            tea.save()
+        self.assertIn(('tea', tea.pk), self.suggested('гуань'))
+        self.assertNotIn(('tea', tea.pk), self.suggested('улу'))
+
+
+class PricingTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('client')
+        self.coffee = Coffee.objects.create(name='Бразилия', price_250g=300, price_500g=550, price_1000g=1000)
+        self.syrup = Syrup.objects.create(name='Карамель', price=400)
+
+    def make_cart(self, coffee_quantity=2):
+        cart = Cart.objects.create(user=self.user, is_active=False)
+        CartItem.objects.create(cart=cart, coffee=self.coffee, grams=500, quantity=coffee_quantity)
+        CartItem.objects.create(cart=cart, syrup=self.syrup, quantity=1)
+        return cart
+
+    def test_price_cart(self):
+        priced = price_cart(self.make_cart())
+        self.assertEqual(priced.total_price, 550 * 2 + 400)
+        self.assertEqual(priced.total_items, 3)
+        self.assertEqual(
+            [(line.product_name, line.unit_price, line.total_price) for line in priced.lines],
+            [('Бразилия (500г)', 550, 1100), (str(self.syrup.name) + ' (Monin)', 400, 400)],
+        )
+
+    def test_price_carts_uses_one_query(self):
+        carts = [self.make_cart(quantity) for quantity in (1, 2, 3)]
+        with self.assertNumQueries(1):
+            priced = price_carts(carts)
+        self.assertEqual([priced[cart.id].total_price for cart in carts], [950, 1500, 2050])
+
+    def test_empty_cart(self):
+        cart = Cart.objects.create(user=self.user, is_active=False)
+        priced = price_cart(cart)
+        self.assertEqual((priced.total_price, priced.total_items, priced.lines), (0, 0, []))
+
+    def test_snapshot_order_lines(self):
+        cart = self.make_cart()
+        order = Order.objects.create(
+            cart=cart, first_name='Иван', last_name='Иванов', phone='+375291234567',
+            email='client@example.com', total_price=1500,
+        )
+        snapshot_order_lines(order, price_cart(cart))
+        # Изменение цены товара не меняет оформленный заказ
+        Coffee.objects.filter(pk=self.coffee.pk).update(price_500g=999)
+        self.assertEqual(
+            list(order.lines.order_by('id').values_list('product_type', 'grams', 'quantity', 'unit_price', 'total_price')),
+            [('coffee', 500, 2, 550, 1100), ('syrup', None, 1, 400, 400)],
+        )
+
+    def test_cart_admin_changelist_query_count_does_not_grow(self):
+        admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(admin_user)
+        url = reverse('admin:products_cart_changelist')
+
+        self.make_cart()
+        with CaptureQueriesContext(connection) as few:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        for _ in range(5):
+            self.make_cart()
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(url)
+        self.assertContains(response, '1500')
+        self.assertEqual(len(many), len(few))
+
+
+class CompressedManifestStaticFilesStorageTests(TestCase):
+    CSS = (
+        '/* Каталог */\n'
+        + ''.join(f'.product-{n} {{\n    background: url("img/bean.png");\n    margin : 0 ;\n}}\n' for n in range(20))
+    )
+
+    def collect(self):
+        """Повторяет collectstatic: копирует файлы в STATIC_ROOT и вызывает post_process"""
+        source_dir = tempfile.TemporaryDirectory()
+        target_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(source_dir.cleanup)
+        self.addCleanup(target_dir.cleanup)
+
+        source = FileSystemStorage(location=source_dir.name)
+        source.save('css/style.css', ContentFile(self.CSS.encode()))
+        source.save('css/img/bean.png', ContentFile(b'png'))
+
+        storage = CompressedManifestStaticFilesStorage(location=target_dir.name, base_url='/static/')
+        paths = {}
+        for name in ('css/style.css', 'css/img/bean.png'):
+            with source.open(name) as original:
+                storage.save(name, original)
+            paths[name] = (source, name)
+        for name, hashed_name, processed in storage.post_process(paths):
+            self.assertNotIsInstance(processed, Exception)
+        return source, storage
+
+    def test_css_is_minified_before_hashing(self):
+        source, storage = self.collect()
+        hashed_name = storage.hashed_files['css/style.css']
+        with storage.open(hashed_name) as hashed_file:
+            content = hashed_file.read()
+
+        # Хэш в имени соответствует отдаваемому (минифицированному) содержимому
+        self.assertIn(f'.{hashlib.md5(content, usedforsecurity=False).hexdigest()[:12]}.', hashed_name)
+        self.assertEqual(content.decode(), minify_css(self.CSS).replace(
+            'img/bean.png', storage.hashed_files['css/img/bean.png'].removeprefix('css/'),
+        ))
+        # Исходный файл приложения не меняется
+        with source.open('css/style.css') as original:
+            self.assertEqual(original.read().decode(), self.CSS)
+
+    def test_compressed_copies_match_hashed_file(self):
+        _, storage = self.collect()
+        path = storage.path(storage.hashed_files['css/style.css'])
+        with open(path, 'rb') as hashed_file, open(path + '.gz', 'rb') as compressed:
+            self.assertEqual(gzip.decompress(compressed.read()), hashed_file.read())
@@ -0,0 +1,30 @@
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+# Общая для потоков процесса очередь транзакций записи (RLock - допускает вложенность)
+_write_lock = threading.RLock()
+
+
+@contextmanager
+def write_transaction(using=None):
+    """
+    transaction.atomic() для изменяющих данные операций. Для SQLite при
+    SQLITE_SERIALIZE_WRITES потоки процесса выполняют такие транзакции
+    по одной: блокировка держится до коммита, чтение при этом не ждет (WAL).
+    """
+    alias = using or DEFAULT_DB_ALIAS
+    serialize = (
+        getattr(settings, 'SQLITE_SERIALIZE_WRITES', False)
+        and connections[alias].vendor == 'sqlite'
+    )
+    if not serialize:
+        with transaction.atomic(using=using):
+            yield
+        return
+
+    with _write_lock:
+        with transaction.atomic(using=using):
+            yield
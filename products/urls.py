@@ -1,11 +1,14 @@
 
+from django.conf import settings
 from django.urls import path
 from .views import (
     coffee_list,
     tea_list, 
     syrup_list,
+    catalog,
     delivery_info,
     product_search,
+    product_autocomplete,
     coffee_detail,
     tea_detail,
     syrup_detail,
@@ -20,17 +23,33 @@ from .views import (
 )
 from . import views
 
+if settings.ASYNC_VIEWS:
+    # Под ASGI страницы каталога без перехода в поток (см. products.async_views)
+    from .async_views import (
+        index,
+        coffee_list,
+        tea_list,
+        syrup_list,
+        coffee_detail,
+        tea_detail,
+        syrup_detail,
+        product_search,
+    )
+else:
+    index = views.index
 
 urlpatterns = [
-    path('', views.index, name='index'),   
+    path('', index, name='index'),   
     path('coffee/', coffee_list, name='coffee_list'),
     path('tea/', tea_list, name='tea_list'),
     path('syrup/', syrup_list, name='syrup_list'),
+    path('catalog/', catalog, name='catalog'),
     path('delivery/', delivery_info, name='delivery_info'),
     path('coffee/<int:pk>/', coffee_detail, name='coffee_detail'),
     path('tea/<int:pk>/', tea_detail, name='tea_detail'),
     path('syrup/<int:pk>/', syrup_detail, name='syrup_detail'),
     path('search/', product_search, name='product_search'), 
+    path('search/autocomplete/', product_autocomplete, name='product_autocomplete'),
 
     path('cart/add/coffee/<int:product_id>/', add_to_cart, name='add_coffee_to_cart'),
     path('cart/add/tea/<int:product_id>/', add_to_cart, name='add_tea_to_cart'),
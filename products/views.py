@@ -1,138 +1,116 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from django.db.models import Q
+from django.http import Http404
+from django.db.models import F, Sum
 from django.contrib.auth.decorators import login_required
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
 from django.http import JsonResponse
+from django.utils.http import urlencode
 from django.core.paginator import Paginator
-from django.core.mail import send_mail
 from django.conf import settings
 from django.db import IntegrityError
+from coffee_shop.db_router import read_from_replica
 import logging
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 
-from .models import Coffee, Tea, Syrup, Cart, CartItem, Order, TelegramUser
+from .models import Coffee, Tea, Syrup, CartItem, Order, TelegramUser
 from .forms import AddToCartForm, UpdateCartForm, OrderForm
+from .autocomplete import get_autocomplete_trie
+from .carts import get_request_cart
+from .catalog import CATALOG_ORDERINGS, catalog_entries, catalog_queryset, get_catalog_snapshot
+from .keyset import ORDER_KEYS, PRODUCT_KEYS, paginate_keyset
+from .orders import bulk_update_order_status, order_status_summary
+from .outbox import queue_email
+from .page_cache import cache_page_for_anonymous
+from .phones import phone_lookup_key
+from .pricing import price_cart, snapshot_order_lines
+from .search import search_products
+from .transactions import write_transaction
 
 logger = logging.getLogger(__name__)
 
 # ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ
-def get_user_cart(user):
-    """Получение активной корзины пользователя"""
-    active_carts = Cart.objects.filter(user=user, is_active=True)
-    
-    if active_carts.count() > 1:
-        cart = active_carts.order_by('-created_at').first()
-        active_carts.exclude(id=cart.id).update(is_active=False)
-        return cart
-    elif active_carts.count() == 1:
-        return active_carts.first()
-    else:
-        cart = Cart.objects.create(user=user, is_active=True)
-        return cart
+def get_user_cart(request):
+    """Получение активной корзины пользователя (одна на запрос)"""
+    return get_request_cart(request, create=True)
 
-def normalize_phone(phone):
-    """Нормализует номер телефона к стандартному формату"""
-    import re
-    digits = re.sub(r'\D', '', phone)
-    
-    if digits.startswith('375'):
-        return '+' + digits
-    elif digits.startswith('80'):
-        return '+375' + digits[2:]
-    elif len(digits) == 9 and digits.startswith(('29', '33', '44', '25')):
-        return '+375' + digits
-    else:
-        return '+' + digits
+def get_catalog_product_or_404(product_type, pk):
+    """Товар из снимка каталога или 404"""
+    product = get_catalog_snapshot().get(product_type, pk)
+    if product is None:
+        raise Http404('Товар не найден')
+    return product
 
-def send_order_confirmation_email(order, cart):
-    """Отправка email с подтверждением заказа"""
-    try:
-        subject = f'Подтверждение заказа #{order.id}'
-        
-        items_list = ""
-        for item in cart.items.all():
-            items_list += f"- {item.product_name}: {item.quantity} шт. x {item.unit_price} руб. = {item.total_price} руб.\n"
-        
-        message = f"""
-        Уважаемый(ая) {order.first_name} {order.last_name}!
+def queue_order_confirmation_email(order, lines):
+    """Постановка в очередь email с подтверждением заказа (lines - позиции заказа OrderLine)"""
+    subject = f'Подтверждение заказа #{order.id}'
+    
+    items_list = ""
+    for item in lines:
+        items_list += f"- {item.product_name}: {item.quantity} шт. x {item.unit_price} руб. = {item.total_price} руб.\n"
+    
+    message = f"""
+    Уважаемый(ая) {order.first_name} {order.last_name}!
 
-        Благодарим вас за заказ в нашем магазине!
+    Благодарим вас за заказ в нашем магазине!
 
-        Детали заказа:
-        Номер заказа: #{order.id}
-        Дата заказа: {order.created_at.strftime('%d.%m.%Y %H:%M')}
-        
-        Состав заказа:
-        {items_list}
-        
-        Общая сумма: {order.total_price} руб.
-        
-        Контактная информация:
-        Телефон: {order.phone}
-        Email: {order.email}
-        
-        Статус заказа: {order.get_status_display()}
-        
-        Мы свяжемся с вами в ближайшее время для уточнения деталей доставки.
-        
-        С уважением,
-        Команда Fun Coffee
-        """
-        
-        send_mail(
-            subject,
-            message,
-            settings.DEFAULT_FROM_EMAIL,
-            [order.email],
-            fail_silently=True,
-        )
-        logger.info(f"✅ Email подтверждения отправлен для заказа #{order.id}")
-    except Exception as e:
-        logger.error(f"❌ Ошибка отправки email для заказа #{order.id}: {str(e)}")
+    Детали заказа:
+    Номер заказа: #{order.id}
+    Дата заказа: {order.created_at.strftime('%d.%m.%Y %H:%M')}
+    
+    Состав заказа:
+    {items_list}
+    
+    Общая сумма: {order.total_price} руб.
+    
+    Контактная информация:
+    Телефон: {order.phone}
+    Email: {order.email}
+    
+    Статус заказа: {order.get_status_display()}
+    
+    Мы свяжемся с вами в ближайшее время для уточнения деталей доставки.
+    
+    С уважением,
+    Команда Fun Coffee
+    """
+    
+    queue_email(subject, message, [order.email])
+    logger.info(f"✅ Email подтверждения поставлен в очередь для заказа #{order.id}")
 
-def send_new_order_notification(order, cart):
-    """Отправка уведомления владельцу о новом заказе"""
-    try:
-        subject = f'Новый заказ #{order.id}'
-        
-        items_list = ""
-        for item in cart.items.all():
-            items_list += f"- {item.product_name}: {item.quantity} шт. x {item.unit_price} руб. = {item.total_price} руб.\n"
-        
-        message = f"""
-        ПОСТУПИЛ НОВЫЙ ЗАКАЗ!
+def queue_new_order_notification(order, lines):
+    """Постановка в очередь уведомления владельцу о новом заказе (lines - позиции заказа OrderLine)"""
+    subject = f'Новый заказ #{order.id}'
+    
+    items_list = ""
+    for item in lines:
+        items_list += f"- {item.product_name}: {item.quantity} шт. x {item.unit_price} руб. = {item.total_price} руб.\n"
+    
+    message = f"""
+    ПОСТУПИЛ НОВЫЙ ЗАКАЗ!
 
-        Детали заказа:
-        Номер заказа: #{order.id}
-        Дата заказа: {order.created_at.strftime('%d.%m.%Y %H:%M')}
-        
-        Информация о клиенте:
-        Имя: {order.first_name} {order.last_name}
-        Телефон: {order.phone}
-        Email: {order.email}
-        
-        Состав заказа:
-        {items_list}
-        
-        Общая сумма: {order.total_price} руб.
-        
-        Статус заказа: {order.get_status_display()}
-        """
-        
-        owner_email = getattr(settings, 'OWNER_EMAIL', 'owner@example.com')
-        
-        send_mail(
-            subject,
-            message,
-            settings.DEFAULT_FROM_EMAIL,
-            [owner_email],
-            fail_silently=True,
-        )
-        logger.info(f"✅ Уведомление владельцу отправлено для заказа #{order.id}")
-    except Exception as e:
-        logger.error(f"❌ Ошибка отправки уведомления владельцу: {str(e)}")
+    Детали заказа:
+    Номер заказа: #{order.id}
+    Дата заказа: {order.created_at.strftime('%d.%m.%Y %H:%M')}
+    
+    Информация о клиенте:
+    Имя: {order.first_name} {order.last_name}
+    Телефон: {order.phone}
+    Email: {order.email}
+    
+    Состав заказа:
+    {items_list}
+    
+    Общая сумма: {order.total_price} руб.
+    
+    Статус заказа: {order.get_status_display()}
+    """
+    
+    owner_email = getattr(settings, 'OWNER_EMAIL', 'owner@example.com')
+    
+    queue_email(subject, message, [owner_email])
+    logger.info(f"✅ Уведомление владельцу поставлено в очередь для заказа #{order.id}")
 
 # API ДЛЯ TELEGRAM БОТА
 @api_view(['POST'])
@@ -152,7 +130,7 @@ def customer_orders(request):
             return Response({'error': 'Phone number is required'}, status=400)
         
         # Нормализация номера телефона
-        normalized_phone = normalize_phone(phone)
+        normalized_phone = phone_lookup_key(phone)
         logger.info(f"🔧 Нормализация номера: {phone} -> {normalized_phone}")
         
         # ОБРАБОТКА TelegramUser - УПРОЩЕННЫЙ ПОДХОД
@@ -210,13 +188,17 @@ def customer_orders(request):
         logger.info(f"🔍 Поиск заказов для телефона: {normalized_phone}")
         
         try:
-            orders = Order.objects.filter(phone=normalized_phone).order_by('-created_at')[:5]
-            logger.info(f"📦 Найдено заказов: {orders.count()}")
+            orders = list(
+                Order.objects.filter(phone_normalized=phone_lookup_key(phone))
+                .prefetch_related('lines')
+                .order_by('-created_at')[:5]
+            )
+            logger.info(f"📦 Найдено заказов: {len(orders)}")
         except Exception as e:
             logger.error(f"❌ Ошибка при поиске заказов: {str(e)}")
             return Response({'error': 'Ошибка поиска заказов'}, status=500)
         
-        if not orders.exists():
+        if not orders:
             logger.info(f"❌ Заказы не найдены для телефона: {normalized_phone}")
             return Response({'error': 'Заказы не найдены'}, status=404)
         
@@ -231,7 +213,7 @@ def customer_orders(request):
                     'items': []
                 }
                 
-                for item in order.cart.items.all():
+                for item in order.lines.all():
                     order_data['items'].append({
                         'product_name': item.product_name,
                         'quantity': item.quantity,
@@ -252,101 +234,128 @@ def customer_orders(request):
         return Response({'error': 'Внутренняя ошибка сервера'}, status=500)
 
 # ОСНОВНЫЕ ВЬЮШКИ САЙТА
+@cache_page_for_anonymous()
+@read_from_replica
 def index(request):
-    coffees = Coffee.objects.all().order_by('-is_available')
-    teas = Tea.objects.all().order_by('-is_available')
-    syrups = Syrup.objects.all().order_by('-is_available')
+    catalog = get_catalog_snapshot()
     
     context = {
-        'coffees': coffees,
-        'teas': teas,
-        'syrups': syrups,
+        'coffees': catalog.coffees,
+        'teas': catalog.teas,
+        'syrups': catalog.syrups,
     }
     
     return render(request, 'products/index.html', context)
 
+@cache_page_for_anonymous('cursor')
+@read_from_replica
 def coffee_list(request):
-    coffees = Coffee.objects.all().order_by('-is_available')
-    paginator = Paginator(coffees, 4)
-    page_number = request.GET.get('page', 1)
-    coffees = paginator.get_page(page_number)
+    coffees = paginate_keyset(Coffee.objects.all(), PRODUCT_KEYS, request.GET.get('cursor'), per_page=4)
     return render(request, 'products/coffee_list.html', {"coffees": coffees})
 
+@cache_page_for_anonymous('cursor')
+@read_from_replica
 def tea_list(request):
-    teas = Tea.objects.all().order_by('-is_available')
+    teas = paginate_keyset(Tea.objects.all(), PRODUCT_KEYS, request.GET.get('cursor'), per_page=12)
     return render(request, 'products/tea_list.html', {"teas": teas})
 
+@cache_page_for_anonymous('cursor')
+@read_from_replica
 def syrup_list(request):
-    syrups = Syrup.objects.all().order_by('-is_available')
+    syrups = paginate_keyset(Syrup.objects.all(), PRODUCT_KEYS, request.GET.get('cursor'), per_page=12)
     return render(request, 'products/syrup_list.html', {"syrups": syrups})
 
+@cache_page_for_anonymous('sort', 'type', 'page')
+@read_from_replica
+def catalog(request):
+    """Все товары одним списком: сортировка и страницы считаются в базе"""
+    sort = request.GET.get('sort', 'default')
+    if sort not in CATALOG_ORDERINGS:
+        sort = 'default'
+    product_type = request.GET.get('type', '')
+    product_types = [product_type] if product_type in dict(CartItem.PRODUCT_TYPES) else None
+    
+    paginator = Paginator(catalog_queryset(sort=sort, product_types=product_types), 12)
+    page = paginator.get_page(request.GET.get('page', 1))
+    return render(request, 'products/catalog.html', {
+        'page': page,
+        'entries': catalog_entries(page.object_list),
+        'sort': sort,
+        'product_type': product_type if product_types else '',
+        'product_types': CartItem.PRODUCT_TYPES,
+    })
+
 def delivery_info(request):
     return render(request, 'products/delivery_info.html')
 
+@read_from_replica
 def coffee_detail(request, pk):
-    coffee = get_object_or_404(Coffee, pk=pk)
+    coffee = get_catalog_product_or_404('coffee', pk)
     form = AddToCartForm(product_type='coffee')
     return render(request, 'products/coffee_detail.html', {
         'coffee': coffee,
         'form': form
     })
 
+@read_from_replica
 def tea_detail(request, pk):
-    tea = get_object_or_404(Tea, pk=pk)
+    tea = get_catalog_product_or_404('tea', pk)
     form = AddToCartForm(product_type='tea')
     return render(request, 'products/tea_detail.html', {
         'tea': tea,
         'form': form
     })
 
+@read_from_replica
 def syrup_detail(request, pk):
-    syrup = get_object_or_404(Syrup, pk=pk)
+    syrup = get_catalog_product_or_404('syrup', pk)
     form = AddToCartForm(product_type='syrup')
     return render(request, 'products/syrup_detail.html', {
         'syrup': syrup,
         'form': form
     })
 
+@read_from_replica
 def product_search(request):
-    query = request.GET.get('q', '').strip().title()
-    results = []
+    query = request.GET.get('q', '').strip()
+    lowered_query = query.lower()
     
-    if query in ['кофе', 'coffee']:
+    if lowered_query in ['кофе', 'coffee']:
         return redirect('coffee_list')
-    elif query in ['чай', 'чаи', 'tea']:
+    elif lowered_query in ['чай', 'чаи', 'tea']:
         return redirect('tea_list')
-    elif query in ['сироп', 'сиропы', 'syrup']:
+    elif lowered_query in ['сироп', 'сиропы', 'syrup']:
         return redirect('syrup_list')
     
-    results = []
-
-    if query:
-        coffee_results = Coffee.objects.filter(name__iexact=query)
-        tea_results = Tea.objects.filter(name__iexact=query)
-        syrup_results = Syrup.objects.filter(name__iexact=query)
-        
-        results = list(coffee_results) + list(tea_results) + list(syrup_results)
-        
-        if not results:
-            coffee_results = Coffee.objects.filter(name__icontains=query)
-            tea_results = Tea.objects.filter(name__icontains=query)
-            syrup_results = Syrup.objects.filter(name__icontains=query)
-            results = list(coffee_results) + list(tea_results) + list(syrup_results)
-        
-        if len(results) == 1:
-            product = results[0]
-            if isinstance(product, Coffee):
-                return redirect('coffee_detail', pk=product.pk)
-            elif isinstance(product, Tea):
-                return redirect('tea_detail', pk=product.pk)
-            elif isinstance(product, Syrup):
-                return redirect('syrup_detail', pk=product.pk)
+    results = search_products(query) if query else []
+    
+    # Единственный товар или точное совпадение названия - сразу на страницу товара
+    exact_matches = [entry for entry in results if entry.name.lower() == lowered_query]
+    if len(exact_matches) == 1:
+        return redirect(exact_matches[0])
+    if len(results) == 1:
+        return redirect(results[0])
     
     return render(request, 'products/search_results.html', {
         'results': results,
         'query': query,
     })
 
+@read_from_replica
+def product_autocomplete(request):
+    """Подсказки для строки поиска (JSON), без запросов к базе"""
+    query = request.GET.get('q', '')
+    try:
+        limit = max(1, min(int(request.GET.get('limit', 10)), 20))
+    except ValueError:
+        limit = 10
+    
+    suggestions = get_autocomplete_trie().suggest(query, limit)
+    return JsonResponse({
+        'query': query,
+        'results': [suggestion.as_dict() for suggestion in suggestions],
+    })
+
 # ВЬЮШКИ КОРЗИНЫ (ТОЛЬКО ДЛЯ АВТОРИЗОВАННЫХ)
 @login_required
 def add_to_cart(request, product_id):
@@ -365,7 +374,7 @@ def add_to_cart(request, product_id):
         messages.error(request, 'Неверный тип товара')
         return redirect('index')
     
-    cart = get_user_cart(request.user)
+    cart = get_user_cart(request)
     
     if request.method == 'POST':
         form = AddToCartForm(request.POST, product_type=product_type)
@@ -391,17 +400,18 @@ def add_to_cart(request, product_id):
                 messages.error(request, 'Неверный вес для чая')
                 return redirect(f'{product_type}_detail', pk=product_id)
             
-            cart_item, created = CartItem.objects.get_or_create(
-                cart=cart,
-                product_type=product_type,
-                product_id=product_id,
-                grams=grams,
-                defaults={'quantity': quantity}
-            )
+            with write_transaction():
+                cart_item, created = CartItem.objects.get_or_create(
+                    cart=cart,
+                    **{product_type: product},
+                    grams=grams,
+                    defaults={'quantity': quantity}
+                )
+                if not created:
+                    # Прибавление в базе: одновременные добавления не теряют количество
+                    CartItem.objects.filter(pk=cart_item.pk).update(quantity=F('quantity') + quantity)
             
             if not created:
-                cart_item.quantity += quantity
-                cart_item.save()
                 messages.success(request, f'Количество товара обновлено в корзине')
             else:
                 messages.success(request, f'Товар "{product.name}" добавлен в корзину')
@@ -410,7 +420,7 @@ def add_to_cart(request, product_id):
                 return JsonResponse({
                     'success': True, 
                     'message': 'Товар добавлен в корзину',
-                    'cart_total_items': cart.total_items
+                    'cart_total_items': cart.items.aggregate(total=Sum('quantity'))['total'] or 0
                 })
             
             return redirect('index')
@@ -420,14 +430,16 @@ def add_to_cart(request, product_id):
 @login_required
 def cart_detail(request):
     """Просмотр корзины"""
-    cart = get_user_cart(request.user)
-    return render(request, 'products/cart/cart_detail.html', {'cart': cart})
+    cart = get_user_cart(request)
+    return render(request, 'products/cart/cart_detail.html', {'cart': price_cart(cart)})
 
 @login_required
 def update_cart_item(request, item_id):
     """Обновление количества товара в корзине"""
-    cart = get_user_cart(request.user)
-    cart_item = get_object_or_404(CartItem, id=item_id, cart=cart)
+    cart = get_user_cart(request)
+    cart_item = get_object_or_404(
+        CartItem.objects.select_related('coffee', 'tea', 'syrup'), id=item_id, cart=cart
+    )
     
     if request.method == 'POST':
         form = UpdateCartForm(request.POST, instance=cart_item)
@@ -436,10 +448,12 @@ def update_cart_item(request, item_id):
             
             if quantity == 0:
                 product_name = cart_item.product_name
-                cart_item.delete()
+                with write_transaction():
+                    cart_item.delete()
                 messages.success(request, f'Товар "{product_name}" удален из корзины')
             else:
-                form.save()
+                with write_transaction():
+                    form.save()
                 messages.success(request, 'Количество товара обновлено')
     
     return redirect('cart_detail')
@@ -447,25 +461,29 @@ def update_cart_item(request, item_id):
 @login_required
 def remove_from_cart(request, item_id):
     """Удаление товара из корзины"""
-    cart = get_user_cart(request.user)
-    cart_item = get_object_or_404(CartItem, id=item_id, cart=cart)
+    cart = get_user_cart(request)
+    cart_item = get_object_or_404(
+        CartItem.objects.select_related('coffee', 'tea', 'syrup'), id=item_id, cart=cart
+    )
     product_name = cart_item.product_name
-    cart_item.delete()
+    with write_transaction():
+        cart_item.delete()
     messages.success(request, f'Товар "{product_name}" удален из корзины')
     return redirect('cart_detail')
 
 @login_required
 def clear_cart(request):
     """Очистка всей корзины"""
-    cart = get_user_cart(request.user)
-    cart.items.all().delete()
+    cart = get_user_cart(request)
+    with write_transaction():
+        cart.items.all().delete()
     messages.success(request, 'Корзина очищена')
     return redirect('cart_detail')
 
 @login_required
 def checkout(request):
     """Оформление заказа"""
-    cart = get_user_cart(request.user)
+    cart = get_user_cart(request)
     
     if not cart.items.exists():
         messages.error(request, 'Ваша корзина пуста')
@@ -475,20 +493,21 @@ def checkout(request):
         form = OrderForm(request.POST)
         if form.is_valid():
             try:
-                order = form.save(commit=False)
-                order.user = request.user
-                order.cart = cart
-                order.total_price = cart.total_price
-                order.save()
-                
-                cart.is_active = False
-                cart.save()
-                
-                try:
-                    send_order_confirmation_email(order, cart)
-                    send_new_order_notification(order, cart)
-                except Exception as e:
-                    logger.error(f"Ошибка отправки email: {str(e)}")
+                priced_cart = price_cart(cart)
+                with write_transaction():
+                    order = form.save(commit=False)
+                    order.user = request.user
+                    order.cart = cart
+                    order.total_price = priced_cart.total_price
+                    order.save()
+                    order_lines = snapshot_order_lines(order, priced_cart)
+                    
+                    cart.is_active = False
+                    cart.save()
+                    
+                    # Письма отправит send_outbox_emails, здесь они только попадают в очередь
+                    queue_order_confirmation_email(order, order_lines)
+                    queue_new_order_notification(order, order_lines)
                 
                 messages.success(request, 'Ваш заказ успешно оформлен!')
                 return redirect('order_success', order_id=order.id)
@@ -508,14 +527,16 @@ def checkout(request):
         form = OrderForm(initial=initial_data)
     
     return render(request, 'products/cart/checkout.html', {
-        'cart': cart,
+        'cart': price_cart(cart),
         'form': form
     })
 
 @login_required
 def order_success(request, order_id):
     """Страница успешного оформления заказа"""
-    order = get_object_or_404(Order, id=order_id, user=request.user)
+    order = get_object_or_404(
+        Order.objects.prefetch_related('lines'), id=order_id, user=request.user
+    )
     
     if order.user != request.user:
         messages.error(request, 'У вас нет доступа к этому заказу')
@@ -527,15 +548,54 @@ def order_success(request, order_id):
 @staff_member_required
 def order_management(request):
     """Страница управления заказами для администратора"""
-    orders = Order.objects.all().order_by('-created_at')
+    if request.method == 'POST':
+        new_status = request.POST.get('new_status')
+        order_ids = [int(pk) for pk in request.POST.getlist('order_ids') if pk.isdigit()]
+        if new_status not in dict(Order.STATUS_CHOICES):
+            messages.error(request, 'Неверный статус')
+        elif not order_ids:
+            messages.error(request, 'Не выбрано ни одного заказа')
+        else:
+            updated = bulk_update_order_status(order_ids, new_status)
+            skipped = len(order_ids) - updated
+            messages.success(request, f'Статус изменен у заказов: {updated}')
+            if skipped:
+                messages.warning(request, f'Пропущено заказов (переход недопустим): {skipped}')
+        return redirect(request.get_full_path())
     
-    status_filter = request.GET.get('status')
-    if status_filter:
+    orders = Order.objects.all()
+    
+    # Каждый фильтр опирается на индекс: статус, телефон или номер заказа
+    status_filter = request.GET.get('status', '')
+    if status_filter in dict(Order.STATUS_CHOICES):
         orders = orders.filter(status=status_filter)
+    else:
+        status_filter = ''
+    
+    phone_filter = request.GET.get('phone', '').strip()
+    if phone_filter:
+        orders = orders.filter(phone_normalized=phone_lookup_key(phone_filter))
+    
+    order_id = request.GET.get('order_id', '').strip()
+    if order_id.isdigit():
+        orders = orders.filter(id=int(order_id))
+    else:
+        order_id = ''
+    
+    summary, total = order_status_summary()
+    page = paginate_keyset(
+        orders.prefetch_related('lines'), ORDER_KEYS, request.GET.get('cursor'), per_page=50
+    )
     
+    filters = {'status': status_filter, 'phone': phone_filter, 'order_id': order_id}
     context = {
-        'orders': orders,
+        'orders': page,
+        'summary': summary,
+        'total': total,
         'status_choices': Order.STATUS_CHOICES,
         'current_status': status_filter,
+        'phone_filter': phone_filter,
+        'order_id': order_id,
+        'filter_query': urlencode({key: value for key, value in filters.items() if value}),
     }
-    return render(request, 'products/admin/order_management.html', context)
\ No newline at end of file
+    return render(request, 'products/admin/order_management.html', context)
@@ -1,20 +1,51 @@
-import requests
+import asyncio
+
+import httpx
 from telegram import Update
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
 from django.conf import settings
 
+from products.cache import aget_orders_version
+from products.phones import normalize_phone_number
+from .cache import orders_cache
+from .clients import build_orders_client
+from .metrics import BotMetrics
+from .processing import ChatOrderedUpdateProcessor
+
 # Конфигурация
 BOT_TOKEN = settings.TELEGRAM_BOT_TOKEN
-API_URL = 'http://localhost:8000/api/customer-orders/'
 
 class CoffeeShopBot:
     def __init__(self):
-        self.application = Application.builder().token(BOT_TOKEN).build()
+        self.orders_client = build_orders_client()
+        self.metrics = BotMetrics()
+        self._metrics_task = None
+        builder = (
+            Application.builder()
+            .token(BOT_TOKEN)
+            .base_url(settings.TELEGRAM_BOT_API_BASE_URL)
+            # Разные чаты параллельно, сообщения одного чата - по порядку
+            .concurrent_updates(ChatOrderedUpdateProcessor(
+                workers=settings.TELEGRAM_BOT_MAX_CONCURRENCY,
+                max_pending=settings.TELEGRAM_BOT_MAX_PENDING_UPDATES,
+                metrics=self.metrics,
+            ))
+            .post_init(self.post_init)
+            .post_shutdown(self.post_shutdown)
+        )
+        if settings.TELEGRAM_BOT_MODE == 'webhook':
+            # Обновления приходят в ASGI приложение, Updater (polling) не нужен
+            builder = builder.updater(None)
+        self.application = builder.build()
+        self._webhook_lock = None
         self.setup_handlers()
     
     def setup_handlers(self):
-        self.application.add_handler(CommandHandler("start", self.start_command))
-        self.application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, self.handle_message))
+        timed = self.metrics.timed
+        self.application.add_handler(CommandHandler("start", timed("start", self.start_command)))
+        self.application.add_handler(MessageHandler(
+            filters.TEXT & ~filters.COMMAND, timed("orders", self.handle_message)
+        ))
     
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         welcome_text = """
@@ -51,35 +82,35 @@ class CoffeeShopBot:
         
         print(f"🔍 Поиск заказов для телефона: {phone_number}")
         
-        # Запрос к API
+        # Версия читается до запроса: заказ, измененный во время запроса,
+        # сменит версию, и собранный ответ не будет отдан из кэша
+        orders_version = await aget_orders_version(phone_number)
+        cached_parts = orders_cache.get(phone_number, orders_version)
+        if cached_parts is not None:
+            print(f"⚡ Ответ из кэша: {orders_cache.stats()}")
+            await self.reply_parts(update, cached_parts)
+            return
+        
+        # Запрос к API (или напрямую к ORM, см. TELEGRAM_BOT_ORDERS_MODE)
         try:
-            response = requests.post(
-                API_URL,
-                json={
-                    'phone_number': phone_number,
-                    'telegram_chat_id': chat_id
-                },
-                headers={'Content-Type': 'application/json'},
-                timeout=10
-            )
+            status_code, data = await self.orders_client.fetch_orders(phone_number, chat_id)
             
-            print(f"📡 API Response: {response.status_code}")
+            print(f"📡 API Response: {status_code}")
             
-            if response.status_code == 200:
-                data = response.json()
+            if status_code == 200:
                 print(f"✅ Найдено заказов: {len(data.get('orders', []))}")
-                await self.send_orders_response(update, data)
-            elif response.status_code == 404:
+                await self.send_orders_response(update, data, phone_number, orders_version)
+            elif status_code == 404:
                 await update.message.reply_text(
                     f"📭 Заказы для телефона {phone_number} не найдены."
                 )
             else:
-                print(f"❌ Ошибка API: {response.text}")
+                print(f"❌ Ошибка API: {data.get('error')}")
                 await update.message.reply_text(
-                    f"❌ Ошибка сервера: {response.status_code}. Попробуйте позже."
+                    f"❌ Ошибка сервера: {status_code}. Попробуйте позже."
                 )
                 
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             print(f"❌ Ошибка запроса: {e}")
             await update.message.reply_text(
                 "❌ Ошибка соединения с сервером. Убедитесь, что запущен Django сервер."
@@ -90,14 +121,18 @@ class CoffeeShopBot:
                 "❌ Произошла непредвиденная ошибка."
             )
     
-    async def send_orders_response(self, update: Update, data):
+    async def send_orders_response(self, update: Update, data, phone_number, orders_version):
+        parts = self.render_orders_text(data, phone_number)
+        orders_cache.set(phone_number, orders_version, parts)
+        print(f"📊 Кэш ответов: {orders_cache.stats()}")
+        await self.reply_parts(update, parts)
+    
+    def render_orders_text(self, data, phone_number):
+        """Готовит текст ответа, разбитый на части по лимиту Telegram"""
         orders = data.get('orders', [])
         
         if not orders:
-            await update.message.reply_text(
-                f"📭 Заказы для телефона {data.get('phone_number')} не найдены."
-            )
-            return
+            return [f"📭 Заказы для телефона {data.get('phone_number', phone_number)} не найдены."]
         
         response_text = f"📦 Ваши последние заказы ({len(orders)} из 5):\n\n"
         
@@ -113,43 +148,80 @@ class CoffeeShopBot:
             
             response_text += "\n" + "="*40 + "\n\n"
         
-        if len(response_text) > 4096:
-            parts = [response_text[i:i+4096] for i in range(0, len(response_text), 4096)]
-            for part in parts:
-                await update.message.reply_text(part)
-        else:
-            await update.message.reply_text(response_text)
+        return [response_text[i:i+4096] for i in range(0, len(response_text), 4096)]
+    
+    async def reply_parts(self, update: Update, parts):
+        for part in parts:
+            await update.message.reply_text(part)
+    
+    async def post_init(self, application):
+        self.start_metrics_reporter()
+    
+    async def post_shutdown(self, application):
+        """Останавливает вывод метрик и закрывает пул соединений клиента заказов"""
+        if self._metrics_task is not None:
+            self._metrics_task.cancel()
+            self._metrics_task = None
+        await self.orders_client.close()
+    
+    def metrics_snapshot(self):
+        return self.metrics.snapshot(queue_size=self.application.update_queue.qsize())
+    
+    def start_metrics_reporter(self):
+        """Раз в TELEGRAM_BOT_METRICS_INTERVAL секунд печатает метрики обработки обновлений"""
+        interval = settings.TELEGRAM_BOT_METRICS_INTERVAL
+        if interval <= 0 or self._metrics_task is not None:
+            return
+        
+        async def report():
+            while True:
+                await asyncio.sleep(interval)
+                print(f"📈 Метрики бота: {self.metrics_snapshot()}")
+        
+        self._metrics_task = asyncio.get_running_loop().create_task(report())
     
     def normalize_phone_number(self, phone):
         """Нормализация номера телефона (поддержка российских и белорусских номеров)"""
-        # Удаляем все нецифровые символы кроме +
-        phone = ''.join(c for c in phone if c.isdigit() or c == '+')
-        
         print(f"🔧 Нормализация номера: {phone}")
         
-        # Российские номера
-        if phone.startswith('8') and len(phone) == 11:
-            result = '+7' + phone[1:]
-        elif phone.startswith('7') and len(phone) == 11:
-            result = '+' + phone
-        elif phone.startswith('+7') and len(phone) == 12:
-            result = phone
-        
-        # Белорусские номера
-        elif phone.startswith('80') and len(phone) == 11:
-            result = '+375' + phone[2:]
-        elif phone.startswith('375') and len(phone) == 12:
-            result = '+' + phone
-        elif phone.startswith('+375') and len(phone) == 13:
-            result = phone
-        
-        else:
-            result = None
+        result = normalize_phone_number(phone)
         
         print(f"🔧 Результат нормализации: {result}")
         return result
     
+    async def start_webhook_processing(self):
+        """
+        Запускает Application в event loop ASGI сервера при первом вебхуке:
+        Django не поддерживает lifespan, а объекты PTB привязаны к своему loop.
+        """
+        if self.application.running:
+            return
+        if self._webhook_lock is None:
+            self._webhook_lock = asyncio.Lock()
+        async with self._webhook_lock:
+            if not self.application.running:
+                await self.application.initialize()
+                await self.application.start()
+                self.start_metrics_reporter()
+                print("🤖 Бот принимает обновления через webhook")
+    
+    async def process_webhook_update(self, data):
+        """
+        Ставит обновление из вебхука в очередь Application и сразу возвращается:
+        Telegram получает 200, обработка идет в фоне с тем же ограничением
+        параллельности, что и при polling.
+        """
+        await self.start_webhook_processing()
+        update = Update.de_json(data, self.application.bot)
+        if update is not None:
+            await self.application.update_queue.put(update)
+    
     def run(self):
+        if settings.TELEGRAM_BOT_MODE == 'webhook':
+            raise RuntimeError(
+                "TELEGRAM_BOT_MODE='webhook': обновления принимает ASGI приложение, "
+                "адрес вебхука регистрирует команда set_telegram_webhook"
+            )
         print("🤖 Бот запускается...")
         print(f"🔑 Токен: {BOT_TOKEN}")
         try:
@@ -166,5 +238,12 @@ class CoffeeShopBot:
             print("   - Неправильный токен бота")
             print("   - Бот заблокирован")
             print("   - Проблемы с интернет-соединением")
-# Создание экземпляра бота
-bot = CoffeeShopBot()
\ No newline at end of file
+_bot = None
+
+
+def get_bot():
+    """Экземпляр бота создается при первом обращении (вебхук или run_bot), а не при импорте"""
+    global _bot
+    if _bot is None:
+        _bot = CoffeeShopBot()
+    return _bot
@@ -0,0 +1,63 @@
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+class OrdersResponseCache:
+    """
+    Кэш готовых текстов ответа бота по нормализованному номеру телефона.
+    Запись живет не дольше ttl секунд и устаревает сразу, как только
+    изменилась версия заказов этого номера (новый заказ или смена статуса).
+    Записей не больше max_entries: давно не запрошенные номера вытесняются.
+
+    Версию читает вызывающий код (products.cache.aget_orders_version) до
+    запроса заказов и передает в get() и set(): так ответ, собранный до
+    смены версии, сохраняется со старой версией и не отдается после нее,
+    а синхронный файловый кэш не вызывается в цикле событий.
+    """
+
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, phone, version):
+        entry = self._entries.get(phone)
+        if entry is not None:
+            expires_at, entry_version, parts = entry
+            if expires_at > time.monotonic() and entry_version == version:
+                self._entries.move_to_end(phone)
+                self.hits += 1
+                return parts
+            del self._entries[phone]
+        self.misses += 1
+        return None
+
+    def set(self, phone, version, parts):
+        if self.ttl <= 0 or self.max_entries <= 0:
+            return
+        self._entries[phone] = (time.monotonic() + self.ttl, version, parts)
+        self._entries.move_to_end(phone)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, phone):
+        self._entries.pop(phone, None)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'size': len(self._entries),
+        }
+
+
+orders_cache = OrdersResponseCache(
+    ttl=settings.TELEGRAM_BOT_CACHE_TTL,
+    max_entries=settings.TELEGRAM_BOT_CACHE_MAX_ENTRIES,
+)
@@ -0,0 +1,115 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+
+class HttpOrdersClient:
+    """
+    Клиент API заказов поверх общего httpx.AsyncClient.
+    Соединения переиспользуются (keep-alive), число одновременных
+    запросов ограничено семафором, сетевые ошибки повторяются с паузой.
+    """
+
+    def __init__(self, api_url, timeout=10, retries=2, max_concurrency=20):
+        self.api_url = api_url
+        self.timeout = timeout
+        self.retries = retries
+        self.max_concurrency = max_concurrency
+        self._client = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    def _get_client(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout),
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+                headers={'Content-Type': 'application/json'},
+            )
+        return self._client
+
+    async def fetch_orders(self, phone_number, chat_id):
+        """Возвращает (status_code, data) ответа API"""
+        client = self._get_client()
+        async with self._semaphore:
+            for attempt in range(self.retries + 1):
+                try:
+                    response = await client.post(
+                        self.api_url,
+                        json={
+                            'phone_number': phone_number,
+                            'telegram_chat_id': chat_id
+                        },
+                    )
+                    break
+                except httpx.TransportError:
+                    if attempt == self.retries:
+                        raise
+                    await asyncio.sleep(0.5 * 2 ** attempt)
+
+        if response.status_code == 200:
+            return response.status_code, response.json()
+        return response.status_code, {'error': response.text}
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class OrmOrdersClient:
+    """
+    Поиск заказов в том же процессе через ORM, без HTTP. Свой пул потоков
+    размером max_concurrency: пул по умолчанию (min(32, CPU + 4) потоков)
+    ограничивал бы параллельность раньше настройки.
+    """
+
+    def __init__(self, max_concurrency=20):
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='bot-orders')
+
+    @staticmethod
+    def _find_orders(phone_number, chat_id):
+        from api.views import find_customer_orders
+        from coffee_shop.db_router import replica_reads
+
+        # Вне цикла запрос/ответ Django сам не закрывает соединения потоков:
+        # до и после вызова - как request_started/request_finished
+        close_old_connections()
+        try:
+            # Как и API: заказы можно читать с реплики
+            with replica_reads():
+                return find_customer_orders(phone_number, chat_id)
+        finally:
+            close_old_connections()
+
+    async def fetch_orders(self, phone_number, chat_id):
+        async with self._semaphore:
+            # thread_sensitive=False: запросы разных чатов идут в пуле потоков параллельно
+            data = await sync_to_async(
+                self._find_orders, thread_sensitive=False, executor=self._executor
+            )(phone_number, chat_id)
+        return 200, data
+
+    async def close(self):
+        self._executor.shutdown(wait=False)
+
+
+def build_orders_client():
+    """Создает клиент заказов по настройкам TELEGRAM_BOT_*"""
+    max_concurrency = settings.TELEGRAM_BOT_MAX_CONCURRENCY
+    # В режиме webhook бот работает внутри Django: HTTP запрос к себе же не нужен
+    if settings.TELEGRAM_BOT_ORDERS_MODE == 'orm' or settings.TELEGRAM_BOT_MODE == 'webhook':
+        return OrmOrdersClient(max_concurrency=max_concurrency)
+    return HttpOrdersClient(
+        settings.TELEGRAM_BOT_API_URL,
+        timeout=settings.TELEGRAM_BOT_API_TIMEOUT,
+        retries=settings.TELEGRAM_BOT_API_RETRIES,
+        max_concurrency=max_concurrency,
+    )
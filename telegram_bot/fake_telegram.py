@@ -0,0 +1,212 @@
+"""
+Локальная заглушка Telegram Bot API для проверки бота без сети.
+Отвечает на методы, которые использует бот (getMe, sendMessage,
+setWebhook, ...), запоминает отправленные сообщения и умеет присылать
+обновления на вебхук так же, как Telegram (с секретным заголовком).
+Бот направляется на заглушку настройкой
+TELEGRAM_BOT_API_BASE_URL=http://127.0.0.1:<port>/bot
+С enforce_limits заглушка, как Telegram, отвечает 429 (retry_after)
+на превышение общего лимита и лимита на чат.
+"""
+import itertools
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+import httpx
+
+BOT_USER = {
+    'id': 1000000001,
+    'is_bot': True,
+    'first_name': 'Fake Coffee Bot',
+    'username': 'fake_coffee_bot',
+    'can_join_groups': False,
+    'can_read_all_group_messages': False,
+    'supports_inline_queries': False,
+}
+
+
+def text_update(update_id, chat_id, text):
+    """Обновление с текстовым сообщением из личного чата"""
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private', 'first_name': f'Client {chat_id}'},
+            'from': {'id': chat_id, 'is_bot': False, 'first_name': f'Client {chat_id}'},
+            'text': text,
+        },
+    }
+
+
+def webhook_headers(secret_token):
+    return {'X-Telegram-Bot-Api-Secret-Token': secret_token}
+
+
+class FakeTelegram:
+    """
+    Bot API заглушка в фоновом потоке. sent_messages - список
+    (время отправки, chat_id, текст) в порядке получения, rate_limited -
+    число ответов 429.
+    """
+
+    def __init__(self, host='127.0.0.1', port=8081, enforce_limits=False,
+                 global_rate=30, chat_interval=1.0):
+        self.sent_messages = []
+        self.calls = {}
+        self.rate_limited = 0
+        self.enforce_limits = enforce_limits
+        self.global_rate = global_rate
+        # Небольшой допуск на неточность таймеров клиента
+        self.chat_interval = chat_interval * 0.95
+        self._recent_sends = deque()
+        self._last_send_by_chat = {}
+        self.webhook = {'url': '', 'secret_token': ''}
+        self._message_ids = itertools.count(1)
+        self._update_ids = itertools.count(1)
+        self._condition = threading.Condition()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/bot'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _rate_limited(self, chat_id, now):
+        """True, если сообщение нарушает лимиты (вызывается под self._condition)"""
+        while self._recent_sends and self._recent_sends[0] <= now - 1:
+            self._recent_sends.popleft()
+        last_send = self._last_send_by_chat.get(chat_id)
+        if len(self._recent_sends) >= self.global_rate:
+            return True
+        return last_send is not None and now - last_send < self.chat_interval
+
+    def call(self, method, params):
+        """Ответ на вызов метода Bot API: (True, result) или (False, (код, описание, parameters))"""
+        with self._condition:
+            self.calls[method] = self.calls.get(method, 0) + 1
+
+        if method == 'getMe':
+            return True, BOT_USER
+        if method == 'sendMessage':
+            chat_id = int(params['chat_id'])
+            text = params.get('text', '')
+            with self._condition:
+                now = time.monotonic()
+                if self.enforce_limits and self._rate_limited(chat_id, now):
+                    self.rate_limited += 1
+                    return False, (429, 'Too Many Requests: retry after 1', {'retry_after': 1})
+                self._recent_sends.append(now)
+                self._last_send_by_chat[chat_id] = now
+                self.sent_messages.append((now, chat_id, text))
+                self._condition.notify_all()
+            return True, {
+                'message_id': next(self._message_ids),
+                'date': int(time.time()),
+                'chat': {'id': chat_id, 'type': 'private'},
+                'from': BOT_USER,
+                'text': text,
+            }
+        if method == 'setWebhook':
+            self.webhook = {'url': params.get('url', ''), 'secret_token': params.get('secret_token', '')}
+            return True, True
+        if method == 'deleteWebhook':
+            self.webhook = {'url': '', 'secret_token': ''}
+            return True, True
+        if method == 'getWebhookInfo':
+            return True, {
+                'url': self.webhook['url'],
+                'has_custom_certificate': False,
+                'pending_update_count': 0,
+            }
+        if method == 'getUpdates':
+            # Polling не поддерживается: пустой ответ после короткой паузы
+            time.sleep(min(float(params.get('timeout', 0) or 0), 1))
+            return True, []
+        return False, (404, f'Method {method} is not supported by the fake Bot API', None)
+
+    def wait_for_messages(self, count, timeout=30):
+        """Ждет, пока бот отправит не меньше count сообщений; True, если дождались"""
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while len(self.sent_messages) < count:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def post_update(self, webhook_url, update, secret_token):
+        """Присылает обновление на вебхук как Telegram; возвращает код ответа"""
+        response = httpx.post(webhook_url, json=update, headers=webhook_headers(secret_token), timeout=10)
+        return response.status_code
+
+    def next_update_id(self):
+        return next(self._update_ids)
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self._dispatch()
+
+            def do_GET(self):
+                self._dispatch()
+
+            def _dispatch(self):
+                # /bot<token>/<method>
+                method = self.path.split('?')[0].rstrip('/').rsplit('/', 1)[-1]
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+                params = _parse_params(self.headers.get('Content-Type', ''), body)
+
+                ok, result = fake.call(method, params)
+                if ok:
+                    payload, status = {'ok': True, 'result': result}, 200
+                else:
+                    status, description, parameters = result
+                    payload = {'ok': False, 'error_code': status, 'description': description}
+                    if parameters:
+                        payload['parameters'] = parameters
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def _parse_params(content_type, body):
+    """Параметры метода: JSON или form-urlencoded (значения-объекты PTB кодирует в JSON)"""
+    if not body:
+        return {}
+    if content_type.startswith('application/json'):
+        return json.loads(body)
+    return dict(parse_qsl(body.decode()))
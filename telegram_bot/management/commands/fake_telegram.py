@@ -0,0 +1,103 @@
+import asyncio
+import time
+
+import httpx
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from telegram_bot.fake_telegram import FakeTelegram, text_update, webhook_headers
+
+
+class Command(BaseCommand):
+    help = (
+        'Run a local fake Telegram Bot API and drive the webhook with test messages. '
+        'Start the ASGI app with TELEGRAM_BOT_MODE=webhook, '
+        'TELEGRAM_BOT_API_BASE_URL=http://127.0.0.1:<port>/bot and any TELEGRAM_BOT_TOKEN.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=8081, help='Port of the fake Bot API')
+        parser.add_argument('--webhook-url', default='http://127.0.0.1:8000/telegram/webhook/')
+        parser.add_argument('--secret', default=settings.TELEGRAM_WEBHOOK_SECRET,
+                            help='Secret token sent with updates (default: TELEGRAM_WEBHOOK_SECRET)')
+        parser.add_argument('--chats', type=int, default=10, help='Number of simulated customers')
+        parser.add_argument('--messages', type=int, default=3, help='Messages per customer')
+        parser.add_argument('--text', default='+375291234567', help='Message text (phone number)')
+        parser.add_argument('--timeout', type=float, default=60, help='Seconds to wait for replies')
+        parser.add_argument('--serve', action='store_true',
+                            help='Only run the fake Bot API until interrupted '
+                                 '(e.g. for send_order_notifications)')
+        parser.add_argument('--enforce-limits', action='store_true',
+                            help='Answer 429 when messages exceed 30/s overall or 1/s per chat')
+
+    def handle(self, *args, **options):
+        fake = FakeTelegram(port=options['port'], enforce_limits=options['enforce_limits'])
+        with fake:
+            self.stdout.write(f'Fake Bot API: {fake.base_url}')
+            if options['serve']:
+                self.serve(fake)
+                return
+            if not options['secret']:
+                raise CommandError('Secret token is required (--secret or TELEGRAM_WEBHOOK_SECRET)')
+            self.check_secret_is_verified(options)
+            self.run_scenario(fake, options)
+
+    def serve(self, fake):
+        try:
+            while True:
+                time.sleep(5)
+                self.stdout.write(
+                    f'calls: {fake.calls}, sent messages: {len(fake.sent_messages)}, '
+                    f'rate limited: {fake.rate_limited}'
+                )
+        except KeyboardInterrupt:
+            pass
+
+    def check_secret_is_verified(self, options):
+        update = text_update(0, 1, '/start')
+        response = httpx.post(options['webhook_url'], json=update,
+                              headers=webhook_headers('wrong-secret'), timeout=10)
+        if response.status_code != 403:
+            raise CommandError(f'Webhook accepted a wrong secret token (status {response.status_code})')
+        self.stdout.write('Wrong secret token rejected: 403')
+
+    def run_scenario(self, fake, options):
+        chats = [900000000 + number for number in range(options['chats'])]
+        updates = [
+            (chat_id, text_update(fake.next_update_id(), chat_id, options['text']))
+            for _ in range(options['messages'])
+            for chat_id in chats
+        ]
+
+        started = time.monotonic()
+        statuses = asyncio.run(self.post_updates(options['webhook_url'], options['secret'], updates))
+        posted = time.monotonic() - started
+        rejected = [status for status in statuses if status != 200]
+        if rejected:
+            raise CommandError(f'{len(rejected)} updates rejected, statuses: {sorted(set(rejected))}')
+
+        expected = len(updates)
+        replied = fake.wait_for_messages(expected, timeout=options['timeout'])
+        elapsed = time.monotonic() - started
+
+        # Ответ на каждое обновление - минимум одно сообщение в тот же чат
+        by_chat = {}
+        for _, chat_id, _ in fake.sent_messages:
+            by_chat[chat_id] = by_chat.get(chat_id, 0) + 1
+        missing = [chat_id for chat_id in chats if by_chat.get(chat_id, 0) < options['messages']]
+
+        self.stdout.write(
+            f'Posted {expected} updates in {posted:.2f}s, '
+            f'{len(fake.sent_messages)} replies in {elapsed:.2f}s '
+            f'({len(fake.sent_messages) / elapsed:.1f} msg/s)'
+        )
+        if not replied or missing:
+            raise CommandError(f'No replies for {len(missing)} chats within {options["timeout"]}s')
+        self.stdout.write(self.style.SUCCESS('All updates answered'))
+
+    async def post_updates(self, webhook_url, secret, updates):
+        async with httpx.AsyncClient(timeout=30, headers=webhook_headers(secret)) as client:
+            responses = await asyncio.gather(*(
+                client.post(webhook_url, json=update) for _, update in updates
+            ))
+        return [response.status_code for response in responses]
@@ -1,5 +1,5 @@
 from django.core.management.base import BaseCommand
-from telegram_bot.bot import bot
+from telegram_bot.bot import get_bot
 
 class Command(BaseCommand):
     help = 'Run Telegram Bot'
@@ -8,4 +8,4 @@ class Command(BaseCommand):
         self.stdout.write(
             self.style.SUCCESS('Starting Telegram Bot...')
         )
-        bot.run()
\ No newline at end of file
+        get_bot().run()
\ No newline at end of file
@@ -0,0 +1,38 @@
+import asyncio
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from telegram_bot.notifications import build_dispatcher
+
+
+class Command(BaseCommand):
+    help = 'Send queued order status notifications to Telegram within the Bot API rate limits'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--loop', action='store_true', help='Keep polling the notification queue')
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds between polls in loop mode')
+
+    def handle(self, *args, **options):
+        if not settings.TELEGRAM_BOT_TOKEN:
+            raise CommandError('TELEGRAM_BOT_TOKEN is not set')
+        try:
+            asyncio.run(self.run(options))
+        except KeyboardInterrupt:
+            pass
+
+    async def run(self, options):
+        dispatcher = build_dispatcher(batch_size=options['batch_size'])
+        async with dispatcher.bot:
+            while True:
+                sent, failed = await dispatcher.dispatch_once()
+                if sent or failed:
+                    self.stdout.write(
+                        self.style.SUCCESS(f'Sent {sent} notifications, {failed} failed')
+                    )
+                if not options['loop']:
+                    break
+                # Пока очередь не пуста, отправляем пачки без паузы
+                if sent + failed < options['batch_size']:
+                    await asyncio.sleep(options['interval'])
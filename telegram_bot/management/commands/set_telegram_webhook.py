@@ -0,0 +1,46 @@
+import asyncio
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from telegram import Bot, Update
+
+
+class Command(BaseCommand):
+    help = 'Register (or delete) the Telegram webhook pointing at the ASGI app'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default=settings.TELEGRAM_WEBHOOK_URL,
+                            help='Public https URL of /telegram/webhook/ (default: TELEGRAM_WEBHOOK_URL)')
+        parser.add_argument('--delete', action='store_true', help='Delete the webhook (back to polling)')
+        parser.add_argument('--drop-pending-updates', action='store_true')
+        parser.add_argument('--max-connections', type=int, default=40,
+                            help='Concurrent webhook requests Telegram may open')
+
+    def handle(self, *args, **options):
+        if not settings.TELEGRAM_BOT_TOKEN:
+            raise CommandError('TELEGRAM_BOT_TOKEN is not set')
+        if not options['delete']:
+            if not options['url']:
+                raise CommandError('Webhook URL is required (--url or TELEGRAM_WEBHOOK_URL)')
+            if not settings.TELEGRAM_WEBHOOK_SECRET:
+                raise CommandError('TELEGRAM_WEBHOOK_SECRET is not set')
+
+        info = asyncio.run(self.configure(options))
+        self.stdout.write(self.style.SUCCESS(
+            f'Webhook: {info.url or "(none)"}, pending updates: {info.pending_update_count}'
+        ))
+
+    async def configure(self, options):
+        bot = Bot(settings.TELEGRAM_BOT_TOKEN, base_url=settings.TELEGRAM_BOT_API_BASE_URL)
+        async with bot:
+            if options['delete']:
+                await bot.delete_webhook(drop_pending_updates=options['drop_pending_updates'])
+            else:
+                await bot.set_webhook(
+                    options['url'],
+                    secret_token=settings.TELEGRAM_WEBHOOK_SECRET,
+                    allowed_updates=Update.ALL_TYPES,
+                    drop_pending_updates=options['drop_pending_updates'],
+                    max_connections=options['max_connections'],
+                )
+            return await bot.get_webhook_info()
@@ -0,0 +1,102 @@
+import time
+from collections import deque
+from functools import wraps
+
+# Сколько последних замеров хранится для перцентилей
+LATENCY_WINDOW = 1000
+
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class LatencyStats:
+    """Число вызовов, ошибки и время выполнения (перцентили по последним замерам)"""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.count = 0
+        self.errors = 0
+        self.max = 0.0
+        self._recent = deque(maxlen=window)
+
+    def add(self, seconds, failed=False):
+        self.count += 1
+        if failed:
+            self.errors += 1
+        self.max = max(self.max, seconds)
+        self._recent.append(seconds)
+
+    def as_dict(self):
+        recent = list(self._recent)
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'p50_ms': round(_percentile(recent, 0.50) * 1000, 1),
+            'p95_ms': round(_percentile(recent, 0.95) * 1000, 1),
+            'max_ms': round(self.max * 1000, 1),
+        }
+
+
+class BotMetrics:
+    """
+    Метрики обработки обновлений бота: глубина очереди (принятые, но еще
+    не запущенные обновления), число выполняемых, ожидание в очереди
+    и время работы каждого обработчика.
+    """
+
+    def __init__(self):
+        self.pending = 0
+        self.max_pending = 0
+        self.running = 0
+        self.queue_wait = LatencyStats()
+        self.handlers = {}
+
+    def update_queued(self):
+        self.pending += 1
+        self.max_pending = max(self.max_pending, self.pending)
+
+    def update_started(self, waited):
+        self.pending -= 1
+        self.running += 1
+        self.queue_wait.add(waited)
+
+    def update_finished(self):
+        self.running -= 1
+
+    def update_dropped(self):
+        """Обновление покинуло очередь, не начав выполняться (остановка бота)"""
+        self.pending -= 1
+
+    def timed(self, name, callback):
+        """Оборачивает async обработчик PTB замером времени под именем name"""
+        stats = self.handlers.setdefault(name, LatencyStats())
+
+        @wraps(callback)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            failed = True
+            try:
+                result = await callback(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                stats.add(time.perf_counter() - started, failed)
+
+        return wrapper
+
+    def snapshot(self, queue_size=0):
+        """
+        queue_size - обновления, которые Application еще не передал обработке
+        (update_queue); вместе с pending дают полную глубину очереди.
+        """
+        return {
+            'queue_depth': queue_size + self.pending,
+            'pending': self.pending,
+            'max_pending': self.max_pending,
+            'running': self.running,
+            'queue_wait': self.queue_wait.as_dict(),
+            'handlers': {name: stats.as_dict() for name, stats in self.handlers.items()},
+        }
@@ -0,0 +1,138 @@
+import asyncio
+import time
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from telegram import Bot
+from telegram.error import BadRequest, Forbidden, RetryAfter, TelegramError
+from telegram.request import HTTPXRequest
+
+from products.notifications import claim_notifications, finish_notifications, notification_text
+
+
+class TokenBucket:
+    """
+    Ограничитель скорости: rate токенов в секунду, не больше capacity подряд.
+    acquire() ждет, пока накопится токен; pause() запрещает отправку на
+    время (ответ 429 с retry_after). clock и sleep подменяются в тестах.
+    """
+
+    def __init__(self, rate, capacity=1, clock=time.monotonic, sleep=asyncio.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = capacity
+        self.updated_at = clock()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self):
+        # Lock: ожидающие получают токены по очереди, без гонки за один токен
+        async with self._lock:
+            while True:
+                now = self.clock()
+                if now < self.paused_until:
+                    await self.sleep(self.paused_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await self.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds):
+        self.paused_until = max(self.paused_until, self.clock() + seconds)
+        self.tokens = 0
+
+    def idle(self, now):
+        """Корзина полна и не на паузе - ее можно удалить и создать заново"""
+        self._refill(now)
+        return self.tokens >= self.capacity and now >= self.paused_until and not self._lock.locked()
+
+
+class ChatRateLimiter:
+    """Отдельная TokenBucket на каждый чат; корзины простаивающих чатов удаляются"""
+
+    def __init__(self, rate, capacity=1, clock=time.monotonic, sleep=asyncio.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.sleep = sleep
+        self._buckets = {}
+
+    def bucket(self, chat_id):
+        bucket = self._buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._buckets[chat_id] = TokenBucket(self.rate, self.capacity, self.clock, self.sleep)
+        return bucket
+
+    def prune(self):
+        now = self.clock()
+        for chat_id in [chat_id for chat_id, bucket in self._buckets.items() if bucket.idle(now)]:
+            del self._buckets[chat_id]
+
+
+class NotificationDispatcher:
+    """
+    Отправляет уведомления о заказах из очереди (products.notifications)
+    через Bot API, соблюдая лимиты Telegram: общий (сообщений в секунду на
+    бота) и на каждый чат. Уведомления разных чатов отправляются
+    параллельно, насколько позволяют лимиты.
+    """
+
+    def __init__(self, bot, global_rate, chat_rate, batch_size=100,
+                 clock=time.monotonic, sleep=asyncio.sleep):
+        self.bot = bot
+        # Без запаса на всплеск: иначе полная корзина плюс пополнение дают
+        # почти вдвое больше global_rate сообщений за секунду
+        self.global_limit = TokenBucket(global_rate, clock=clock, sleep=sleep)
+        self.chat_limits = ChatRateLimiter(chat_rate, clock=clock, sleep=sleep)
+        self.batch_size = batch_size
+
+    async def send(self, notification):
+        """Возвращает (уведомление, error, retry_after, permanent) для finish_notifications"""
+        chat_bucket = self.chat_limits.bucket(notification.chat_id)
+        # Сначала очередь чата, потом общий лимит: ожидание одного чата не тратит общие токены
+        await chat_bucket.acquire()
+        await self.global_limit.acquire()
+        try:
+            await self.bot.send_message(notification.chat_id, notification_text(notification))
+        except RetryAfter as e:
+            retry_after = float(e.retry_after)
+            self.global_limit.pause(retry_after)
+            chat_bucket.pause(retry_after)
+            return notification, str(e), timedelta(seconds=retry_after), False
+        except (Forbidden, BadRequest) as e:
+            # Бот заблокирован, чат не найден - повтор не поможет
+            return notification, str(e), None, True
+        except TelegramError as e:
+            return notification, str(e), None, False
+        return notification, None, None, False
+
+    async def dispatch_once(self):
+        """Отправляет одну пачку уведомлений. Возвращает (отправлено, ошибок)."""
+        notifications = await sync_to_async(claim_notifications)(self.batch_size)
+        if not notifications:
+            return 0, 0
+        results = await asyncio.gather(*(self.send(notification) for notification in notifications))
+        self.chat_limits.prune()
+        return await sync_to_async(finish_notifications)(results)
+
+
+def build_dispatcher(batch_size=100):
+    """Бот и лимиты по настройкам TELEGRAM_*"""
+    # По умолчанию у Bot одно соединение - запросы шли бы строго по одному
+    request = HTTPXRequest(connection_pool_size=int(settings.TELEGRAM_NOTIFY_GLOBAL_RATE) + 1)
+    bot = Bot(settings.TELEGRAM_BOT_TOKEN, base_url=settings.TELEGRAM_BOT_API_BASE_URL, request=request)
+    return NotificationDispatcher(
+        bot,
+        global_rate=settings.TELEGRAM_NOTIFY_GLOBAL_RATE,
+        chat_rate=settings.TELEGRAM_NOTIFY_CHAT_RATE,
+        batch_size=batch_size,
+    )
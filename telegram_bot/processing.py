@@ -0,0 +1,77 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """
+    Обновления разных чатов обрабатываются параллельно, не больше workers
+    одновременно; обновления одного чата - строго по очереди, в порядке
+    получения. Пока чат занят, его следующие обновления ждут, не занимая
+    место в пуле, поэтому один медленный клиент не задерживает остальных.
+
+    max_pending ограничивает число обновлений внутри процессора (ожидающих
+    и выполняемых); следующие ждут, пока кто-то освободит место.
+    """
+
+    def __init__(self, workers, max_pending, metrics):
+        # Семафор базового класса ограничивает принятые обновления,
+        # число одновременно выполняемых ограничивает self._workers
+        super().__init__(max(workers, max_pending))
+        self.workers = workers
+        self.metrics = metrics
+        self._workers = asyncio.Semaphore(workers)
+        # chat_id -> [Lock, число обновлений чата в процессоре]
+        self._chats = {}
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    @staticmethod
+    def _chat_id(update):
+        if isinstance(update, Update) and update.effective_chat is not None:
+            return update.effective_chat.id
+        return None
+
+    @asynccontextmanager
+    async def _chat_turn(self, chat_id):
+        """Очередь чата: asyncio.Lock пропускает ожидающих в порядке прихода"""
+        if chat_id is None:
+            yield
+            return
+
+        entry = self._chats.get(chat_id)
+        if entry is None:
+            entry = self._chats[chat_id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._chats[chat_id]
+
+    async def do_process_update(self, update, coroutine):
+        queued_at = time.monotonic()
+        self.metrics.update_queued()
+        started = False
+        try:
+            async with self._chat_turn(self._chat_id(update)):
+                async with self._workers:
+                    started = True
+                    self.metrics.update_started(time.monotonic() - queued_at)
+                    await coroutine
+        finally:
+            if started:
+                self.metrics.update_finished()
+            else:
+                self.metrics.update_dropped()
+                # Корутина не была запущена (отмена при остановке бота)
+                coroutine.close()
@@ -0,0 +1,221 @@
+import asyncio
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+from telegram import Update
+from telegram.error import Forbidden, RetryAfter
+
+from products.models import Cart, Order, OrderNotification, TelegramUser
+
+from .fake_telegram import text_update
+from .metrics import BotMetrics
+from .notifications import ChatRateLimiter, NotificationDispatcher, TokenBucket
+from .processing import ChatOrderedUpdateProcessor
+
+
+class FakeClock:
+    """Время для TokenBucket: sleep() сдвигает часы, не ожидая по-настоящему"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        # Как и настоящее время, часы сдвигаются хоть немного: ожидание
+        # остатка токена после ошибки округления (1e-16 с) не должно зацикливаться
+        self.now += max(seconds, 1e-6)
+        # Отдаем управление, как настоящий sleep
+        await asyncio.sleep(0)
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+class TokenBucketTests(TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def bucket(self, rate, capacity=1):
+        return TokenBucket(rate, capacity, clock=self.clock, sleep=self.clock.sleep)
+
+    def test_first_token_is_immediate(self):
+        run(self.bucket(rate=2).acquire())
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_tokens_are_spaced_by_rate(self):
+        bucket = self.bucket(rate=4)
+
+        async def acquire_all():
+            times = []
+            for _ in range(5):
+                await bucket.acquire()
+                times.append(self.clock.now)
+            return times
+
+        times = run(acquire_all())
+        self.assertEqual([b - a for a, b in zip(times, times[1:])], [0.25] * 4)
+
+    def test_refill_is_capped_by_capacity(self):
+        bucket = self.bucket(rate=1, capacity=2)
+
+        async def scenario():
+            await bucket.acquire()
+            await bucket.acquire()
+            # Долгий простой: накапливается не больше capacity токенов
+            self.clock.now += 100
+            for _ in range(3):
+                await bucket.acquire()
+
+        run(scenario())
+        self.assertEqual(self.clock.sleeps, [1.0])
+
+    def test_pause_delays_next_token(self):
+        bucket = self.bucket(rate=10)
+
+        async def scenario():
+            await bucket.acquire()
+            bucket.pause(3)
+            started = self.clock.now
+            await bucket.acquire()
+            return self.clock.now - started
+
+        self.assertGreaterEqual(run(scenario()), 3)
+
+    def test_idle_chat_buckets_are_pruned(self):
+        limiter = ChatRateLimiter(rate=1, clock=self.clock, sleep=self.clock.sleep)
+        run(limiter.bucket(1).acquire())
+        limiter.bucket(2)
+
+        limiter.prune()
+        self.assertEqual(set(limiter._buckets), {1})
+
+        self.clock.now += 1
+        limiter.prune()
+        self.assertEqual(limiter._buckets, {})
+
+
+class FakeBot:
+    def __init__(self, clock, errors=None):
+        self.clock = clock
+        self.errors = errors or {}
+        self.sent = []
+
+    async def send_message(self, chat_id, text):
+        error = self.errors.pop(chat_id, None)
+        if error is not None:
+            raise error
+        self.sent.append((self.clock.now, chat_id))
+
+
+class NotificationDispatcherTests(TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        cart = Cart.objects.create(user=User.objects.create_user('client'), is_active=False)
+        self.orders = []
+        for chat_id in (1, 2, 3):
+            TelegramUser.objects.create(phone_number=f'+37529000000{chat_id}', telegram_chat_id=chat_id)
+            for _ in range(2):
+                order = Order.objects.create(
+                    cart=cart, first_name='Иван', last_name='Иванов', phone=f'+37529000000{chat_id}',
+                    email='client@example.com', total_price=10,
+                )
+                OrderNotification.objects.create(order=order, chat_id=chat_id, order_status='confirmed')
+                self.orders.append(order)
+
+    def dispatcher(self, bot, global_rate=2, chat_rate=1):
+        return NotificationDispatcher(
+            bot, global_rate=global_rate, chat_rate=chat_rate,
+            clock=self.clock, sleep=self.clock.sleep,
+        )
+
+    # async тесты: claim/finish через sync_to_async идут в том же потоке и транзакции теста
+    async def test_limits_are_respected(self):
+        bot = FakeBot(self.clock)
+        self.assertEqual(await self.dispatcher(bot).dispatch_once(), (6, 0))
+
+        self.assertEqual(len(bot.sent), 6)
+        by_chat = {}
+        for sent_at, chat_id in bot.sent:
+            by_chat.setdefault(chat_id, []).append(sent_at)
+        for times in by_chat.values():
+            # Не чаще одного сообщения в секунду в чат
+            self.assertGreaterEqual(times[1] - times[0], 1)
+        all_times = sorted(sent_at for sent_at, _ in bot.sent)
+        # Общий лимит 2 в секунду: между сообщениями не меньше 0.5 с
+        self.assertTrue(all(b - a >= 0.5 for a, b in zip(all_times, all_times[1:])))
+        self.assertEqual(await OrderNotification.objects.filter(status='sent').acount(), 6)
+
+    async def test_errors_are_recorded(self):
+        bot = FakeBot(self.clock, errors={
+            1: RetryAfter(30),
+            2: Forbidden('bot was blocked by the user'),
+        })
+        sent, failed = await self.dispatcher(bot, global_rate=100).dispatch_once()
+        self.assertEqual((sent, failed), (4, 2))
+
+        retried = await OrderNotification.objects.aget(chat_id=1, status='pending')
+        # Ограничение Telegram не считается попыткой
+        self.assertEqual(retried.attempts, 0)
+        self.assertIn('30', retried.last_error)
+
+        self.assertTrue(await OrderNotification.objects.filter(chat_id=2, status='failed').aexists())
+        self.assertFalse((await TelegramUser.objects.aget(telegram_chat_id=2)).is_active)
+
+
+class ChatOrderedUpdateProcessorTests(SimpleTestCase):
+    def process(self, workers, chats, messages):
+        """
+        Прогоняет чередующиеся сообщения чатов через процессор. Первые
+        сообщения чата обрабатываются дольше следующих: без очереди чата
+        следующие закончились бы раньше. Возвращает (события, максимум
+        одновременно выполнявшихся).
+        """
+        events = []
+        running = set()
+        max_running = 0
+
+        async def handler(chat_id, number, delay):
+            nonlocal max_running
+            running.add((chat_id, number))
+            max_running = max(max_running, len(running))
+            events.append(('start', chat_id, number))
+            await asyncio.sleep(delay)
+            events.append(('end', chat_id, number))
+            running.discard((chat_id, number))
+
+        async def scenario():
+            processor = ChatOrderedUpdateProcessor(workers=workers, max_pending=100, metrics=BotMetrics())
+            tasks = []
+            for number in range(messages):
+                for chat_id in chats:
+                    update = Update.de_json(text_update(number * 100 + chat_id, chat_id, str(number)), None)
+                    delay = 0.01 * (messages - number)
+                    tasks.append(asyncio.create_task(
+                        processor.process_update(update, handler(chat_id, number, delay))
+                    ))
+                    await asyncio.sleep(0)
+            await asyncio.gather(*tasks)
+
+        asyncio.run(scenario())
+        return events, max_running
+
+    def test_updates_of_one_chat_run_in_order(self):
+        # Свободных обработчиков больше, чем сообщений: ждать заставляет только очередь чата
+        events, max_running = self.process(workers=20, chats=(1, 2, 3), messages=4)
+
+        for chat_id in (1, 2, 3):
+            chat_events = [(kind, number) for kind, chat, number in events if chat == chat_id]
+            self.assertEqual(chat_events, [(kind, number) for number in range(4) for kind in ('start', 'end')])
+        # Разные чаты - одновременно
+        self.assertEqual(max_running, 3)
+
+    def test_concurrency_is_limited_by_workers(self):
+        events, max_running = self.process(workers=2, chats=(1, 2, 3, 4, 5), messages=2)
+
+        self.assertEqual(max_running, 2)
+        self.assertEqual(len(events), 20)
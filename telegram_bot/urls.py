@@ -0,0 +1,7 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('webhook/', views.telegram_webhook, name='telegram-webhook'),
+    path('metrics/', views.telegram_metrics, name='telegram-metrics'),
+]
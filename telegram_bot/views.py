@@ -0,0 +1,52 @@
+import hmac
+import json
+import logging
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+
+from .bot import get_bot
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+
+
+@csrf_exempt
+@require_POST
+async def telegram_webhook(request):
+    """
+    Принимает обновления Telegram (режим TELEGRAM_BOT_MODE='webhook').
+    Запрос без правильного секрета отклоняется до разбора тела.
+    Работает только под ASGI: бот живет в event loop сервера.
+    """
+    secret = settings.TELEGRAM_WEBHOOK_SECRET
+    received = request.headers.get(SECRET_HEADER, '')
+    if not secret or not hmac.compare_digest(received.encode(), secret.encode()):
+        logger.warning('Telegram webhook: неверный секрет от %s', request.META.get('REMOTE_ADDR'))
+        return HttpResponseForbidden()
+
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return HttpResponseBadRequest('Invalid JSON')
+    if not isinstance(data, dict):
+        return HttpResponseBadRequest('Invalid update')
+
+    try:
+        await get_bot().process_webhook_update(data)
+    except (KeyError, TypeError, ValueError) as e:
+        logger.warning('Telegram webhook: не удалось разобрать обновление: %s', e)
+        return HttpResponseBadRequest('Invalid update')
+    return HttpResponse()
+
+
+@require_GET
+async def telegram_metrics(request):
+    """Метрики обработки обновлений бота (глубина очереди, время обработчиков) для персонала"""
+    user = await request.auser()
+    if not user.is_staff:
+        return HttpResponseForbidden()
+    return JsonResponse(get_bot().metrics_snapshot())